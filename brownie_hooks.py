@@ -1,10 +1,74 @@
 """
-Compile-time hook used to set constants.
+Compile-time hook used to set constants, and the template build artifact cache.
 """
+import json
+from hashlib import sha1
 from pathlib import Path
+from typing import Optional
 
 from brownie import ZERO_ADDRESS
 from brownie._config import CONFIG
+from brownie.project.compiler.vyper import find_best_vyper_version
+
+BUILD_PATH = Path(__file__).parent.joinpath("build")
+ARTIFACT_CACHE_PATH = BUILD_PATH.joinpath("cache")
+
+
+def compiler_version(source: str) -> str:
+    """Version of vyper that brownie selects for `source` from its pragma"""
+    return str(find_best_vyper_version({"<stdin>": source}, install_needed=True))
+
+
+def artifact_path(source: str, settings: Optional[dict] = None) -> Path:
+    """
+    Path of the build artifact compiled from `source`. `settings` are the compiler
+    settings it is built with, the project settings unless given.
+    """
+    if settings is None:
+        settings = CONFIG.settings["compiler"]
+    # the output depends on the compiler and its settings as much as on the source
+    settings = json.dumps(settings, sort_keys=True, default=str)
+    key = sha1(f"{compiler_version(source)}\n{settings}\n{source}".encode()).hexdigest()
+    return ARTIFACT_CACHE_PATH.joinpath(f"{key}.json")
+
+
+def load_artifact(source: str, settings: Optional[dict] = None):
+    """Return the cached build artifact compiled from `source`, if there is one"""
+    path = artifact_path(source, settings)
+    if not path.exists():
+        return None
+    with path.open() as fp:
+        return json.load(fp)
+
+
+def store_artifact(source: str, build_json: dict, settings: Optional[dict] = None):
+    ARTIFACT_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+    with artifact_path(source, settings).open("w") as fp:
+        json.dump(build_json, fp, sort_keys=True, default=sorted)
+
+
+def _restore_project_artifact(path: Path, source: str):
+    """
+    Swap the project build artifact for `path` with the cached one matching its
+    substituted source, so switching modes does not recompile the templates
+    """
+    artifact = BUILD_PATH.joinpath(f"contracts/{path.stem}.json")
+    if artifact.exists():
+        try:
+            with artifact.open() as fp:
+                build_json = json.load(fp)
+        except json.JSONDecodeError:
+            build_json = {}
+        if build_json.get("sha1") == sha1(source.encode()).hexdigest():
+            return
+        if "source" in build_json:
+            # keep the outgoing artifact around for the next switch back
+            store_artifact(build_json["source"], build_json)
+
+    build_json = load_artifact(source)
+    if build_json is not None:
+        with artifact.open("w") as fp:
+            json.dump(build_json, fp, sort_keys=True, indent=2, default=sorted)
 
 
 def brownie_load_source(path: Path, source: str):
@@ -27,4 +91,7 @@ def brownie_load_source(path: Path, source: str):
     for k, v in replacements.items():
         source = source.replace(k, str(v))
 
+    if BUILD_PATH.joinpath("contracts").exists():
+        _restore_project_artifact(path, source)
+
     return source
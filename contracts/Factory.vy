@@ -24,6 +24,21 @@ struct BasePoolArray:
     n_coins: uint256
     asset_type: uint256
 
+struct PoolInfo:
+    pool: address
+    base_pool: address
+    implementation: address
+    liquidity_gauge: address
+    coins: address[MAX_PLAIN_COINS]
+    decimals: uint256[MAX_PLAIN_COINS]
+    balances: uint256[MAX_PLAIN_COINS]
+    admin_balances: uint256[MAX_PLAIN_COINS]
+    n_coins: uint256
+    A: uint256
+    fee: uint256
+    admin_fee: uint256
+    asset_type: uint256
+
 
 interface AddressProvider:
     def admin() -> address: view
@@ -108,6 +123,7 @@ event LiquidityGaugeDeployed:
 
 MAX_COINS: constant(int128) = 8
 MAX_PLAIN_COINS: constant(int128) = 4  # max coins in a plain pool
+MAX_MARKET_POOLS: constant(int128) = 32  # max pools returned by `find_pools_for_coins`
 ADDRESS_PROVIDER: constant(address) = 0x0000000022D53366457F9d5E68Ec105046FC4383
 OLD_FACTORY: constant(address) = 0x0959158b6040D32d04c301A72CBFD6b39E21c9AE
 
@@ -142,6 +158,11 @@ gauge_implementation: public(address)
 markets: HashMap[uint256, address[4294967296]]
 market_counts: HashMap[uint256, uint256]
 
+# pool -> coin -> indices of the coin within the pool, each stored plus one so zero
+# means absent: the lowest byte is the index used by `exchange` and the next byte
+# the index used by `exchange_underlying`
+coin_indices: HashMap[address, HashMap[address, uint256]]
+
 
 @external
 def __init__(_fee_receiver: address):
@@ -150,6 +171,76 @@ def __init__(_fee_receiver: address):
     self.fee_receiver = _fee_receiver
 
 
+# <--- Internal Pool Getters --->
+
+@view
+@internal
+def _get_decimals(_pool: address) -> uint256[MAX_PLAIN_COINS]:
+    if self.pool_data[_pool].base_pool != ZERO_ADDRESS:
+        decimals: uint256[MAX_PLAIN_COINS] = empty(uint256[MAX_PLAIN_COINS])
+        decimals = self.pool_data[_pool].decimals
+        decimals[1] = 18
+        return decimals
+    return self.pool_data[_pool].decimals
+
+
+@view
+@internal
+def _get_balances(_pool: address) -> uint256[MAX_PLAIN_COINS]:
+    if self.pool_data[_pool].base_pool != ZERO_ADDRESS:
+        return [CurvePool(_pool).balances(0), CurvePool(_pool).balances(1), 0, 0]
+    n_coins: uint256 = self.pool_data[_pool].n_coins
+    balances: uint256[MAX_PLAIN_COINS] = empty(uint256[MAX_PLAIN_COINS])
+    for i in range(MAX_PLAIN_COINS):
+        if i < n_coins:
+            balances[i] = CurvePool(_pool).balances(i)
+        else:
+            balances[i] = 0
+    return balances
+
+
+@view
+@internal
+def _get_admin_balances(_pool: address) -> uint256[MAX_PLAIN_COINS]:
+    n_coins: uint256 = self.pool_data[_pool].n_coins
+    admin_balances: uint256[MAX_PLAIN_COINS] = empty(uint256[MAX_PLAIN_COINS])
+    for i in range(MAX_PLAIN_COINS):
+        if i == n_coins:
+            break
+        admin_balances[i] = CurvePool(_pool).admin_balances(i)
+    return admin_balances
+
+
+@view
+@internal
+def _get_pool_asset_type(_pool: address) -> uint256:
+    base_pool: address = self.pool_data[_pool].base_pool
+    if base_pool == ZERO_ADDRESS:
+        return self.pool_data[_pool].asset_type
+    else:
+        return self.base_pool_data[base_pool].asset_type
+
+
+@view
+@internal
+def _get_pool_info(_pool: address) -> PoolInfo:
+    pool_info: PoolInfo = empty(PoolInfo)
+    pool_info.pool = _pool
+    pool_info.base_pool = self.pool_data[_pool].base_pool
+    pool_info.implementation = self.pool_data[_pool].implementation
+    pool_info.liquidity_gauge = self.pool_data[_pool].liquidity_gauge
+    pool_info.coins = self.pool_data[_pool].coins
+    pool_info.decimals = self._get_decimals(_pool)
+    pool_info.balances = self._get_balances(_pool)
+    pool_info.admin_balances = self._get_admin_balances(_pool)
+    pool_info.n_coins = self.pool_data[_pool].n_coins
+    pool_info.A = CurvePool(_pool).A()
+    pool_info.fee = CurvePool(_pool).fee()
+    pool_info.admin_fee = CurvePool(_pool).admin_fee()
+    pool_info.asset_type = self._get_pool_asset_type(_pool)
+    return pool_info
+
+
 # <--- Factory Getters --->
 
 @view
@@ -179,6 +270,47 @@ def find_pool_for_coins(_from: address, _to: address, i: uint256 = 0) -> address
     return self.markets[key][i]
 
 
+@view
+@external
+def find_pools_for_coins(
+    _from: address,
+    _to: address,
+    _offset: uint256 = 0,
+    _limit: uint256 = MAX_MARKET_POOLS
+) -> address[MAX_MARKET_POOLS]:
+    """
+    @notice Find all available pools for exchanging two coins
+    @dev Returns at most `MAX_MARKET_POOLS` addresses, unused entries are
+         set to `ZERO_ADDRESS`. Page through larger markets using `_offset`.
+    @param _from Address of coin to be sent
+    @param _to Address of coin to be received
+    @param _offset Index of the first pool to return
+    @param _limit Maximum number of pools to return
+    @return List of pool addresses
+    """
+    key: uint256 = bitwise_xor(convert(_from, uint256), convert(_to, uint256))
+    market_count: uint256 = self.market_counts[key]
+    pools: address[MAX_MARKET_POOLS] = empty(address[MAX_MARKET_POOLS])
+    for i in range(MAX_MARKET_POOLS):
+        if i == _limit or _offset + i >= market_count:
+            break
+        pools[i] = self.markets[key][_offset + i]
+    return pools
+
+
+@view
+@external
+def get_market_count(_from: address, _to: address) -> uint256:
+    """
+    @notice Get the number of pools available for exchanging two coins
+    @param _from Address of coin to be sent
+    @param _to Address of coin to be received
+    @return Number of pools
+    """
+    key: uint256 = bitwise_xor(convert(_from, uint256), convert(_to, uint256))
+    return self.market_counts[key]
+
+
 # <--- Pool Getters --->
 
 @view
@@ -255,12 +387,7 @@ def get_decimals(_pool: address) -> uint256[MAX_PLAIN_COINS]:
     @param _pool Pool address
     @return uint256 list of decimals
     """
-    if self.pool_data[_pool].base_pool != ZERO_ADDRESS:
-        decimals: uint256[MAX_PLAIN_COINS] = empty(uint256[MAX_PLAIN_COINS])
-        decimals = self.pool_data[_pool].decimals
-        decimals[1] = 18
-        return decimals
-    return self.pool_data[_pool].decimals
+    return self._get_decimals(_pool)
 
 
 @view
@@ -310,16 +437,7 @@ def get_balances(_pool: address) -> uint256[MAX_PLAIN_COINS]:
     @param _pool Pool address
     @return uint256 list of balances
     """
-    if self.pool_data[_pool].base_pool != ZERO_ADDRESS:
-        return [CurvePool(_pool).balances(0), CurvePool(_pool).balances(1), 0, 0]
-    n_coins: uint256 = self.pool_data[_pool].n_coins
-    balances: uint256[MAX_PLAIN_COINS] = empty(uint256[MAX_PLAIN_COINS])
-    for i in range(MAX_PLAIN_COINS):
-        if i < n_coins:
-            balances[i] = CurvePool(_pool).balances(i)
-        else:
-            balances[i] = 0
-    return balances
+    return self._get_balances(_pool)
 
 
 @view
@@ -378,13 +496,7 @@ def get_admin_balances(_pool: address) -> uint256[MAX_PLAIN_COINS]:
     @param _pool Pool address
     @return List of uint256 admin balances
     """
-    n_coins: uint256 = self.pool_data[_pool].n_coins
-    admin_balances: uint256[MAX_PLAIN_COINS] = empty(uint256[MAX_PLAIN_COINS])
-    for i in range(MAX_PLAIN_COINS):
-        if i == n_coins:
-            break
-        admin_balances[i] = CurvePool(_pool).admin_balances(i)
-    return admin_balances
+    return self._get_admin_balances(_pool)
 
 
 @view
@@ -401,42 +513,20 @@ def get_coin_indices(
     @param _to Coin address to be used as `j` within a pool
     @return int128 `i`, int128 `j`, boolean indicating if `i` and `j` are underlying coins
     """
-    coin: address = self.pool_data[_pool].coins[0]
-    base_pool: address = self.pool_data[_pool].base_pool
-    if coin in [_from, _to] and base_pool != ZERO_ADDRESS:
-        base_lp_token: address = self.pool_data[_pool].coins[1]
-        if base_lp_token in [_from, _to]:
-            # True and False convert to 1 and 0 - a bit of voodoo that
-            # works because we only ever have 2 non-underlying coins if base pool is ZERO_ADDRESS
-            return convert(_to == coin, int128), convert(_from == coin, int128), False
-
-    found_market: bool = False
-    i: int128 = 0
-    j: int128 = 0
-    for x in range(MAX_COINS):
-        if base_pool == ZERO_ADDRESS:
-            if x >= MAX_PLAIN_COINS:
-                raise "No available market"
-            if x != 0:
-                coin = self.pool_data[_pool].coins[x]
-        else:
-            if x != 0:
-                coin = self.base_pool_data[base_pool].coins[x-1]
-        if coin == ZERO_ADDRESS:
-            raise "No available market"
-        if coin == _from:
-            i = x
-        elif coin == _to:
-            j = x
-        else:
-            continue
-        if found_market:
-            # the second time we find a match, break out of the loop
-            break
-        # the first time we find a match, set `found_market` to True
-        found_market = True
+    i: uint256 = self.coin_indices[_pool][_from]
+    j: uint256 = self.coin_indices[_pool][_to]
+    if _from == _to:
+        raise "No available market"
+
+    if i % 256 != 0 and j % 256 != 0:
+        return convert(i % 256 - 1, int128), convert(j % 256 - 1, int128), False
 
-    return i, j, base_pool != ZERO_ADDRESS
+    # only the coin of a metapool has both indices, its base pool coins only the underlying one
+    i = shift(i, -8)
+    j = shift(j, -8)
+    if i == 0 or j == 0:
+        raise "No available market"
+    return convert(i - 1, int128), convert(j - 1, int128), True
 
 
 @view
@@ -482,11 +572,7 @@ def get_pool_asset_type(_pool: address) -> uint256:
     @param _pool Pool Address
     @return Integer indicating the pool asset type
     """
-    base_pool: address = self.pool_data[_pool].base_pool
-    if base_pool == ZERO_ADDRESS:
-        return self.pool_data[_pool].asset_type
-    else:
-        return self.base_pool_data[base_pool].asset_type
+    return self._get_pool_asset_type(_pool)
 
 
 @view
@@ -499,6 +585,20 @@ def get_fee_receiver(_pool: address) -> address:
         return self.base_pool_data[base_pool].fee_receiver
 
 
+@view
+@external
+def get_pool_data(_pool: address) -> PoolInfo:
+    """
+    @notice Get the registry data and current state of a pool in one call
+    @dev Combines `get_coins`, `get_decimals`, `get_balances`, `get_A`,
+         `get_fees`, `get_admin_balances`, `get_gauge` and `get_pool_asset_type`
+    @param _pool Pool address
+    @return PoolInfo struct for `_pool`
+    """
+    assert self.pool_data[_pool].coins[0] != ZERO_ADDRESS  # dev: unknown pool
+    return self._get_pool_info(_pool)
+
+
 # <--- Pool Deployers --->
 
 @external
@@ -584,6 +684,7 @@ def deploy_plain_pool(
         if coin == ZERO_ADDRESS:
             break
         self.pool_data[pool].coins[i] = coin
+        self.coin_indices[pool][coin] = i + 1
         raw_call(
             coin,
             concat(
@@ -664,12 +765,17 @@ def deploy_metapool(
     self.pool_data[pool].coins[1] = self.base_pool_data[_base_pool].lp_token
     self.pool_data[pool].implementation = implementation
 
+    self.coin_indices[pool][_coin] = 1 + shift(1, 8)
+    self.coin_indices[pool][base_lp_token] = 2
+
     is_finished: bool = False
     for i in range(MAX_COINS):
         swappable_coin: address = self.base_pool_data[_base_pool].coins[i]
         if swappable_coin == ZERO_ADDRESS:
             is_finished = True
             swappable_coin = base_lp_token
+        else:
+            self.coin_indices[pool][swappable_coin] = shift(i + 2, 8)
 
         key: uint256 = bitwise_xor(convert(_coin, uint256), convert(swappable_coin, uint256))
         length = self.market_counts[key]
@@ -938,12 +1044,17 @@ def add_existing_metapools(_pools: address[10]) -> bool:
         base_pool_coins: address[MAX_COINS] = self.base_pool_data[base_pool].coins
         assert base_pool_coins[0] != ZERO_ADDRESS # dev: unknown base pool
 
+        self.coin_indices[pool][coins[0]] = 1 + shift(1, 8)
+        self.coin_indices[pool][coins[1]] = 2
+
         is_finished: bool = False
         for i in range(MAX_COINS):
             swappable_coin: address = base_pool_coins[i]
             if swappable_coin == ZERO_ADDRESS:
                 is_finished = True
                 swappable_coin = coins[1]
+            else:
+                self.coin_indices[pool][swappable_coin] = shift(i + 2, 8)
 
             key: uint256 = bitwise_xor(convert(meta_coin, uint256), convert(swappable_coin, uint256))
             market_idx: uint256 = self.market_counts[key]
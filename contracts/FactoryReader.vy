@@ -0,0 +1,86 @@
+# @version 0.2.15
+"""
+@title Curve Factory Reader
+@license MIT
+@author Curve.Fi
+@notice Batched read-only views over a factory's `pool_list`
+@dev Kept out of the factory so the factory stays within the EIP-170
+     contract size limit
+"""
+
+struct PoolInfo:
+    pool: address
+    base_pool: address
+    implementation: address
+    liquidity_gauge: address
+    coins: address[MAX_PLAIN_COINS]
+    decimals: uint256[MAX_PLAIN_COINS]
+    balances: uint256[MAX_PLAIN_COINS]
+    admin_balances: uint256[MAX_PLAIN_COINS]
+    n_coins: uint256
+    A: uint256
+    fee: uint256
+    admin_fee: uint256
+    asset_type: uint256
+
+# `PoolInfo` fields of several pools, one array per field
+struct PoolsInfo:
+    pool: address[MAX_POOL_INFO]
+    base_pool: address[MAX_POOL_INFO]
+    implementation: address[MAX_POOL_INFO]
+    liquidity_gauge: address[MAX_POOL_INFO]
+    coins: address[MAX_PLAIN_COINS][MAX_POOL_INFO]
+    decimals: uint256[MAX_PLAIN_COINS][MAX_POOL_INFO]
+    balances: uint256[MAX_PLAIN_COINS][MAX_POOL_INFO]
+    admin_balances: uint256[MAX_PLAIN_COINS][MAX_POOL_INFO]
+    n_coins: uint256[MAX_POOL_INFO]
+    A: uint256[MAX_POOL_INFO]
+    fee: uint256[MAX_POOL_INFO]
+    admin_fee: uint256[MAX_POOL_INFO]
+    asset_type: uint256[MAX_POOL_INFO]
+
+
+interface Factory:
+    def pool_list(i: uint256) -> address: view
+    def pool_count() -> uint256: view
+    def get_pool_data(_pool: address) -> PoolInfo: view
+
+
+MAX_PLAIN_COINS: constant(int128) = 4  # max coins in a plain pool
+MAX_POOL_INFO: constant(int128) = 32  # max pools returned by `get_pools_data`
+
+
+@view
+@external
+def get_pools_data(_factory: address, _start: uint256, _count: uint256) -> PoolsInfo:
+    """
+    @notice Get the data for a range of pools within a factory's `pool_list`
+    @dev Returns at most `MAX_POOL_INFO` entries, as one array per `PoolInfo`
+         field. Entries beyond `_count` or the end of `pool_list` are left
+         empty, with `pool` set to `ZERO_ADDRESS`
+    @param _factory Factory address, `Factory` or `FactoryPacked`
+    @param _start Index of the first pool within `pool_list`
+    @param _count Number of pools to return
+    @return PoolsInfo struct, entry `i` of each field belongs to pool `_start + i`
+    """
+    pools_data: PoolsInfo = empty(PoolsInfo)
+    pool_count: uint256 = Factory(_factory).pool_count()
+    for i in range(MAX_POOL_INFO):
+        if i == _count or _start + i >= pool_count:
+            break
+        pool: address = Factory(_factory).pool_list(_start + i)
+        pool_info: PoolInfo = Factory(_factory).get_pool_data(pool)
+        pools_data.pool[i] = pool_info.pool
+        pools_data.base_pool[i] = pool_info.base_pool
+        pools_data.implementation[i] = pool_info.implementation
+        pools_data.liquidity_gauge[i] = pool_info.liquidity_gauge
+        pools_data.coins[i] = pool_info.coins
+        pools_data.decimals[i] = pool_info.decimals
+        pools_data.balances[i] = pool_info.balances
+        pools_data.admin_balances[i] = pool_info.admin_balances
+        pools_data.n_coins[i] = pool_info.n_coins
+        pools_data.A[i] = pool_info.A
+        pools_data.fee[i] = pool_info.fee
+        pools_data.admin_fee[i] = pool_info.admin_fee
+        pools_data.asset_type[i] = pool_info.asset_type
+    return pools_data
@@ -108,6 +108,7 @@ event LiquidityGaugeDeployed:
 
 MAX_COINS: constant(int128) = 8
 MAX_PLAIN_COINS: constant(int128) = 4  # max coins in a plain pool
+MAX_MARKET_POOLS: constant(int128) = 32  # max pools returned by `find_pools_for_coins`
 ADDRESS_PROVIDER: constant(address) = 0x0000000022D53366457F9d5E68Ec105046FC4383
 
 admin: public(address)
@@ -175,6 +176,47 @@ def find_pool_for_coins(_from: address, _to: address, i: uint256 = 0) -> address
     return self.markets[key][i]
 
 
+@view
+@external
+def find_pools_for_coins(
+    _from: address,
+    _to: address,
+    _offset: uint256 = 0,
+    _limit: uint256 = MAX_MARKET_POOLS
+) -> address[MAX_MARKET_POOLS]:
+    """
+    @notice Find all available pools for exchanging two coins
+    @dev Returns at most `MAX_MARKET_POOLS` addresses, unused entries are
+         set to `ZERO_ADDRESS`. Page through larger markets using `_offset`.
+    @param _from Address of coin to be sent
+    @param _to Address of coin to be received
+    @param _offset Index of the first pool to return
+    @param _limit Maximum number of pools to return
+    @return List of pool addresses
+    """
+    key: uint256 = bitwise_xor(convert(_from, uint256), convert(_to, uint256))
+    market_count: uint256 = self.market_counts[key]
+    pools: address[MAX_MARKET_POOLS] = empty(address[MAX_MARKET_POOLS])
+    for i in range(MAX_MARKET_POOLS):
+        if i == _limit or _offset + i >= market_count:
+            break
+        pools[i] = self.markets[key][_offset + i]
+    return pools
+
+
+@view
+@external
+def get_market_count(_from: address, _to: address) -> uint256:
+    """
+    @notice Get the number of pools available for exchanging two coins
+    @param _from Address of coin to be sent
+    @param _to Address of coin to be received
+    @return Number of pools
+    """
+    key: uint256 = bitwise_xor(convert(_from, uint256), convert(_to, uint256))
+    return self.market_counts[key]
+
+
 # <--- Pool Getters --->
 
 @view
@@ -0,0 +1,177 @@
+# @version 0.2.15
+"""
+@title Gauge Batch Claimer
+@author Curve Finance
+@license MIT
+@notice Claim factory gauge rewards for one user across many gauges, or for
+        many users on one gauge, in a single transaction
+@dev Users opt in by setting the forwarder of their receiver, deployed with
+     `deploy_forwarder`, as their `rewards_receiver` on each gauge. Claimed
+     rewards collect in the forwarder and are forwarded once per reward token
+     and forwarder per batch. Rewards claimed directly on a gauge also collect
+     there, and are forwarded with the next batch or by calling the forwarder.
+     Every gauge still transfers its rewards itself, so forwarding adds one
+     transfer per reward token and batch. It is paid back by the transactions
+     the batch saves, and gives the receiver a single transfer per token.
+     Users without a forwarder can still be batched. Each gauge then pays them
+     directly, which is the cheapest option
+"""
+
+interface Gauge:
+    def reward_count() -> uint256: view
+    def reward_tokens(_idx: uint256) -> address: view
+    def rewards_receiver(_addr: address) -> address: view
+    def claim_rewards(_addr: address): nonpayable
+
+interface RewardForwarder:
+    def initialize(_receiver: address): nonpayable
+    def forward(_token: address) -> uint256: nonpayable
+
+
+event ForwarderDeployed:
+    receiver: indexed(address)
+    forwarder: address
+
+
+MAX_GAUGES: constant(uint256) = 32
+MAX_USERS: constant(uint256) = 32
+MAX_REWARDS: constant(uint256) = 8
+MAX_FORWARDS: constant(uint256) = 32  # distinct forwarder / reward token pairs within one batch
+
+
+forwarder_implementation: public(address)
+
+# receiver -> forwarder holding the rewards claimed for that receiver
+forwarders: public(HashMap[address, address])
+# forwarder -> receiver, only set for forwarders deployed here
+forwarder_receivers: public(HashMap[address, address])
+
+
+@external
+def __init__(_forwarder_implementation: address):
+    self.forwarder_implementation = _forwarder_implementation
+
+
+@view
+@internal
+def _forwarder_of(_gauge: address, _user: address) -> address:
+    forwarder: address = Gauge(_gauge).rewards_receiver(_user)
+    if forwarder == ZERO_ADDRESS or self.forwarder_receivers[forwarder] == ZERO_ADDRESS:
+        # claims for `_user` are transferred straight to its receiver
+        return ZERO_ADDRESS
+    return forwarder
+
+
+@external
+def deploy_forwarder(_receiver: address = msg.sender) -> address:
+    """
+    @notice Deploy the forwarder for `_receiver`
+    @dev Set the returned address as `rewards_receiver` on a gauge to claim
+         rewards for `_receiver` through this contract
+    @param _receiver Address the forwarder transfers rewards to
+    @return Address of the forwarder
+    """
+    assert _receiver != ZERO_ADDRESS  # dev: invalid receiver
+    assert self.forwarders[_receiver] == ZERO_ADDRESS  # dev: forwarder exists
+
+    forwarder: address = create_forwarder_to(self.forwarder_implementation)
+    RewardForwarder(forwarder).initialize(_receiver)
+    self.forwarders[_receiver] = forwarder
+    self.forwarder_receivers[forwarder] = _receiver
+
+    log ForwarderDeployed(_receiver, forwarder)
+    return forwarder
+
+
+@external
+@nonreentrant('lock')
+def claim_many(_gauges: address[MAX_GAUGES], _user: address = msg.sender) -> bool:
+    """
+    @notice Claim the rewards of `_user` on several gauges
+    @dev Each reward token is forwarded once per forwarder, however many of the
+         gauges distribute it
+    @param _gauges Gauges to claim from, the first ZERO_ADDRESS ends the list
+    @param _user Address to claim for
+    @return bool success
+    """
+    forwarders: address[MAX_FORWARDS] = empty(address[MAX_FORWARDS])
+    tokens: address[MAX_FORWARDS] = empty(address[MAX_FORWARDS])
+    forward_count: uint256 = 0
+
+    for gauge in _gauges:
+        if gauge == ZERO_ADDRESS:
+            break
+
+        forwarder: address = self._forwarder_of(gauge, _user)
+        if forwarder != ZERO_ADDRESS:
+            reward_count: uint256 = Gauge(gauge).reward_count()
+            for i in range(MAX_REWARDS):
+                if i == reward_count:
+                    break
+                token: address = Gauge(gauge).reward_tokens(i)
+                is_known: bool = False
+                for j in range(MAX_FORWARDS):
+                    if j == forward_count:
+                        break
+                    if tokens[j] == token and forwarders[j] == forwarder:
+                        is_known = True
+                        break
+                if not is_known:
+                    assert forward_count < MAX_FORWARDS  # dev: too many reward tokens
+                    forwarders[forward_count] = forwarder
+                    tokens[forward_count] = token
+                    forward_count += 1
+
+        Gauge(gauge).claim_rewards(_user)
+
+    for i in range(MAX_FORWARDS):
+        if i == forward_count:
+            break
+        RewardForwarder(forwarders[i]).forward(tokens[i])
+
+    return True
+
+
+@external
+@nonreentrant('lock')
+def claim_for_users(_gauge: address, _users: address[MAX_USERS]) -> bool:
+    """
+    @notice Claim the rewards of several users on one gauge
+    @dev Each reward token is forwarded once per distinct forwarder
+    @param _gauge Gauge to claim from
+    @param _users Addresses to claim for, the first ZERO_ADDRESS ends the list
+    @return bool success
+    """
+    forwarders: address[MAX_USERS] = empty(address[MAX_USERS])
+    forwarder_count: uint256 = 0
+
+    for user in _users:
+        if user == ZERO_ADDRESS:
+            break
+        Gauge(_gauge).claim_rewards(user)
+
+        forwarder: address = self._forwarder_of(_gauge, user)
+        if forwarder == ZERO_ADDRESS:
+            continue
+        is_known: bool = False
+        for j in range(MAX_USERS):
+            if j == forwarder_count:
+                break
+            if forwarders[j] == forwarder:
+                is_known = True
+                break
+        if not is_known:
+            forwarders[forwarder_count] = forwarder
+            forwarder_count += 1
+
+    reward_count: uint256 = Gauge(_gauge).reward_count()
+    for i in range(MAX_REWARDS):
+        if i == reward_count:
+            break
+        token: address = Gauge(_gauge).reward_tokens(i)
+        for j in range(MAX_USERS):
+            if j == forwarder_count:
+                break
+            RewardForwarder(forwarders[j]).forward(token)
+
+    return True
@@ -0,0 +1,59 @@
+# @version 0.2.15
+"""
+@title Reward Forwarder
+@author Curve Finance
+@license MIT
+@notice Holds gauge rewards for a single receiver until they are forwarded
+@dev Deployed per receiver by `GaugeBatchClaimer`. Set as the `rewards_receiver`
+     on a gauge, every claim made for the user - in a batch or directly on the
+     gauge - lands here. The balance only ever belongs to `receiver`, so anyone
+     may forward it
+"""
+
+
+receiver: public(address)
+
+
+@external
+def __init__():
+    # the implementation contract is never used directly
+    self.receiver = 0x000000000000000000000000000000000000dEaD
+
+
+@external
+def initialize(_receiver: address):
+    """
+    @notice Proxy initializer
+    @param _receiver Address every reward token held here is forwarded to
+    """
+    assert self.receiver == ZERO_ADDRESS
+    self.receiver = _receiver
+
+
+@external
+def forward(_token: address) -> uint256:
+    """
+    @notice Transfer the full balance of `_token` to `receiver`
+    @param _token Reward token to forward
+    @return Amount forwarded
+    """
+    response: Bytes[32] = raw_call(
+        _token,
+        concat(method_id("balanceOf(address)"), convert(self, bytes32)),
+        max_outsize=32,
+        is_static_call=True,
+    )
+    amount: uint256 = convert(response, uint256)
+    if amount != 0:
+        response = raw_call(
+            _token,
+            concat(
+                method_id("transfer(address,uint256)"),
+                convert(self.receiver, bytes32),
+                convert(amount, bytes32),
+            ),
+            max_outsize=32,
+        )
+        if len(response) != 0:
+            assert convert(response, bool)
+    return amount
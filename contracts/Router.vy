@@ -0,0 +1,214 @@
+# @version 0.3.1
+"""
+@title Factory Router
+@author Curve.fi
+@notice Exchange along a path of Curve factory pools in a single transaction
+@license MIT
+"""
+
+interface Factory:
+    def get_coins(_pool: address) -> address[MAX_PLAIN_COINS]: view
+    def get_underlying_coins(_pool: address) -> address[MAX_COINS]: view
+    def get_coin_indices(_pool: address, _from: address, _to: address) -> (int128, int128, bool): view
+    def is_meta(_pool: address) -> bool: view
+
+interface Swap:
+    def exchange(i: int128, j: int128, _dx: uint256, _min_dy: uint256, _receiver: address) -> uint256: payable
+    def exchange_underlying(i: int128, j: int128, _dx: uint256, _min_dy: uint256, _receiver: address) -> uint256: nonpayable
+    def get_dy(i: int128, j: int128, dx: uint256) -> uint256: view
+    def get_dy_underlying(i: int128, j: int128, dx: uint256) -> uint256: view
+
+interface ERC20:
+    def balanceOf(_owner: address) -> uint256: view
+
+
+MAX_COINS: constant(int128) = 8
+MAX_PLAIN_COINS: constant(int128) = 4
+MAX_HOPS: constant(int128) = 4
+ETH_ADDRESS: constant(address) = 0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE
+
+factory: public(address)
+
+# pool -> coins are approved?
+is_approved: HashMap[address, bool]
+
+
+@external
+def __init__(_factory: address):
+    self.factory = _factory
+
+
+@payable
+@external
+def __default__():
+    # receives ETH from pools on intermediate hops
+    pass
+
+
+@internal
+def _approve(_coin: address, _pool: address):
+    if _coin == ZERO_ADDRESS or _coin == ETH_ADDRESS:
+        return
+    response: Bytes[32] = raw_call(
+        _coin,
+        concat(
+            method_id("approve(address,uint256)"),
+            convert(_pool, bytes32),
+            convert(MAX_UINT256, bytes32),
+        ),
+        max_outsize=32,
+    )
+    if len(response) > 0:
+        assert convert(response, bool)
+
+
+@view
+@internal
+def _balance(_coin: address) -> uint256:
+    if _coin == ETH_ADDRESS:
+        return self.balance
+    return ERC20(_coin).balanceOf(self)
+
+
+@internal
+def _approve_pool(_factory: address, _pool: address):
+    coins: address[MAX_PLAIN_COINS] = Factory(_factory).get_coins(_pool)
+    assert coins[0] != ZERO_ADDRESS  # dev: pool not in factory
+    for coin in coins:
+        self._approve(coin, _pool)
+
+    if Factory(_factory).is_meta(_pool):
+        # the base pool coins are pulled by the metapool in `exchange_underlying`
+        underlying_coins: address[MAX_COINS] = Factory(_factory).get_underlying_coins(_pool)
+        for i in range(1, MAX_COINS):
+            self._approve(underlying_coins[i], _pool)
+
+    self.is_approved[_pool] = True
+
+
+@view
+@external
+def get_dy_path(
+    _pools: address[MAX_HOPS],
+    _coins: address[MAX_HOPS + 1],
+    _amount: uint256,
+) -> uint256:
+    """
+    @notice Calculate the amount received when exchanging along a path of pools
+    @param _pools Pools to exchange in, in order. Unused hops are ZERO_ADDRESS
+    @param _coins Coin sent into the first pool, followed by the coin received
+                  from each pool
+    @param _amount Amount of `_coins[0]` being exchanged
+    @return Amount of the last coin predicted
+    """
+    factory: address = self.factory
+    amount: uint256 = _amount
+
+    for k in range(MAX_HOPS):
+        pool: address = _pools[k]
+        if pool == ZERO_ADDRESS:
+            break
+
+        i: int128 = 0
+        j: int128 = 0
+        is_underlying: bool = False
+        i, j, is_underlying = Factory(factory).get_coin_indices(pool, _coins[k], _coins[k + 1])
+        if is_underlying:
+            amount = Swap(pool).get_dy_underlying(i, j, amount)
+        else:
+            amount = Swap(pool).get_dy(i, j, amount)
+
+    return amount
+
+
+@payable
+@external
+@nonreentrant('lock')
+def exchange(
+    _pools: address[MAX_HOPS],
+    _coins: address[MAX_HOPS + 1],
+    _amount: uint256,
+    _min_received: uint256,
+    _receiver: address = msg.sender,
+) -> uint256:
+    """
+    @notice Exchange along a path of pools
+    @dev Intermediate amounts are held by the router between hops, each hop
+         spends exactly what the previous one delivered. The router must have
+         approval to transfer `_coins[0]` on behalf of the caller, unless it
+         is ETH
+    @param _pools Pools to exchange in, in order. Unused hops are ZERO_ADDRESS
+    @param _coins Coin sent into the first pool, followed by the coin received
+                  from each pool
+    @param _amount Amount of `_coins[0]` being exchanged
+    @param _min_received Minimum amount of the last coin to receive
+    @param _receiver Address that receives the last coin
+    @return Actual amount of the last coin received
+    """
+    factory: address = self.factory
+
+    # every pool is checked against the factory before any coin is approved or moved
+    for k in range(MAX_HOPS):
+        pool: address = _pools[k]
+        if pool == ZERO_ADDRESS:
+            assert k != 0  # dev: empty path
+            break
+        if not self.is_approved[pool]:
+            self._approve_pool(factory, pool)
+
+    coin: address = _coins[0]
+    amount: uint256 = _amount
+    if coin == ETH_ADDRESS:
+        assert msg.value == _amount
+    else:
+        assert msg.value == 0
+        initial: uint256 = ERC20(coin).balanceOf(self)
+        response: Bytes[32] = raw_call(
+            coin,
+            concat(
+                method_id("transferFrom(address,address,uint256)"),
+                convert(msg.sender, bytes32),
+                convert(self, bytes32),
+                convert(_amount, bytes32),
+            ),
+            max_outsize=32,
+        )
+        if len(response) > 0:
+            assert convert(response, bool)
+        amount = ERC20(coin).balanceOf(self) - initial
+
+    for k in range(MAX_HOPS):
+        pool: address = _pools[k]
+        is_last: bool = True
+        if k < MAX_HOPS - 1:
+            is_last = _pools[k + 1] == ZERO_ADDRESS
+        receiver: address = self
+        balance_before: uint256 = 0
+        if is_last:
+            receiver = _receiver
+        else:
+            # measure what the hop sends here, tokens which round on transfer
+            # may arrive short of the amount the pool returns
+            balance_before = self._balance(_coins[k + 1])
+
+        value: uint256 = 0
+        if coin == ETH_ADDRESS:
+            value = amount
+
+        i: int128 = 0
+        j: int128 = 0
+        is_underlying: bool = False
+        i, j, is_underlying = Factory(factory).get_coin_indices(pool, coin, _coins[k + 1])
+        if is_underlying:
+            amount = Swap(pool).exchange_underlying(i, j, amount, 0, receiver)
+        else:
+            amount = Swap(pool).exchange(i, j, amount, 0, receiver, value=value)
+
+        if is_last:
+            break
+        # only the coins received from this hop move on, never other router balances
+        coin = _coins[k + 1]
+        amount = self._balance(coin) - balance_before
+
+    assert amount >= _min_received, "Exchange resulted in fewer coins than expected"
+    return amount
@@ -112,6 +112,8 @@ MAX_A: constant(uint256) = 10 ** 6
 MAX_A_CHANGE: constant(uint256) = 10
 MIN_RAMP_TIME: constant(uint256) = 86400
 
+MAX_QUOTES: constant(int128) = 32
+
 EIP712_TYPEHASH: constant(bytes32) = keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
 PERMIT_TYPEHASH: constant(bytes32) = keccak256("Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)")
 
@@ -543,7 +545,7 @@ def add_liquidity(
 
 @view
 @internal
-def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS]) -> uint256:
+def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS], _amp: uint256, _D: uint256, _y0: uint256) -> uint256:
     # x in the input is converted to the same price/precision
 
     assert i != j       # dev: same coin
@@ -554,8 +556,11 @@ def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS]) -> uint256:
     assert i >= 0
     assert i < N_COINS
 
-    amp: uint256 = self._A()
-    D: uint256 = self.get_D(xp, amp)
+    amp: uint256 = _amp
+    D: uint256 = _D
+    if _D == 0:
+        amp = self._A()
+        D = self.get_D(xp, amp)
     S_: uint256 = 0
     _x: uint256 = 0
     y_prev: uint256 = 0
@@ -574,7 +579,9 @@ def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS]) -> uint256:
 
     c = c * D * A_PRECISION / (Ann * N_COINS)
     b: uint256 = S_ + D * A_PRECISION / Ann  # - D
-    y: uint256 = D
+    y: uint256 = _y0
+    if y == 0:
+        y = D
 
     for _i in range(255):
         y_prev = y
@@ -604,7 +611,7 @@ def get_dy(i: int128, j: int128, dx: uint256) -> uint256:
     xp: uint256[N_COINS] = self._xp_mem(rates, self.balances)
 
     x: uint256 = xp[i] + (dx * rates[i] / PRECISION)
-    y: uint256 = self.get_y(i, j, x, xp)
+    y: uint256 = self.get_y(i, j, x, xp, 0, 0, 0)
     dy: uint256 = xp[j] - y - 1
     fee: uint256 = self.fee * dy / FEE_DENOMINATOR
     return (dy - fee) * PRECISION / rates[j]
@@ -656,7 +663,7 @@ def get_dy_underlying(i: int128, j: int128, dx: uint256) -> uint256:
             return Curve(BASE_POOL).get_dy(base_i, base_j, dx)
 
     # This pool is involved only when in-pool assets are used
-    y: uint256 = self.get_y(meta_i, meta_j, x, xp)
+    y: uint256 = self.get_y(meta_i, meta_j, x, xp, 0, 0, 0)
     dy: uint256 = xp[meta_j] - y - 1
     dy = (dy - self.fee * dy / FEE_DENOMINATOR)
 
@@ -696,7 +703,7 @@ def exchange(
     xp: uint256[N_COINS] = self._xp_mem(rates, old_balances)
 
     x: uint256 = xp[i] + _dx * rates[i] / PRECISION
-    y: uint256 = self.get_y(i, j, x, xp)
+    y: uint256 = self.get_y(i, j, x, xp, 0, 0, 0)
 
     dy: uint256 = xp[j] - y - 1  # -1 just in case there were some rounding errors
     dy_fee: uint256 = dy * self.fee / FEE_DENOMINATOR
@@ -822,7 +829,7 @@ def exchange_underlying(
             # Adding number of pool tokens
             x += xp[MAX_COIN]
 
-        y: uint256 = self.get_y(meta_i, meta_j, x, xp)
+        y: uint256 = self.get_y(meta_i, meta_j, x, xp, 0, 0, 0)
 
         # Either a real coin or token
         dy = xp[meta_j] - y - 1  # -1 just in case there were some rounding errors
@@ -986,7 +993,7 @@ def remove_liquidity_imbalance(
 
 @view
 @internal
-def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256) -> uint256:
+def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256, _y0: uint256) -> uint256:
     """
     Calculate x[i] if one reduces D from being calculated for xp to D
 
@@ -1017,7 +1024,9 @@ def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256) -> uint256:
 
     c = c * D * A_PRECISION / (Ann * N_COINS)
     b: uint256 = S_ + D * A_PRECISION / Ann
-    y: uint256 = D
+    y: uint256 = _y0
+    if y == 0:
+        y = D
 
     for _i in range(255):
         y_prev = y
@@ -1045,7 +1054,7 @@ def _calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256[2]:
 
     total_supply: uint256 = self.totalSupply
     D1: uint256 = D0 - _burn_amount * D0 / total_supply
-    new_y: uint256 = self.get_y_D(amp, i, xp, D1)
+    new_y: uint256 = self.get_y_D(amp, i, xp, D1, 0)
 
     base_fee: uint256 = self.fee * N_COINS / (4 * (N_COINS - 1))
     xp_reduced: uint256[N_COINS] = empty(uint256[N_COINS])
@@ -1059,7 +1068,7 @@ def _calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256[2]:
             dx_expected = xp_j - xp_j * D1 / D0
         xp_reduced[j] = xp_j - base_fee * dx_expected / FEE_DENOMINATOR
 
-    dy: uint256 = xp_reduced[i] - self.get_y_D(amp, i, xp_reduced, D1)
+    dy: uint256 = xp_reduced[i] - self.get_y_D(amp, i, xp_reduced, D1, 0)
     dy_0: uint256 = (xp[i] - new_y) * PRECISION / rates[i]  # w/o fees
     dy = (dy - 1) * PRECISION / rates[i]  # Withdraw less to account for rounding errors
 
@@ -1078,6 +1087,98 @@ def calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256:
     return self._calc_withdraw_one_coin(_burn_amount, i)[0]
 
 
+@view
+@external
+def get_dy_many(i: int128, j: int128, _dx: uint256[MAX_QUOTES]) -> uint256[MAX_QUOTES]:
+    """
+    @notice Calculate the current output dy for each of several input amounts
+    @dev Amounts are quoted against the same pool state, which is only loaded
+         once. For ascending amounts each result seeds the next solve, so a
+         quote may differ from `get_dy` by 1 wei. A zero amount ends the list.
+    @param i Index value for the coin to send
+    @param j Index value of the coin to receive
+    @param _dx Amounts of `i` being exchanged
+    @return Amounts of `j` predicted
+    """
+    rates: uint256[N_COINS] = [self.rate_multiplier, Curve(BASE_POOL).get_virtual_price()]
+    xp: uint256[N_COINS] = self._xp_mem(rates, self.balances)
+    amp: uint256 = self._A()
+    D: uint256 = self.get_D(xp, amp)
+    fee: uint256 = self.fee
+
+    result: uint256[MAX_QUOTES] = empty(uint256[MAX_QUOTES])
+    y: uint256 = 0
+    previous: uint256 = 0
+    for k in range(MAX_QUOTES):
+        dx: uint256 = _dx[k]
+        if dx == 0:
+            break
+        if dx < previous:
+            y = 0  # only seed the solver with a smaller amount's solution
+        previous = dx
+
+        x: uint256 = xp[i] + dx * rates[i] / PRECISION
+        y = self.get_y(i, j, x, xp, amp, D, y)
+        dy: uint256 = xp[j] - y - 1
+        result[k] = (dy - fee * dy / FEE_DENOMINATOR) * PRECISION / rates[j]
+
+    return result
+
+
+@view
+@external
+def calc_withdraw_one_coin_many(_burn_amounts: uint256[MAX_QUOTES], i: int128) -> uint256[MAX_QUOTES]:
+    """
+    @notice Calculate the amount received when withdrawing a single coin
+            for each of several burn amounts
+    @dev Amounts are quoted against the same pool state, which is only loaded
+         once. For ascending amounts each result seeds the next solve, so a
+         quote may differ from `calc_withdraw_one_coin` by 1 wei. A zero
+         amount ends the list.
+    @param _burn_amounts Amounts of LP tokens to burn in the withdrawal
+    @param i Index value of the coin to withdraw
+    @return Amounts of coin received
+    """
+    amp: uint256 = self._A()
+    rates: uint256[N_COINS] = [self.rate_multiplier, Curve(BASE_POOL).get_virtual_price()]
+    xp: uint256[N_COINS] = self._xp_mem(rates, self.balances)
+    D0: uint256 = self.get_D(xp, amp)
+
+    total_supply: uint256 = self.totalSupply
+    base_fee: uint256 = self.fee * N_COINS / (4 * (N_COINS - 1))
+
+    result: uint256[MAX_QUOTES] = empty(uint256[MAX_QUOTES])
+    new_y: uint256 = 0
+    y: uint256 = 0
+    previous: uint256 = 0
+    for k in range(MAX_QUOTES):
+        burn_amount: uint256 = _burn_amounts[k]
+        if burn_amount == 0:
+            break
+        if burn_amount < previous:
+            # only seed the solver with a smaller amount's solution
+            new_y = 0
+            y = 0
+        previous = burn_amount
+
+        D1: uint256 = D0 - burn_amount * D0 / total_supply
+        new_y = self.get_y_D(amp, i, xp, D1, new_y)
+
+        xp_reduced: uint256[N_COINS] = empty(uint256[N_COINS])
+        for j in range(N_COINS):
+            dx_expected: uint256 = 0
+            xp_j: uint256 = xp[j]
+            if j == i:
+                dx_expected = xp_j * D1 / D0 - new_y
+            else:
+                dx_expected = xp_j - xp_j * D1 / D0
+            xp_reduced[j] = xp_j - base_fee * dx_expected / FEE_DENOMINATOR
+        y = self.get_y_D(amp, i, xp_reduced, D1, y)
+        result[k] = (xp_reduced[i] - y - 1) * PRECISION / rates[i]
+
+    return result
+
+
 @external
 @nonreentrant('lock')
 def remove_liquidity_one_coin(
@@ -85,6 +85,8 @@ MAX_A: constant(uint256) = 10 ** 6
 MAX_A_CHANGE: constant(uint256) = 10
 MIN_RAMP_TIME: constant(uint256) = 86400
 
+MAX_QUOTES: constant(int128) = 32
+
 EIP712_TYPEHASH: constant(bytes32) = keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
 PERMIT_TYPEHASH: constant(bytes32) = keccak256("Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)")
 
@@ -708,6 +710,7 @@ def get_y(
     xp: uint256[N_COINS],
     amp: uint256,
     D: uint256,
+    _y0: uint256,
 ) -> uint256:
     """
     Calculate x[j] if one makes x[i] = x
@@ -746,7 +749,9 @@ def get_y(
 
     c = c * D * A_PRECISION / (Ann * N_COINS_256)
     b: uint256 = S_ + D * A_PRECISION / Ann  # - D
-    y: uint256 = D
+    y: uint256 = _y0
+    if y == 0:
+        y = D
 
     for _i in range(255):
         y_prev = y
@@ -779,7 +784,7 @@ def get_dy(i: int128, j: int128, dx: uint256) -> uint256:
     
     amp: uint256 = self._A()
     D: uint256 = self.get_D(xp, amp)
-    y: uint256 = self.get_y(i, j, x, xp, amp, D)
+    y: uint256 = self.get_y(i, j, x, xp, amp, D, 0)
     
     dy: uint256 = xp[j] - y - 1
     fee: uint256 = self.fee * dy / FEE_DENOMINATOR
@@ -819,7 +824,7 @@ def exchange(
 
     amp: uint256 = self._A()
     D: uint256 = self.get_D(xp, amp)
-    y: uint256 = self.get_y(i, j, x, xp, amp, D)
+    y: uint256 = self.get_y(i, j, x, xp, amp, D, 0)
 
     dy: uint256 = xp[j] - y - 1  # -1 just in case there were some rounding errors
     dy_fee: uint256 = dy * self.fee / FEE_DENOMINATOR
@@ -940,7 +945,7 @@ def remove_liquidity_imbalance(
 
 @pure
 @internal
-def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256) -> uint256:
+def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256, _y0: uint256) -> uint256:
     """
     Calculate x[i] if one reduces D from being calculated for xp to D
 
@@ -971,7 +976,9 @@ def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256) -> uint256:
 
     c = c * D * A_PRECISION / (Ann * N_COINS_256)
     b: uint256 = S_ + D * A_PRECISION / Ann
-    y: uint256 = D
+    y: uint256 = _y0
+    if y == 0:
+        y = D
 
     for _i in range(255):
         y_prev = y
@@ -999,7 +1006,7 @@ def _calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256[3]:
 
     total_supply: uint256 = self.totalSupply
     D1: uint256 = D0 - _burn_amount * D0 / total_supply
-    new_y: uint256 = self.get_y_D(amp, i, xp, D1)
+    new_y: uint256 = self.get_y_D(amp, i, xp, D1, 0)
 
     base_fee: uint256 = self.fee * N_COINS_256 / (4 * (N_COINS_256 - 1))
     xp_reduced: uint256[N_COINS] = empty(uint256[N_COINS])
@@ -1013,7 +1020,7 @@ def _calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256[3]:
             dx_expected = xp_j - xp_j * D1 / D0
         xp_reduced[j] = xp_j - base_fee * dx_expected / FEE_DENOMINATOR
 
-    dy: uint256 = xp_reduced[i] - self.get_y_D(amp, i, xp_reduced, D1)
+    dy: uint256 = xp_reduced[i] - self.get_y_D(amp, i, xp_reduced, D1, 0)
     dy_0: uint256 = (xp[i] - new_y) * PRECISION / rates[i]  # w/o fees
     dy = (dy - 1) * PRECISION / rates[i]  # Withdraw less to account for rounding errors
 
@@ -1037,6 +1044,98 @@ def calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256:
     return self._calc_withdraw_one_coin(_burn_amount, i)[0]
 
 
+@view
+@external
+def get_dy_many(i: int128, j: int128, _dx: uint256[MAX_QUOTES]) -> uint256[MAX_QUOTES]:
+    """
+    @notice Calculate the current output dy for each of several input amounts
+    @dev Amounts are quoted against the same pool state, which is only loaded
+         once. For ascending amounts each result seeds the next solve, so a
+         quote may differ from `get_dy` by 1 wei. A zero amount ends the list.
+    @param i Index value for the coin to send
+    @param j Index value of the coin to receive
+    @param _dx Amounts of `i` being exchanged
+    @return Amounts of `j` predicted
+    """
+    rates: uint256[N_COINS] = self.rate_multipliers
+    xp: uint256[N_COINS] = self._xp_mem(rates, self._balances())
+    amp: uint256 = self._A()
+    D: uint256 = self.get_D(xp, amp)
+    fee: uint256 = self.fee
+
+    result: uint256[MAX_QUOTES] = empty(uint256[MAX_QUOTES])
+    y: uint256 = 0
+    previous: uint256 = 0
+    for k in range(MAX_QUOTES):
+        dx: uint256 = _dx[k]
+        if dx == 0:
+            break
+        if dx < previous:
+            y = 0  # only seed the solver with a smaller amount's solution
+        previous = dx
+
+        x: uint256 = xp[i] + dx * rates[i] / PRECISION
+        y = self.get_y(i, j, x, xp, amp, D, y)
+        dy: uint256 = xp[j] - y - 1
+        result[k] = (dy - fee * dy / FEE_DENOMINATOR) * PRECISION / rates[j]
+
+    return result
+
+
+@view
+@external
+def calc_withdraw_one_coin_many(_burn_amounts: uint256[MAX_QUOTES], i: int128) -> uint256[MAX_QUOTES]:
+    """
+    @notice Calculate the amount received when withdrawing a single coin
+            for each of several burn amounts
+    @dev Amounts are quoted against the same pool state, which is only loaded
+         once. For ascending amounts each result seeds the next solve, so a
+         quote may differ from `calc_withdraw_one_coin` by 1 wei. A zero
+         amount ends the list.
+    @param _burn_amounts Amounts of LP tokens to burn in the withdrawal
+    @param i Index value of the coin to withdraw
+    @return Amounts of coin received
+    """
+    amp: uint256 = self._A()
+    rates: uint256[N_COINS] = self.rate_multipliers
+    xp: uint256[N_COINS] = self._xp_mem(rates, self._balances())
+    D0: uint256 = self.get_D(xp, amp)
+
+    total_supply: uint256 = self.totalSupply
+    base_fee: uint256 = self.fee * N_COINS_256 / (4 * (N_COINS_256 - 1))
+
+    result: uint256[MAX_QUOTES] = empty(uint256[MAX_QUOTES])
+    new_y: uint256 = 0
+    y: uint256 = 0
+    previous: uint256 = 0
+    for k in range(MAX_QUOTES):
+        burn_amount: uint256 = _burn_amounts[k]
+        if burn_amount == 0:
+            break
+        if burn_amount < previous:
+            # only seed the solver with a smaller amount's solution
+            new_y = 0
+            y = 0
+        previous = burn_amount
+
+        D1: uint256 = D0 - burn_amount * D0 / total_supply
+        new_y = self.get_y_D(amp, i, xp, D1, new_y)
+
+        xp_reduced: uint256[N_COINS] = empty(uint256[N_COINS])
+        for j in range(N_COINS):
+            dx_expected: uint256 = 0
+            xp_j: uint256 = xp[j]
+            if j == i:
+                dx_expected = xp_j * D1 / D0 - new_y
+            else:
+                dx_expected = xp_j - xp_j * D1 / D0
+            xp_reduced[j] = xp_j - base_fee * dx_expected / FEE_DENOMINATOR
+        y = self.get_y_D(amp, i, xp_reduced, D1, y)
+        result[k] = (xp_reduced[i] - y - 1) * PRECISION / rates[i]
+
+    return result
+
+
 @external
 @nonreentrant('lock')
 def remove_liquidity_one_coin(
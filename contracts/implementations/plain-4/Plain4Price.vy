@@ -83,6 +83,8 @@ MAX_A: constant(uint256) = 10 ** 6
 MAX_A_CHANGE: constant(uint256) = 10
 MIN_RAMP_TIME: constant(uint256) = 86400
 
+MAX_QUOTES: constant(int128) = 32
+
 EIP712_TYPEHASH: constant(bytes32) = keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
 PERMIT_TYPEHASH: constant(bytes32) = keccak256("Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)")
 
@@ -91,10 +93,10 @@ ERC1271_MAGIC_VAL: constant(bytes32) = 0x1626ba7e0000000000000000000000000000000
 VERSION: constant(String[8]) = "v5.0.0"
 
 BIT_MASK: constant(uint256) = shift(2**32 - 1, 224)
+ORACLES_PENDING: constant(uint256) = 2**160
 
 
 factory: address
-originator: address
 
 coins: public(address[N_COINS])
 balances: public(uint256[N_COINS])
@@ -108,6 +110,9 @@ future_A_time: public(uint256)
 rate_multipliers: uint256[N_COINS]
 # [bytes4 method_id][bytes8 <empty>][bytes20 oracle]
 oracles: uint256[N_COINS]
+# [bytes4 method_id][bytes7 <empty>][bytes1 pending][bytes20 address]
+# the originator while the oracles are pending, then the aggregating oracle if any
+oracle_config: uint256
 
 name: public(String[64])
 symbol: public(String[32])
@@ -148,7 +153,7 @@ def initialize(
     assert self.fee == 0
 
     # tx.origin will have the ability to set oracles for coins
-    self.originator = tx.origin
+    self.oracle_config = bitwise_or(convert(tx.origin, uint256), ORACLES_PENDING)
 
     for i in range(N_COINS):
         coin: address = _coins[i]
@@ -300,9 +305,23 @@ def permit(
 @view
 @internal
 def _stored_rates() -> uint256[N_COINS]:
-    assert self.originator == ZERO_ADDRESS
+    oracle_config: uint256 = self.oracle_config
+    assert bitwise_and(oracle_config, ORACLES_PENDING) == 0
     rates: uint256[N_COINS] = self.rate_multipliers
 
+    if oracle_config != 0:
+        # NOTE: assumed that every rate in the response is of precision 10**18
+        rates_response: Bytes[128] = raw_call(
+            convert(oracle_config % 2**160, address),
+            _abi_encode(bitwise_and(oracle_config, BIT_MASK)),
+            max_outsize=128,
+            is_static_call=True,
+        )
+        assert len(rates_response) == 32 * N_COINS
+        for i in range(N_COINS):
+            rates[i] = rates[i] * convert(extract32(rates_response, 32 * i), uint256) / PRECISION
+        return rates
+
     for i in range(N_COINS):
         oracle: uint256 = self.oracles[i]
         if oracle == 0:
@@ -560,7 +579,7 @@ def add_liquidity(
 
 @view
 @internal
-def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS]) -> uint256:
+def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS], _amp: uint256, _D: uint256, _y0: uint256) -> uint256:
     """
     Calculate x[j] if one makes x[i] = x
 
@@ -580,8 +599,11 @@ def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS]) -> uint256:
     assert i >= 0
     assert i < N_COINS
 
-    amp: uint256 = self._A()
-    D: uint256 = self.get_D(xp, amp)
+    amp: uint256 = _amp
+    D: uint256 = _D
+    if _D == 0:
+        amp = self._A()
+        D = self.get_D(xp, amp)
     S_: uint256 = 0
     _x: uint256 = 0
     y_prev: uint256 = 0
@@ -600,7 +622,9 @@ def get_y(i: int128, j: int128, x: uint256, xp: uint256[N_COINS]) -> uint256:
 
     c = c * D * A_PRECISION / (Ann * N_COINS)
     b: uint256 = S_ + D * A_PRECISION / Ann  # - D
-    y: uint256 = D
+    y: uint256 = _y0
+    if y == 0:
+        y = D
 
     for _i in range(255):
         y_prev = y
@@ -630,7 +654,7 @@ def get_dy(i: int128, j: int128, dx: uint256) -> uint256:
     xp: uint256[N_COINS] = self._xp_mem(rates, self.balances)
 
     x: uint256 = xp[i] + (dx * rates[i] / PRECISION)
-    y: uint256 = self.get_y(i, j, x, xp)
+    y: uint256 = self.get_y(i, j, x, xp, 0, 0, 0)
     dy: uint256 = xp[j] - y - 1
     fee: uint256 = self.fee * dy / FEE_DENOMINATOR
     return (dy - fee) * PRECISION / rates[j]
@@ -659,7 +683,7 @@ def exchange(
     xp: uint256[N_COINS] = self._xp_mem(rates, old_balances)
 
     x: uint256 = xp[i] + _dx * rates[i] / PRECISION
-    y: uint256 = self.get_y(i, j, x, xp)
+    y: uint256 = self.get_y(i, j, x, xp, 0, 0, 0)
 
     dy: uint256 = xp[j] - y - 1  # -1 just in case there were some rounding errors
     dy_fee: uint256 = dy * self.fee / FEE_DENOMINATOR
@@ -809,7 +833,7 @@ def remove_liquidity_imbalance(
 
 @pure
 @internal
-def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256) -> uint256:
+def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256, _y0: uint256) -> uint256:
     """
     Calculate x[i] if one reduces D from being calculated for xp to D
 
@@ -840,7 +864,9 @@ def get_y_D(A: uint256, i: int128, xp: uint256[N_COINS], D: uint256) -> uint256:
 
     c = c * D * A_PRECISION / (Ann * N_COINS)
     b: uint256 = S_ + D * A_PRECISION / Ann
-    y: uint256 = D
+    y: uint256 = _y0
+    if y == 0:
+        y = D
 
     for _i in range(255):
         y_prev = y
@@ -868,7 +894,7 @@ def _calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256[2]:
 
     total_supply: uint256 = self.totalSupply
     D1: uint256 = D0 - _burn_amount * D0 / total_supply
-    new_y: uint256 = self.get_y_D(amp, i, xp, D1)
+    new_y: uint256 = self.get_y_D(amp, i, xp, D1, 0)
 
     base_fee: uint256 = self.fee * N_COINS / (4 * (N_COINS - 1))
     xp_reduced: uint256[N_COINS] = empty(uint256[N_COINS])
@@ -882,7 +908,7 @@ def _calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256[2]:
             dx_expected = xp_j - xp_j * D1 / D0
         xp_reduced[j] = xp_j - base_fee * dx_expected / FEE_DENOMINATOR
 
-    dy: uint256 = xp_reduced[i] - self.get_y_D(amp, i, xp_reduced, D1)
+    dy: uint256 = xp_reduced[i] - self.get_y_D(amp, i, xp_reduced, D1, 0)
     dy_0: uint256 = (xp[i] - new_y) * PRECISION / rates[i]  # w/o fees
     dy = (dy - 1) * PRECISION / rates[i]  # Withdraw less to account for rounding errors
 
@@ -901,6 +927,98 @@ def calc_withdraw_one_coin(_burn_amount: uint256, i: int128) -> uint256:
     return self._calc_withdraw_one_coin(_burn_amount, i)[0]
 
 
+@view
+@external
+def get_dy_many(i: int128, j: int128, _dx: uint256[MAX_QUOTES]) -> uint256[MAX_QUOTES]:
+    """
+    @notice Calculate the current output dy for each of several input amounts
+    @dev Amounts are quoted against the same pool state, which is only loaded
+         once. For ascending amounts each result seeds the next solve, so a
+         quote may differ from `get_dy` by 1 wei. A zero amount ends the list.
+    @param i Index value for the coin to send
+    @param j Index value of the coin to receive
+    @param _dx Amounts of `i` being exchanged
+    @return Amounts of `j` predicted
+    """
+    rates: uint256[N_COINS] = self._stored_rates()
+    xp: uint256[N_COINS] = self._xp_mem(rates, self.balances)
+    amp: uint256 = self._A()
+    D: uint256 = self.get_D(xp, amp)
+    fee: uint256 = self.fee
+
+    result: uint256[MAX_QUOTES] = empty(uint256[MAX_QUOTES])
+    y: uint256 = 0
+    previous: uint256 = 0
+    for k in range(MAX_QUOTES):
+        dx: uint256 = _dx[k]
+        if dx == 0:
+            break
+        if dx < previous:
+            y = 0  # only seed the solver with a smaller amount's solution
+        previous = dx
+
+        x: uint256 = xp[i] + dx * rates[i] / PRECISION
+        y = self.get_y(i, j, x, xp, amp, D, y)
+        dy: uint256 = xp[j] - y - 1
+        result[k] = (dy - fee * dy / FEE_DENOMINATOR) * PRECISION / rates[j]
+
+    return result
+
+
+@view
+@external
+def calc_withdraw_one_coin_many(_burn_amounts: uint256[MAX_QUOTES], i: int128) -> uint256[MAX_QUOTES]:
+    """
+    @notice Calculate the amount received when withdrawing a single coin
+            for each of several burn amounts
+    @dev Amounts are quoted against the same pool state, which is only loaded
+         once. For ascending amounts each result seeds the next solve, so a
+         quote may differ from `calc_withdraw_one_coin` by 1 wei. A zero
+         amount ends the list.
+    @param _burn_amounts Amounts of LP tokens to burn in the withdrawal
+    @param i Index value of the coin to withdraw
+    @return Amounts of coin received
+    """
+    amp: uint256 = self._A()
+    rates: uint256[N_COINS] = self._stored_rates()
+    xp: uint256[N_COINS] = self._xp_mem(rates, self.balances)
+    D0: uint256 = self.get_D(xp, amp)
+
+    total_supply: uint256 = self.totalSupply
+    base_fee: uint256 = self.fee * N_COINS / (4 * (N_COINS - 1))
+
+    result: uint256[MAX_QUOTES] = empty(uint256[MAX_QUOTES])
+    new_y: uint256 = 0
+    y: uint256 = 0
+    previous: uint256 = 0
+    for k in range(MAX_QUOTES):
+        burn_amount: uint256 = _burn_amounts[k]
+        if burn_amount == 0:
+            break
+        if burn_amount < previous:
+            # only seed the solver with a smaller amount's solution
+            new_y = 0
+            y = 0
+        previous = burn_amount
+
+        D1: uint256 = D0 - burn_amount * D0 / total_supply
+        new_y = self.get_y_D(amp, i, xp, D1, new_y)
+
+        xp_reduced: uint256[N_COINS] = empty(uint256[N_COINS])
+        for j in range(N_COINS):
+            dx_expected: uint256 = 0
+            xp_j: uint256 = xp[j]
+            if j == i:
+                dx_expected = xp_j * D1 / D0 - new_y
+            else:
+                dx_expected = xp_j - xp_j * D1 / D0
+            xp_reduced[j] = xp_j - base_fee * dx_expected / FEE_DENOMINATOR
+        y = self.get_y_D(amp, i, xp_reduced, D1, y)
+        result[k] = (xp_reduced[i] - y - 1) * PRECISION / rates[i]
+
+    return result
+
+
 @external
 @nonreentrant('lock')
 def remove_liquidity_one_coin(
@@ -994,6 +1112,15 @@ def withdraw_admin_fees():
             _abi_encode(receiver, fees, method_id=method_id("transfer(address,uint256)")),
         )
 
+
+@view
+@internal
+def _assert_originator(_caller: address):
+    oracle_config: uint256 = self.oracle_config
+    assert bitwise_and(oracle_config, ORACLES_PENDING) != 0  # dev: oracles already set
+    assert _caller == convert(oracle_config % 2**160, address)
+
+
 @external
 def set_oracles(_method_ids: uint256[N_COINS], _oracles: address[N_COINS]):
     """
@@ -1002,13 +1129,30 @@ def set_oracles(_method_ids: uint256[N_COINS], _oracles: address[N_COINS]):
     @param _method_ids List of method_ids needed to call on `_oracles` to fetch rate
     @param _oracles List of oracle addresses
     """
-    assert msg.sender == self.originator
+    self._assert_originator(msg.sender)
 
     for i in range(N_COINS):
         assert shift(_method_ids[i], 32) == 0
-        self.oracles[i] = bitwise_and(_method_ids[i], convert(_oracles[i], uint256))
+        self.oracles[i] = bitwise_or(_method_ids[i], convert(_oracles[i], uint256))
+
+    self.oracle_config = 0
+
+
+@external
+def set_rate_oracle(_method_id: uint256, _oracle: address):
+    """
+    @notice Set a single oracle returning the rates of every coin
+    @dev Replaces the per coin oracles with one call, one time use as `set_oracles`.
+        The oracle MUST return `N_COINS` rates of precision 18, 10**18 for coins
+        without a rate.
+    @param _method_id Method id needed to call on `_oracle` to fetch the rates
+    @param _oracle Oracle address
+    """
+    self._assert_originator(msg.sender)
+    assert _oracle != ZERO_ADDRESS
+    assert shift(_method_id, 32) == 0
 
-    self.originator = ZERO_ADDRESS
+    self.oracle_config = bitwise_or(_method_id, convert(_oracle, uint256))
 
 
 @view
@@ -1023,3 +1167,12 @@ def version() -> String[8]:
 @external
 def oracle(_idx: uint256) -> address:
     return convert(self.oracles[_idx] % 2**160, address)
+
+
+@view
+@external
+def rate_oracle() -> address:
+    oracle_config: uint256 = self.oracle_config
+    if bitwise_and(oracle_config, ORACLES_PENDING) != 0:
+        return ZERO_ADDRESS
+    return convert(oracle_config % 2**160, address)
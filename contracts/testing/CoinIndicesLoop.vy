@@ -0,0 +1,83 @@
+# @version 0.2.15
+"""
+@notice The coin loop `Factory.get_coin_indices` used before the coin -> index map
+@dev Used to compare the gas of both lookups. Pools are copied from a factory
+     into the storage the loop reads
+"""
+
+struct PoolArray:
+    base_pool: address
+    coins: address[MAX_PLAIN_COINS]
+
+struct BasePoolArray:
+    coins: address[MAX_COINS]
+
+
+interface Factory:
+    def get_base_pool(_pool: address) -> address: view
+    def get_coins(_pool: address) -> address[MAX_PLAIN_COINS]: view
+    def get_underlying_coins(_pool: address) -> address[MAX_COINS]: view
+
+
+MAX_COINS: constant(int128) = 8
+MAX_PLAIN_COINS: constant(int128) = 4
+
+pool_data: HashMap[address, PoolArray]
+base_pool_data: HashMap[address, BasePoolArray]
+
+
+@external
+def add_pool(_factory: address, _pool: address):
+    base_pool: address = Factory(_factory).get_base_pool(_pool)
+    self.pool_data[_pool].base_pool = base_pool
+    self.pool_data[_pool].coins = Factory(_factory).get_coins(_pool)
+
+    if base_pool != ZERO_ADDRESS:
+        underlying_coins: address[MAX_COINS] = Factory(_factory).get_underlying_coins(_pool)
+        for i in range(MAX_COINS - 1):
+            self.base_pool_data[base_pool].coins[i] = underlying_coins[i + 1]
+
+
+@view
+@external
+def get_coin_indices(
+    _pool: address,
+    _from: address,
+    _to: address
+) -> (int128, int128, bool):
+    coin: address = self.pool_data[_pool].coins[0]
+    base_pool: address = self.pool_data[_pool].base_pool
+    if coin in [_from, _to] and base_pool != ZERO_ADDRESS:
+        base_lp_token: address = self.pool_data[_pool].coins[1]
+        if base_lp_token in [_from, _to]:
+            # True and False convert to 1 and 0 - a bit of voodoo that
+            # works because we only ever have 2 non-underlying coins if base pool is ZERO_ADDRESS
+            return convert(_to == coin, int128), convert(_from == coin, int128), False
+
+    found_market: bool = False
+    i: int128 = 0
+    j: int128 = 0
+    for x in range(MAX_COINS):
+        if base_pool == ZERO_ADDRESS:
+            if x >= MAX_PLAIN_COINS:
+                raise "No available market"
+            if x != 0:
+                coin = self.pool_data[_pool].coins[x]
+        else:
+            if x != 0:
+                coin = self.base_pool_data[base_pool].coins[x-1]
+        if coin == ZERO_ADDRESS:
+            raise "No available market"
+        if coin == _from:
+            i = x
+        elif coin == _to:
+            j = x
+        else:
+            continue
+        if found_market:
+            # the second time we find a match, break out of the loop
+            break
+        # the first time we find a match, set `found_market` to True
+        found_market = True
+
+    return i, j, base_pool != ZERO_ADDRESS
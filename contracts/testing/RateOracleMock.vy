@@ -0,0 +1,44 @@
+# @version 0.3.1
+"""
+@notice Mock rate oracle for testing the price pools
+@dev `rate` serves a single coin, `rates_<n>` serve every coin of an n coin pool
+"""
+
+MAX_COINS: constant(int128) = 4
+
+rate: public(uint256)
+stored_rates: uint256[MAX_COINS]
+
+
+@external
+def __init__():
+    self.rate = 10 ** 18
+    self.stored_rates = [10 ** 18, 10 ** 18, 10 ** 18, 10 ** 18]
+
+
+@external
+def set_rate(_rate: uint256):
+    self.rate = _rate
+
+
+@external
+def set_rates(_rates: uint256[MAX_COINS]):
+    self.stored_rates = _rates
+
+
+@view
+@external
+def rates_2() -> uint256[2]:
+    return [self.stored_rates[0], self.stored_rates[1]]
+
+
+@view
+@external
+def rates_3() -> uint256[3]:
+    return [self.stored_rates[0], self.stored_rates[1], self.stored_rates[2]]
+
+
+@view
+@external
+def rates_4() -> uint256[4]:
+    return self.stored_rates
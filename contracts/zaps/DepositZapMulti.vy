@@ -0,0 +1,573 @@
+# @version 0.2.16
+"""
+@title "Zap" Depositer for permissionless factory metapools
+@author Curve.Fi
+@license Copyright (c) Curve.Fi, 2021 - all rights reserved
+@notice A single zap for the metapools of every factory base pool
+@dev Base pool data is read from the factory the first time a metapool is used
+     and cached here, later calls only read this contract's storage
+"""
+
+interface ERC20:
+    def approve(_spender: address, _amount: uint256): nonpayable
+    def balanceOf(_owner: address) -> uint256: view
+
+interface CurveMeta:
+    def add_liquidity(amounts: uint256[N_COINS], min_mint_amount: uint256, _receiver: address) -> uint256: nonpayable
+    def remove_liquidity(_amount: uint256, min_amounts: uint256[N_COINS]): nonpayable
+    def remove_liquidity_one_coin(_token_amount: uint256, i: int128, min_amount: uint256, _receiver: address) -> uint256: nonpayable
+    def remove_liquidity_imbalance(amounts: uint256[N_COINS], max_burn_amount: uint256) -> uint256: nonpayable
+    def calc_withdraw_one_coin(_token_amount: uint256, i: int128) -> uint256: view
+    def calc_token_amount(amounts: uint256[N_COINS], deposit: bool) -> uint256: view
+    def coins(i: uint256) -> address: view
+
+interface CurveBase:
+    def remove_liquidity_one_coin(_token_amount: uint256, i: int128, min_amount: uint256): nonpayable
+    def calc_withdraw_one_coin(_token_amount: uint256, i: int128) -> uint256: view
+    def fee() -> uint256: view
+
+interface CurveBase2:
+    def add_liquidity(amounts: uint256[2], min_mint_amount: uint256): nonpayable
+    def remove_liquidity(_amount: uint256, min_amounts: uint256[2]): nonpayable
+    def remove_liquidity_imbalance(amounts: uint256[2], max_burn_amount: uint256): nonpayable
+    def calc_token_amount(amounts: uint256[2], deposit: bool) -> uint256: view
+
+interface CurveBase3:
+    def add_liquidity(amounts: uint256[3], min_mint_amount: uint256): nonpayable
+    def remove_liquidity(_amount: uint256, min_amounts: uint256[3]): nonpayable
+    def remove_liquidity_imbalance(amounts: uint256[3], max_burn_amount: uint256): nonpayable
+    def calc_token_amount(amounts: uint256[3], deposit: bool) -> uint256: view
+
+interface CurveBase4:
+    def add_liquidity(amounts: uint256[4], min_mint_amount: uint256): nonpayable
+    def remove_liquidity(_amount: uint256, min_amounts: uint256[4]): nonpayable
+    def remove_liquidity_imbalance(amounts: uint256[4], max_burn_amount: uint256): nonpayable
+    def calc_token_amount(amounts: uint256[4], deposit: bool) -> uint256: view
+
+interface Factory:
+    def get_base_pool(_pool: address) -> address: view
+    def get_coins(_pool: address) -> address[4]: view
+    def get_underlying_coins(_pool: address) -> address[8]: view
+
+
+MAX_BASE_COINS: constant(int128) = 4
+N_COINS: constant(int128) = 2
+MAX_COIN: constant(int128) = N_COINS-1
+N_ALL_COINS: constant(int128) = N_COINS + MAX_BASE_COINS - 1
+
+FEE_DENOMINATOR: constant(uint256) = 10 ** 10
+FEE_IMPRECISION: constant(uint256) = 100 * 10 ** 8  # % of the fee
+
+
+factory: public(address)
+
+# metapool -> [uint96 base pool n_coins][uint160 base pool address]
+pool_data: HashMap[address, uint256]
+
+# base pool -> LP token
+base_lp_token: HashMap[address, address]
+# base pool -> coins
+base_coins: HashMap[address, address[MAX_BASE_COINS]]
+
+# coin -> pool -> is approved to transfer?
+is_approved: HashMap[address, HashMap[address, bool]]
+
+
+@external
+def __init__(_factory: address):
+    """
+    @notice Contract constructor
+    @param _factory Factory the metapools are deployed from
+    """
+    self.factory = _factory
+
+
+@view
+@internal
+def _load_pool_data(_pool: address) -> uint256:
+    data: uint256 = self.pool_data[_pool]
+    if data != 0:
+        return data
+
+    base_pool: address = Factory(self.factory).get_base_pool(_pool)
+    assert base_pool != ZERO_ADDRESS  # dev: not a factory metapool
+
+    # underlying coins are the metapool coin followed by the base pool coins
+    coins: address[8] = Factory(self.factory).get_underlying_coins(_pool)
+    assert coins[MAX_BASE_COINS + 1] == ZERO_ADDRESS  # dev: too many base pool coins
+    n_coins: uint256 = 0
+    for i in range(1, MAX_BASE_COINS + 1):
+        if coins[i] == ZERO_ADDRESS:
+            break
+        n_coins += 1
+
+    return shift(n_coins, 160) + convert(base_pool, uint256)
+
+
+@internal
+def _pool_data(_pool: address) -> uint256:
+    data: uint256 = self.pool_data[_pool]
+    if data != 0:
+        return data
+
+    data = self._load_pool_data(_pool)
+    self.pool_data[_pool] = data
+
+    base_pool: address = convert(data % 2**160, address)
+    if self.base_lp_token[base_pool] == ZERO_ADDRESS:
+        # first metapool of this base pool, the LP token is the second metapool coin
+        self.base_lp_token[base_pool] = Factory(self.factory).get_coins(_pool)[1]
+        coins: address[8] = Factory(self.factory).get_underlying_coins(_pool)
+        for i in range(MAX_BASE_COINS):
+            coin: address = coins[i + 1]
+            if coin == ZERO_ADDRESS:
+                break
+            self.base_coins[base_pool][i] = coin
+            ERC20(coin).approve(base_pool, MAX_UINT256)
+
+    return data
+
+
+@internal
+def _base_add_liquidity(_base_pool: address, _n_coins: int128, _amounts: uint256[MAX_BASE_COINS]):
+    if _n_coins == 2:
+        CurveBase2(_base_pool).add_liquidity([_amounts[0], _amounts[1]], 0)
+    elif _n_coins == 3:
+        CurveBase3(_base_pool).add_liquidity([_amounts[0], _amounts[1], _amounts[2]], 0)
+    else:
+        CurveBase4(_base_pool).add_liquidity(_amounts, 0)
+
+
+@internal
+def _base_remove_liquidity(
+    _base_pool: address, _n_coins: int128, _amount: uint256, _min_amounts: uint256[MAX_BASE_COINS]
+):
+    if _n_coins == 2:
+        CurveBase2(_base_pool).remove_liquidity(_amount, [_min_amounts[0], _min_amounts[1]])
+    elif _n_coins == 3:
+        CurveBase3(_base_pool).remove_liquidity(
+            _amount, [_min_amounts[0], _min_amounts[1], _min_amounts[2]]
+        )
+    else:
+        CurveBase4(_base_pool).remove_liquidity(_amount, _min_amounts)
+
+
+@internal
+def _base_remove_liquidity_imbalance(
+    _base_pool: address, _n_coins: int128, _amounts: uint256[MAX_BASE_COINS], _max_burn_amount: uint256
+):
+    if _n_coins == 2:
+        CurveBase2(_base_pool).remove_liquidity_imbalance([_amounts[0], _amounts[1]], _max_burn_amount)
+    elif _n_coins == 3:
+        CurveBase3(_base_pool).remove_liquidity_imbalance(
+            [_amounts[0], _amounts[1], _amounts[2]], _max_burn_amount
+        )
+    else:
+        CurveBase4(_base_pool).remove_liquidity_imbalance(_amounts, _max_burn_amount)
+
+
+@view
+@internal
+def _base_calc_token_amount(
+    _base_pool: address, _n_coins: int128, _amounts: uint256[MAX_BASE_COINS], _is_deposit: bool
+) -> uint256:
+    if _n_coins == 2:
+        return CurveBase2(_base_pool).calc_token_amount([_amounts[0], _amounts[1]], _is_deposit)
+    elif _n_coins == 3:
+        return CurveBase3(_base_pool).calc_token_amount(
+            [_amounts[0], _amounts[1], _amounts[2]], _is_deposit
+        )
+    return CurveBase4(_base_pool).calc_token_amount(_amounts, _is_deposit)
+
+
+@external
+def add_liquidity(
+    _pool: address,
+    _deposit_amounts: uint256[N_ALL_COINS],
+    _min_mint_amount: uint256,
+    _receiver: address = msg.sender,
+) -> uint256:
+    """
+    @notice Wrap underlying coins and deposit them into `_pool`
+    @dev Amounts past the underlying coins of `_pool` are ignored
+    @param _pool Address of the pool to deposit into
+    @param _deposit_amounts List of amounts of underlying coins to deposit
+    @param _min_mint_amount Minimum amount of LP tokens to mint from the deposit
+    @param _receiver Address that receives the LP tokens
+    @return Amount of LP tokens received by depositing
+    """
+    data: uint256 = self._pool_data(_pool)
+    base_pool: address = convert(data % 2**160, address)
+    base_n_coins: int128 = convert(shift(data, -160), int128)
+
+    meta_amounts: uint256[N_COINS] = empty(uint256[N_COINS])
+    base_amounts: uint256[MAX_BASE_COINS] = empty(uint256[MAX_BASE_COINS])
+    deposit_base: bool = False
+
+    if _deposit_amounts[0] != 0:
+        coin: address = CurveMeta(_pool).coins(0)
+        if not self.is_approved[coin][_pool]:
+            ERC20(coin).approve(_pool, MAX_UINT256)
+            self.is_approved[coin][_pool] = True
+        response: Bytes[32] = raw_call(
+            coin,
+            _abi_encode(
+                msg.sender,
+                self,
+                _deposit_amounts[0],
+                method_id=method_id("transferFrom(address,address,uint256)"),
+            ),
+            max_outsize=32
+        )
+        if len(response) != 0:
+            assert convert(response, bool)
+        # hand fee on transfer
+        meta_amounts[0] = ERC20(coin).balanceOf(self)
+
+    for i in range(1, N_ALL_COINS):
+        if i > base_n_coins:
+            break
+        amount: uint256 = _deposit_amounts[i]
+        if amount == 0:
+            continue
+        deposit_base = True
+        base_idx: int128 = i - 1
+        coin: address = self.base_coins[base_pool][base_idx]
+
+        response: Bytes[32] = raw_call(
+            coin,
+            _abi_encode(
+                msg.sender,
+                self,
+                amount,
+                method_id=method_id("transferFrom(address,address,uint256)"),
+            ),
+            max_outsize=32
+        )
+        if len(response) != 0:
+            assert convert(response, bool)
+
+        # Handle potential transfer fees (i.e. Tether/renBTC)
+        base_amounts[base_idx] = ERC20(coin).balanceOf(self)
+
+    # Deposit to the base pool
+    if deposit_base:
+        coin: address = self.base_lp_token[base_pool]
+        self._base_add_liquidity(base_pool, base_n_coins, base_amounts)
+        meta_amounts[MAX_COIN] = ERC20(coin).balanceOf(self)
+        if not self.is_approved[coin][_pool]:
+            ERC20(coin).approve(_pool, MAX_UINT256)
+            self.is_approved[coin][_pool] = True
+
+    # Deposit to the meta pool
+    return CurveMeta(_pool).add_liquidity(meta_amounts, _min_mint_amount, _receiver)
+
+
+@external
+def remove_liquidity(
+    _pool: address,
+    _burn_amount: uint256,
+    _min_amounts: uint256[N_ALL_COINS],
+    _receiver: address = msg.sender
+) -> uint256[N_ALL_COINS]:
+    """
+    @notice Withdraw and unwrap coins from the pool
+    @dev Withdrawal amounts are based on current deposit ratios
+    @param _pool Address of the pool to deposit into
+    @param _burn_amount Quantity of LP tokens to burn in the withdrawal
+    @param _min_amounts Minimum amounts of underlying coins to receive
+    @param _receiver Address that receives the LP tokens
+    @return List of amounts of underlying coins that were withdrawn
+    """
+    data: uint256 = self._pool_data(_pool)
+    base_pool: address = convert(data % 2**160, address)
+    base_n_coins: int128 = convert(shift(data, -160), int128)
+
+    response: Bytes[32] = raw_call(
+        _pool,
+        _abi_encode(
+            msg.sender,
+            self,
+            _burn_amount,
+            method_id=method_id("transferFrom(address,address,uint256)"),
+        ),
+        max_outsize=32
+    )
+    if len(response) != 0:
+        assert convert(response, bool)
+
+    min_amounts_base: uint256[MAX_BASE_COINS] = empty(uint256[MAX_BASE_COINS])
+    amounts: uint256[N_ALL_COINS] = empty(uint256[N_ALL_COINS])
+
+    # Withdraw from meta
+    meta_received: uint256[N_COINS] = empty(uint256[N_COINS])
+    CurveMeta(_pool).remove_liquidity(_burn_amount, [_min_amounts[0], convert(0, uint256)])
+
+    coins: address[N_COINS] = empty(address[N_COINS])
+    for i in range(N_COINS):
+        coin: address = CurveMeta(_pool).coins(i)
+        coins[i] = coin
+        # Handle fee on transfer for the first coin
+        meta_received[i] = ERC20(coin).balanceOf(self)
+
+    # Withdraw from base
+    for i in range(MAX_BASE_COINS):
+        min_amounts_base[i] = _min_amounts[MAX_COIN+i]
+    self._base_remove_liquidity(base_pool, base_n_coins, meta_received[MAX_COIN], min_amounts_base)
+
+    # Transfer all coins out
+    response = raw_call(
+        coins[0],  # metapool coin 0
+        _abi_encode(
+            _receiver,
+            meta_received[0],
+            method_id=method_id("transfer(address,uint256)"),
+        ),
+        max_outsize=32
+    )
+    if len(response) != 0:
+        assert convert(response, bool)
+
+    amounts[0] = meta_received[0]
+
+    for i in range(1, N_ALL_COINS):
+        if i > base_n_coins:
+            break
+        coin: address = self.base_coins[base_pool][i-1]
+        # handle potential fee on transfer
+        amounts[i] = ERC20(coin).balanceOf(self)
+        response = raw_call(
+            coin,
+            _abi_encode(
+                _receiver,
+                amounts[i],
+                method_id=method_id("transfer(address,uint256)"),
+            ),
+            max_outsize=32
+        )
+        if len(response) != 0:
+            assert convert(response, bool)
+
+    return amounts
+
+
+@external
+def remove_liquidity_one_coin(
+    _pool: address,
+    _burn_amount: uint256,
+    i: int128,
+    _min_amount: uint256,
+    _receiver: address=msg.sender
+) -> uint256:
+    """
+    @notice Withdraw and unwrap a single coin from the pool
+    @param _pool Address of the pool to deposit into
+    @param _burn_amount Amount of LP tokens to burn in the withdrawal
+    @param i Index value of the coin to withdraw
+    @param _min_amount Minimum amount of underlying coin to receive
+    @param _receiver Address that receives the LP tokens
+    @return Amount of underlying coin received
+    """
+    response: Bytes[32] = raw_call(
+        _pool,
+        _abi_encode(
+            msg.sender,
+            self,
+            _burn_amount,
+            method_id=method_id("transferFrom(address,address,uint256)"),
+        ),
+        max_outsize=32
+    )
+    if len(response) != 0:
+        assert convert(response, bool)
+
+    coin_amount: uint256 = 0
+    if i == 0:
+        coin_amount = CurveMeta(_pool).remove_liquidity_one_coin(_burn_amount, i, _min_amount, _receiver)
+    else:
+        base_pool: address = convert(self._pool_data(_pool) % 2**160, address)
+        coin: address = self.base_coins[base_pool][i - MAX_COIN]
+        # Withdraw a base pool coin
+        coin_amount = CurveMeta(_pool).remove_liquidity_one_coin(_burn_amount, MAX_COIN, 0, self)
+        CurveBase(base_pool).remove_liquidity_one_coin(coin_amount, i-MAX_COIN, _min_amount)
+        coin_amount = ERC20(coin).balanceOf(self)
+        response = raw_call(
+            coin,
+            _abi_encode(
+                _receiver,
+                coin_amount,
+                method_id=method_id("transfer(address,uint256)"),
+            ),
+            max_outsize=32
+        )
+        if len(response) != 0:
+            assert convert(response, bool)
+
+    return coin_amount
+
+
+@external
+def remove_liquidity_imbalance(
+    _pool: address,
+    _amounts: uint256[N_ALL_COINS],
+    _max_burn_amount: uint256,
+    _receiver: address=msg.sender
+) -> uint256:
+    """
+    @notice Withdraw coins from the pool in an imbalanced amount
+    @param _pool Address of the pool to deposit into
+    @param _amounts List of amounts of underlying coins to withdraw
+    @param _max_burn_amount Maximum amount of LP token to burn in the withdrawal
+    @param _receiver Address that receives the LP tokens
+    @return Actual amount of the LP token burned in the withdrawal
+    """
+    data: uint256 = self._pool_data(_pool)
+    base_pool: address = convert(data % 2**160, address)
+    n_coins: uint256 = shift(data, -160)
+    base_n_coins: int128 = convert(n_coins, int128)
+
+    fee: uint256 = CurveBase(base_pool).fee() * n_coins / (4 * (n_coins - 1))
+    fee += fee * FEE_IMPRECISION / FEE_DENOMINATOR  # Overcharge to account for imprecision
+
+    # Transfer the LP token in
+    response: Bytes[32] = raw_call(
+        _pool,
+        _abi_encode(
+            msg.sender,
+            self,
+            _max_burn_amount,
+            method_id=method_id("transferFrom(address,address,uint256)"),
+        ),
+        max_outsize=32
+    )
+    if len(response) != 0:
+        assert convert(response, bool)
+
+    withdraw_base: bool = False
+    amounts_base: uint256[MAX_BASE_COINS] = empty(uint256[MAX_BASE_COINS])
+    amounts_meta: uint256[N_COINS] = empty(uint256[N_COINS])
+
+    # determine amounts to withdraw from base pool
+    for i in range(MAX_BASE_COINS):
+        if i == base_n_coins:
+            break
+        amount: uint256 = _amounts[MAX_COIN + i]
+        if amount != 0:
+            amounts_base[i] = amount
+            withdraw_base = True
+
+    # determine amounts to withdraw from metapool
+    amounts_meta[0] = _amounts[0]
+    if withdraw_base:
+        amounts_meta[MAX_COIN] = self._base_calc_token_amount(base_pool, base_n_coins, amounts_base, False)
+        amounts_meta[MAX_COIN] += amounts_meta[MAX_COIN] * fee / FEE_DENOMINATOR + 1
+
+    # withdraw from metapool and return the remaining LP tokens
+    burn_amount: uint256 = CurveMeta(_pool).remove_liquidity_imbalance(amounts_meta, _max_burn_amount)
+    response = raw_call(
+        _pool,
+        _abi_encode(
+            msg.sender,
+            _max_burn_amount - burn_amount,
+            method_id=method_id("transfer(address,uint256)"),
+        ),
+        max_outsize=32
+    )
+    if len(response) != 0:
+        assert convert(response, bool)
+
+    # withdraw from base pool
+    if withdraw_base:
+        self._base_remove_liquidity_imbalance(base_pool, base_n_coins, amounts_base, amounts_meta[MAX_COIN])
+        coin: address = self.base_lp_token[base_pool]
+        leftover: uint256 = ERC20(coin).balanceOf(self)
+
+        if leftover > 0:
+            # if some base pool LP tokens remain, re-deposit them for the caller
+            if not self.is_approved[coin][_pool]:
+                ERC20(coin).approve(_pool, MAX_UINT256)
+                self.is_approved[coin][_pool] = True
+            burn_amount -= CurveMeta(_pool).add_liquidity([convert(0, uint256), leftover], 0, msg.sender)
+
+        # transfer withdrawn base pool tokens to caller
+        for i in range(MAX_BASE_COINS):
+            if i == base_n_coins:
+                break
+            coin = self.base_coins[base_pool][i]
+            response = raw_call(
+                coin,
+                _abi_encode(
+                    _receiver,
+                    ERC20(coin).balanceOf(self),  # handle potential transfer fees
+                    method_id=method_id("transfer(address,uint256)"),
+                ),
+                max_outsize=32
+            )
+            if len(response) != 0:
+                assert convert(response, bool)
+
+    # transfer withdrawn metapool tokens to caller
+    if _amounts[0] > 0:
+        coin: address = CurveMeta(_pool).coins(0)
+        response = raw_call(
+            coin,
+            _abi_encode(
+                _receiver,
+                ERC20(coin).balanceOf(self),  # handle potential fees
+                method_id=method_id("transfer(address,uint256)"),
+            ),
+            max_outsize=32
+        )
+        if len(response) != 0:
+            assert convert(response, bool)
+
+    return burn_amount
+
+
+@view
+@external
+def calc_withdraw_one_coin(_pool: address, _token_amount: uint256, i: int128) -> uint256:
+    """
+    @notice Calculate the amount received when withdrawing and unwrapping a single coin
+    @param _pool Address of the pool to deposit into
+    @param _token_amount Amount of LP tokens to burn in the withdrawal
+    @param i Index value of the underlying coin to withdraw
+    @return Amount of coin received
+    """
+    if i < MAX_COIN:
+        return CurveMeta(_pool).calc_withdraw_one_coin(_token_amount, i)
+    else:
+        base_pool: address = convert(self._load_pool_data(_pool) % 2**160, address)
+        _base_tokens: uint256 = CurveMeta(_pool).calc_withdraw_one_coin(_token_amount, MAX_COIN)
+        return CurveBase(base_pool).calc_withdraw_one_coin(_base_tokens, i-MAX_COIN)
+
+
+@view
+@external
+def calc_token_amount(_pool: address, _amounts: uint256[N_ALL_COINS], _is_deposit: bool) -> uint256:
+    """
+    @notice Calculate addition or reduction in token supply from a deposit or withdrawal
+    @dev This calculation accounts for slippage, but not fees.
+         Needed to prevent front-running, not for precise calculations!
+    @param _pool Address of the pool to deposit into
+    @param _amounts Amount of each underlying coin being deposited
+    @param _is_deposit set True for deposits, False for withdrawals
+    @return Expected amount of LP tokens received
+    """
+    data: uint256 = self._load_pool_data(_pool)
+    base_pool: address = convert(data % 2**160, address)
+    base_n_coins: int128 = convert(shift(data, -160), int128)
+
+    meta_amounts: uint256[N_COINS] = empty(uint256[N_COINS])
+    base_amounts: uint256[MAX_BASE_COINS] = empty(uint256[MAX_BASE_COINS])
+
+    meta_amounts[0] = _amounts[0]
+    for i in range(MAX_BASE_COINS):
+        if i == base_n_coins:
+            break
+        base_amounts[i] = _amounts[i + MAX_COIN]
+
+    base_tokens: uint256 = self._base_calc_token_amount(base_pool, base_n_coins, base_amounts, _is_deposit)
+    meta_amounts[MAX_COIN] = base_tokens
+
+    return CurveMeta(_pool).calc_token_amount(meta_amounts, _is_deposit)
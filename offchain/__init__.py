@@ -0,0 +1,3 @@
+"""
+Off-chain ports of the factory contracts, for quoting and analysis without RPC calls.
+"""
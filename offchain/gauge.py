@@ -0,0 +1,337 @@
+"""
+Vectorized off-chain evaluation of factory gauge claimables.
+
+`claimable_tokens(user)` is a non-view which re-runs `_checkpoint` and
+`claimable_reward(user, token)` recomputes the reward integral from
+`reward_data` on every call, so querying every user of a gauge costs one call
+per user and token. `evaluate` reproduces both for all users of a gauge at once:
+the gauge wide integrals are advanced to the evaluated timestamp a single time,
+and the per-user terms are computed as NumPy `object` arrays of python integers,
+so every value matches the contract bit-for-bit.
+
+The result also holds the values a checkpoint at that timestamp would store,
+`reward_data[token].integral`, `reward_integral_for[token][user]`,
+`integrate_inv_supply` and `integrate_fraction[user]`, following the integer
+arithmetic of `_checkpoint_rewards` and `_checkpoint` in `LiquidityGauge.vy`.
+The inflation integral depends on the gauge controller weight of every week
+since the last checkpoint and on the CRV emission rate; the weights are read
+through `gauge_relative_weight_write` so weeks the controller has not yet been
+checkpointed for resolve as they would on-chain, and the rate reduction applied
+by `future_epoch_time_write` is recomputed from the CRV epoch.
+
+Inputs are split between gauge events and storage. `GaugeLedger` consumes the
+`Transfer` and `UpdateLiquidityLimit` logs of a gauge (as `indexer.Log` records)
+and maintains the set of users with their balances and working balances, along
+with the total and working supply. `GaugeReader` reads the remaining state at a
+block: the global integrals once per gauge, and the per-user integrals for every
+user of a ledger. The claimable half of `claim_data` is not exposed by a getter
+and is read from its storage slot directly.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List
+
+import numpy as np
+from eth_utils import keccak
+
+from offchain.indexer import ZERO_ADDRESS, Log, _address
+from offchain.stableswap import as_uint
+
+PRECISION = 10 ** 18
+WEEK = 604800
+YEAR = 86400 * 365
+
+# ERC20CRV emission schedule, applied by `future_epoch_time_write`
+INITIAL_RATE = 274815283 * 10 ** 18 // YEAR
+RATE_REDUCTION_COEFFICIENT = 1189207115002721024
+
+# storage slot of `claim_data` in the vyper 0.2.15 factory gauges, every factory gauge
+# variant shares it. The two fixed size period arrays before it occupy ~1e29 slots each,
+# and the compiler sizes them with float division, hence the odd value
+CLAIM_DATA_SLOT = 199999999999999982866301714469
+
+
+@dataclass
+class RewardData:
+    token: str
+    distributor: str
+    period_finish: int
+    rate: int
+    last_update: int
+    integral: int
+
+
+@dataclass
+class GaugeState:
+    """Gauge wide state read at one block, evaluated at `timestamp`"""
+
+    timestamp: int
+    total_supply: int
+    working_supply: int
+    rewards: List[RewardData]
+    period_timestamp: int
+    integrate_inv_supply: int
+    inflation_rate: int
+    future_epoch_time: int
+    is_killed: bool
+    crv_rate: int
+    crv_start_epoch_time: int
+    # week start -> gauge relative weight, for every week since `period_timestamp`
+    weights: Dict[int, int] = field(default_factory=dict)
+
+
+@dataclass
+class UserTable:
+    """Per-user gauge state, one row per user and one column per reward token"""
+
+    users: List[str]
+    balances: np.ndarray
+    working_balances: np.ndarray
+    integrate_inv_supply_of: np.ndarray
+    integrate_fraction: np.ndarray
+    minted: np.ndarray
+    reward_integral_for: np.ndarray
+    claim_data: np.ndarray
+
+
+@dataclass
+class GaugeSnapshot:
+    """State a checkpoint at the evaluated timestamp would store, and the claimables"""
+
+    reward_integral: np.ndarray
+    reward_integral_for: np.ndarray
+    integrate_inv_supply: int
+    integrate_fraction: np.ndarray
+    claimable_reward: np.ndarray
+    claimable_tokens: np.ndarray
+
+
+def _word(address: str) -> bytes:
+    return bytes.fromhex(address[2:]).rjust(32, b"\0")
+
+
+def _new_rate(state: GaugeState) -> int:
+    # CRV rate once `future_epoch_time_write` has run at `state.timestamp`
+    rate = state.crv_rate
+    if state.timestamp >= state.crv_start_epoch_time + YEAR:
+        rate = INITIAL_RATE if rate == 0 else rate * PRECISION // RATE_REDUCTION_COEFFICIENT
+    return rate
+
+
+def weeks_since(period_time: int, timestamp: int) -> List[int]:
+    """Week starts `_checkpoint` reads a gauge weight for between two timestamps"""
+    if timestamp <= period_time:
+        return []
+    return list(range(period_time // WEEK * WEEK, timestamp // WEEK * WEEK + 1, WEEK))[:500]
+
+
+def integrate_inv_supply(state: GaugeState) -> int:
+    """`integrate_inv_supply` after a checkpoint at `state.timestamp`, mirrors `_checkpoint`"""
+    period_time = state.period_timestamp
+    integral = state.integrate_inv_supply
+    rate = state.inflation_rate
+    new_rate = rate
+    prev_future_epoch = state.future_epoch_time
+    if prev_future_epoch >= period_time:
+        new_rate = _new_rate(state)
+    if state.is_killed:
+        rate = 0
+
+    timestamp = state.timestamp
+    if timestamp <= period_time:
+        return integral
+
+    working_supply = state.working_supply
+    prev_week_time = period_time
+    week_time = min((period_time + WEEK) // WEEK * WEEK, timestamp)
+    for _ in range(500):
+        dt = week_time - prev_week_time
+        w = state.weights[prev_week_time // WEEK * WEEK]
+        if working_supply > 0:
+            if prev_week_time <= prev_future_epoch < week_time:
+                integral += rate * w * (prev_future_epoch - prev_week_time) // working_supply
+                rate = new_rate
+                integral += rate * w * (week_time - prev_future_epoch) // working_supply
+            else:
+                integral += rate * w * dt // working_supply
+        if week_time == timestamp:
+            break
+        prev_week_time = week_time
+        week_time = min(week_time + WEEK, timestamp)
+    return integral
+
+
+def reward_integrals(state: GaugeState) -> np.ndarray:
+    """`reward_data[token].integral` at `state.timestamp` for every reward token"""
+    integrals = []
+    for reward in state.rewards:
+        integral = reward.integral
+        if state.total_supply != 0:
+            duration = min(state.timestamp, reward.period_finish) - reward.last_update
+            integral += duration * reward.rate * PRECISION // state.total_supply
+        integrals.append(integral)
+    return as_uint(integrals)
+
+
+def evaluate(state: GaugeState, table: UserTable) -> GaugeSnapshot:
+    """
+    Evaluate the claimables of every user in `table` at `state.timestamp`.
+
+    `claimable_reward[u, r]` and `claimable_tokens[u]` equal what the contract
+    returns for the user in row `u` and the reward token in column `r`.
+    """
+    integral = reward_integrals(state).reshape(1, -1)
+    integral_for = table.reward_integral_for.reshape(len(table.users), -1)
+    balances = table.balances.reshape(-1, 1)
+    claimable_reward = (table.claim_data >> 128) + balances * (integral - integral_for) // PRECISION
+
+    inv_supply = integrate_inv_supply(state)
+    integrate_fraction = (
+        table.integrate_fraction
+        + table.working_balances * (inv_supply - table.integrate_inv_supply_of) // PRECISION
+    )
+
+    return GaugeSnapshot(
+        reward_integral=integral.reshape(-1),
+        reward_integral_for=np.where(integral_for < integral, integral, integral_for),
+        integrate_inv_supply=inv_supply,
+        integrate_fraction=integrate_fraction,
+        claimable_reward=claimable_reward,
+        claimable_tokens=integrate_fraction - table.minted,
+    )
+
+
+class GaugeLedger:
+    """
+    Balances and working balances of one gauge, maintained from its logs.
+
+    Every change to a balance emits `Transfer` (from or to ZERO_ADDRESS for deposits
+    and withdrawals) and every change to a working balance emits
+    `UpdateLiquidityLimit`, so neither needs a storage read.
+    """
+
+    def __init__(self, gauge: str):
+        self.gauge = _address(gauge)
+        self.balances: Dict[str, int] = {}
+        self.working_balances: Dict[str, int] = {}
+        self.total_supply = 0
+        self.working_supply = 0
+
+    @property
+    def users(self) -> List[str]:
+        return sorted(set(self.balances) | set(self.working_balances))
+
+    def ingest(self, logs: Iterable[Log]) -> int:
+        """Apply `logs` in chain order, returning the number of gauge logs applied"""
+        count = 0
+        for log in logs:
+            if log.address != self.gauge:
+                continue
+            if log.event == "Transfer":
+                sender, receiver = _address(log.args["_from"]), _address(log.args["_to"])
+                value = log.args["_value"]
+                if sender == ZERO_ADDRESS:
+                    self.total_supply += value
+                else:
+                    self.balances[sender] -= value
+                if receiver == ZERO_ADDRESS:
+                    self.total_supply -= value
+                else:
+                    self.balances[receiver] = self.balances.get(receiver, 0) + value
+            elif log.event == "UpdateLiquidityLimit":
+                self.working_balances[_address(log.args["user"])] = log.args["working_balance"]
+                self.working_supply = log.args["working_supply"]
+            else:
+                continue
+            count += 1
+        return count
+
+
+class GaugeReader:
+    """
+    Storage reads needed by `evaluate`, made at a single block.
+
+    `gauge`, `controller`, `crv` and `minter` are contract objects whose calls
+    accept `block_identifier` as brownie contract calls do.
+    `read_storage(address, slot, block)` returns the raw storage word as an integer.
+    """
+
+    def __init__(self, gauge, controller, crv, minter, read_storage: Callable):
+        self.gauge = gauge
+        self.controller = controller
+        self.crv = crv
+        self.minter = minter
+        self.read_storage = read_storage
+
+    def reward_tokens(self, block: int) -> List[str]:
+        count = self.gauge.reward_count(block_identifier=block)
+        return [_address(self.gauge.reward_tokens(i, block_identifier=block)) for i in range(count)]
+
+    def gauge_state(self, ledger: GaugeLedger, block: int, timestamp: int) -> GaugeState:
+        gauge = self.gauge
+        period = gauge.period(block_identifier=block)
+        period_time = int(gauge.period_timestamp(period, block_identifier=block))
+        weights = {
+            week: int(
+                self.controller.gauge_relative_weight_write.call(
+                    gauge, week, block_identifier=block
+                )
+            )
+            for week in weeks_since(period_time, timestamp)
+        }
+        rewards = [
+            RewardData(_address(token), _address(distributor), *map(int, values))
+            for token, distributor, *values in (
+                gauge.reward_data(token, block_identifier=block)
+                for token in self.reward_tokens(block)
+            )
+        ]
+        return GaugeState(
+            timestamp=timestamp,
+            total_supply=ledger.total_supply,
+            working_supply=ledger.working_supply,
+            rewards=rewards,
+            period_timestamp=period_time,
+            integrate_inv_supply=int(gauge.integrate_inv_supply(period, block_identifier=block)),
+            inflation_rate=int(gauge.inflation_rate(block_identifier=block)),
+            future_epoch_time=int(gauge.future_epoch_time(block_identifier=block)),
+            is_killed=bool(gauge.is_killed(block_identifier=block)),
+            crv_rate=int(self.crv.rate(block_identifier=block)),
+            crv_start_epoch_time=int(self.crv.start_epoch_time(block_identifier=block)),
+            weights=weights,
+        )
+
+    def claim_data(self, user: str, token: str, block: int) -> int:
+        # vyper hashes the slot before the key, nested maps hash the outer slot again
+        slot = keccak(CLAIM_DATA_SLOT.to_bytes(32, "big") + _word(user))
+        slot = keccak(slot + _word(token))
+        return self.read_storage(self.gauge.address, int.from_bytes(slot, "big"), block)
+
+    def user_table(self, ledger: GaugeLedger, block: int) -> UserTable:
+        gauge = self.gauge
+        users = ledger.users
+        tokens = self.reward_tokens(block)
+
+        def _column(getter):
+            return as_uint([int(getter(user)) for user in users])
+
+        def _rewards(getter):
+            values = [[int(getter(user, token)) for token in tokens] for user in users]
+            return as_uint(values).reshape(len(users), len(tokens))
+
+        return UserTable(
+            users=users,
+            balances=as_uint([ledger.balances.get(user, 0) for user in users]),
+            working_balances=as_uint([ledger.working_balances.get(user, 0) for user in users]),
+            integrate_inv_supply_of=_column(
+                lambda user: gauge.integrate_inv_supply_of(user, block_identifier=block)
+            ),
+            integrate_fraction=_column(
+                lambda user: gauge.integrate_fraction(user, block_identifier=block)
+            ),
+            minted=_column(lambda user: self.minter.minted(user, gauge, block_identifier=block)),
+            reward_integral_for=_rewards(
+                lambda user, token: gauge.reward_integral_for(token, user, block_identifier=block)
+            ),
+            claim_data=_rewards(lambda user, token: self.claim_data(user, token, block)),
+        )
@@ -0,0 +1,581 @@
+"""
+Event-sourced local index of the factory pools.
+
+`Indexer` consumes factory and pool logs in chain order and maintains the
+balances, LP supply, amplification and fee of every factory pool without reading
+pool storage. Each applied log appends a row to the `states` table of a SQLite
+database, so the state of a pool at any indexed block is a single query.
+
+Log effects are applied exactly as the contracts apply them. Liquidity events
+carry every amount needed; exchanges and single coin withdrawals do not include
+the admin fee charged, which is recomputed against the indexed state: exchanges
+with the scalar port of `offchain.simulator`, single coin withdrawals with the
+`stableswap` port evaluating every coin at once. The `dy` logged by an exchange
+is checked against the port and a pool is flagged as inexact if they ever
+disagree, e.g. for implementations that track rebasing token balances.
+
+Metapool math depends on the base pool virtual price, so the base pool of every
+metapool is indexed as well. Base pools predate the factory and are bootstrapped
+from a single snapshot taken at the block where the first metapool using them is
+deployed.
+
+`RemoveLiquidityOne` does not log the coin withdrawn either. It is the coin
+whose recomputed amount matches the logged one; when several coins match, as in
+a balanced pool of coins sharing decimals, the coin `Transfer` out of the pool in
+the same transaction decides, so log sources should include the `Transfer` logs
+of the pool coins. A withdrawal that stays ambiguous flags the pool as inexact.
+
+Logs are given as `Log` records. `receipt_logs` converts a brownie transaction
+receipt, and `Indexer.backfill` streams any `fetch_logs(start, stop)` source in
+block windows, committing as it goes so memory is bounded by the window size.
+Deployment logs do not include the pool address; it is resolved from
+`Factory.pool_list` by ordinal, so indexing must start at the factory deployment.
+"""
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from offchain import stableswap
+from offchain.simulator import ZERO_ADDRESS, Revert, get_D, get_y
+
+A_PRECISION = stableswap.A_PRECISION
+FEE_DENOMINATOR = stableswap.FEE_DENOMINATOR
+PRECISION = stableswap.PRECISION
+ADMIN_FEE = stableswap.ADMIN_FEE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    block INTEGER, log_index INTEGER, tx_hash TEXT, address TEXT, event TEXT, args TEXT,
+    PRIMARY KEY (block, log_index)
+);
+CREATE TABLE IF NOT EXISTS pools (
+    address TEXT PRIMARY KEY, pool_index INTEGER, base_pool TEXT, coins TEXT, rates TEXT,
+    gauge TEXT, block INTEGER
+);
+CREATE TABLE IF NOT EXISTS states (
+    address TEXT, block INTEGER, log_index INTEGER, balances TEXT, total_supply TEXT,
+    initial_A TEXT, future_A TEXT, initial_A_time INTEGER, future_A_time INTEGER, fee TEXT,
+    future_fee TEXT, admin_fee TEXT, exact INTEGER,
+    PRIMARY KEY (address, block, log_index)
+);
+CREATE TABLE IF NOT EXISTS cursor (id INTEGER PRIMARY KEY, block INTEGER);
+"""
+
+
+def _address(value) -> str:
+    return str(value).lower()
+
+
+def _plain(value):
+    # brownie wraps values in int / str subclasses which do not serialize cleanly
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return int(value)
+    return str(value)
+
+
+@dataclass(frozen=True)
+class Log:
+    block: int
+    log_index: int
+    tx_hash: str
+    timestamp: int
+    address: str
+    event: str
+    args: dict
+
+
+def receipt_logs(tx, timestamp: int) -> List[Log]:
+    """
+    Convert the decoded events of a brownie transaction receipt.
+
+    Log indexes are positions within the transaction, which matches the block
+    log index on a dev chain mining one transaction per block.
+    """
+    return [
+        Log(
+            tx.block_number,
+            log_index,
+            str(tx.txid),
+            timestamp,
+            _address(event.address),
+            event.name,
+            {key: _plain(value) for key, value in event.items()},
+        )
+        for log_index, event in enumerate(tx.events)
+    ]
+
+
+@dataclass
+class PoolInfo:
+    address: str
+    coins: List[str]
+    rates: List[int]
+    base_pool: Optional[str] = None
+    pool_index: Optional[int] = None
+    gauge: Optional[str] = None
+    block: int = 0
+
+    @property
+    def unrolled(self) -> bool:
+        # only the 2 coin plain implementations unroll `get_D`
+        return self.base_pool is None and self.pool_index is not None and len(self.coins) == 2
+
+
+@dataclass
+class PoolState:
+    balances: List[int]
+    total_supply: int = 0
+    initial_A: int = 0
+    future_A: int = 0
+    initial_A_time: int = 0
+    future_A_time: int = 0
+    fee: int = 0
+    future_fee: int = 0
+    admin_fee: int = ADMIN_FEE
+    exact: bool = True
+    block: int = 0
+    log_index: int = 0
+
+    def A(self, timestamp: int) -> int:
+        """Amplification coefficient with `A_PRECISION` at `timestamp`, mirrors `_A`"""
+        t1, A1 = self.future_A_time, self.future_A
+        if timestamp < t1:
+            A0, t0 = self.initial_A, self.initial_A_time
+            if A1 > A0:
+                return A0 + (A1 - A0) * (timestamp - t0) // (t1 - t0)
+            return A0 - (A0 - A1) * (timestamp - t0) // (t1 - t0)
+        return A1
+
+
+class FactoryReader:
+    """
+    Chain lookups needed by `Indexer`, made once per pool rather than per block.
+
+    `contract_at(address)` returns an object exposing `A_precise`, `fee`,
+    `admin_fee`, `balances` and `totalSupply`, whose calls accept
+    `block_identifier` as brownie contract calls do.
+    """
+
+    def __init__(self, factory, contract_at: Callable):
+        self.factory = factory
+        self.contract_at = contract_at
+
+    def pool_list(self, idx: int) -> str:
+        return _address(self.factory.pool_list(idx))
+
+    def coins(self, pool: str) -> List[str]:
+        coins = [_address(coin) for coin in self.factory.get_coins(pool)]
+        return [coin for coin in coins if coin != ZERO_ADDRESS]
+
+    def decimals(self, pool: str) -> List[int]:
+        return list(self.factory.get_decimals(pool))
+
+    def underlying_decimals(self, pool: str) -> List[int]:
+        return list(self.factory.get_underlying_decimals(pool))
+
+    def base_snapshot(self, base_pool: str, lp_token: str, n_coins: int, block: int) -> PoolState:
+        pool = self.contract_at(base_pool)
+        amp = int(pool.A_precise(block_identifier=block))
+        return PoolState(
+            balances=[int(pool.balances(i, block_identifier=block)) for i in range(n_coins)],
+            total_supply=int(self.contract_at(lp_token).totalSupply(block_identifier=block)),
+            initial_A=amp,
+            future_A=amp,
+            fee=int(pool.fee(block_identifier=block)),
+            admin_fee=int(pool.admin_fee(block_identifier=block)),
+            block=block,
+        )
+
+
+class Indexer:
+    def __init__(self, path, factory: str, reader, batch_size: int = 1000):
+        self.factory = _address(factory)
+        self.reader = reader
+        self.batch_size = batch_size
+
+        self.db = sqlite3.connect(str(Path(path)))
+        self.db.executescript(SCHEMA)
+
+        self.pools: Dict[str, PoolInfo] = {}
+        self.states: Dict[str, PoolState] = {}
+        self.pool_count = 0
+        self.block = -1
+        # base pool -> (tx hash, virtual price before the last base pool log in that tx)
+        self._base_rate = {}
+        # (tx hash, [(pool, coin, amount)]) of the coin transfers out of pools in that tx
+        self._transfers = (None, [])
+        self._pending_logs = []
+        self._pending_states = []
+        self._load()
+
+    # persistence
+
+    def _load(self):
+        for address, pool_index, base_pool, coins, rates, gauge, block in self.db.execute(
+            "SELECT * FROM pools"
+        ):
+            self.pools[address] = PoolInfo(
+                address, json.loads(coins), json.loads(rates), base_pool, pool_index, gauge, block
+            )
+            if pool_index is not None:
+                self.pool_count = max(self.pool_count, pool_index + 1)
+
+        for address in self.pools:
+            self.states[address] = self.get_state(address, 2 ** 62)
+
+        row = self.db.execute("SELECT block FROM cursor WHERE id = 0").fetchone()
+        if row is not None:
+            self.block = row[0]
+
+    @staticmethod
+    def _state_from_row(row) -> PoolState:
+        supply, A0, A1, t0, t1, fee, future_fee, admin_fee = row[4:12]
+        return PoolState(
+            [int(i) for i in json.loads(row[3])],
+            int(supply),
+            int(A0),
+            int(A1),
+            t0,
+            t1,
+            int(fee),
+            int(future_fee),
+            int(admin_fee),
+            bool(row[12]),
+            row[1],
+            row[2],
+        )
+
+    def _store_pool(self, pool: PoolInfo):
+        self.db.execute(
+            "INSERT OR REPLACE INTO pools VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                pool.address,
+                pool.pool_index,
+                pool.base_pool,
+                json.dumps(pool.coins),
+                json.dumps(pool.rates),
+                pool.gauge,
+                pool.block,
+            ),
+        )
+
+    def _record(self, address: str, log: Log):
+        state = self.states[address]
+        state.block, state.log_index = log.block, log.log_index
+        self._pending_states.append(
+            (
+                address,
+                log.block,
+                log.log_index,
+                json.dumps([str(i) for i in state.balances]),
+                str(state.total_supply),
+                str(state.initial_A),
+                str(state.future_A),
+                state.initial_A_time,
+                state.future_A_time,
+                str(state.fee),
+                str(state.future_fee),
+                str(state.admin_fee),
+                int(state.exact),
+            )
+        )
+
+    def flush(self):
+        """Write buffered logs and states, and advance the cursor"""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?, ?)", self._pending_logs
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._pending_states,
+        )
+        self.db.execute("INSERT OR REPLACE INTO cursor VALUES (0, ?)", (self.block,))
+        self.db.commit()
+        self._pending_logs = []
+        self._pending_states = []
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    # ingestion
+
+    def ingest(self, logs: Iterable[Log]) -> int:
+        """Apply `logs`, which must be in chain order. Returns the number of logs applied."""
+        count = 0
+        for log in logs:
+            if self._apply(log):
+                self._pending_logs.append(
+                    (
+                        log.block,
+                        log.log_index,
+                        log.tx_hash,
+                        log.address,
+                        log.event,
+                        json.dumps(log.args),
+                    )
+                )
+                count += 1
+            self.block = max(self.block, log.block)
+            if len(self._pending_logs) >= self.batch_size:
+                self.flush()
+        self.flush()
+        return count
+
+    def backfill(
+        self, fetch_logs: Callable, stop: int, start: Optional[int] = None, step: int = 1000
+    ) -> int:
+        """
+        Stream logs from `fetch_logs(start, stop)` in windows of `step` blocks.
+
+        Resumes from the stored cursor when `start` is not given.
+        """
+        start = self.block + 1 if start is None else start
+        count = 0
+        for window in range(start, stop + 1, step):
+            count += self.ingest(fetch_logs(window, min(window + step - 1, stop)))
+            self.block = max(self.block, min(window + step - 1, stop))
+        self.flush()
+        return count
+
+    def _apply(self, log: Log) -> bool:
+        if log.event == "Transfer":
+            self._note_transfer(log)
+            return False
+        if log.address == self.factory:
+            handler = getattr(self, f"_on_{log.event}", None)
+            if handler is not None and log.event.endswith("Deployed"):
+                handler(log)
+                return True
+            return False
+
+        pool = self.pools.get(log.address)
+        if pool is None:
+            return False
+        is_base_pool = pool.pool_index is None
+        if is_base_pool and log.block <= pool.block:
+            # already included in the base pool snapshot
+            return False
+        handler = getattr(self, f"_on_{log.event}", None)
+        if handler is None or log.event.endswith("Deployed"):
+            return False
+
+        if is_base_pool:
+            # metapools price against the base pool as it was before the call
+            rate = self._virtual_price(pool.address, log.timestamp)
+            self._base_rate[pool.address] = (log.tx_hash, rate)
+        handler(pool, self.states[pool.address], log)
+        self._record(pool.address, log)
+        return True
+
+    def _note_transfer(self, log: Log):
+        sender, _, amount = log.args.values()
+        sender = _address(sender)
+        if sender not in self.pools:
+            return
+        if self._transfers[0] != log.tx_hash:
+            self._transfers = (log.tx_hash, [])
+        self._transfers[1].append((sender, log.address, int(amount)))
+
+    # factory events
+
+    def _add_pool(self, log: Log, address: str, coins: List[str], rates: List[int], base_pool=None):
+        pool = PoolInfo(address, coins, rates, base_pool, self.pool_count, block=log.block)
+        self.pool_count += 1
+        self.pools[address] = pool
+        self._store_pool(pool)
+
+        A = log.args["A"] * A_PRECISION
+        self.states[address] = PoolState(
+            [0] * len(coins), initial_A=A, future_A=A, fee=log.args["fee"]
+        )
+        self._record(address, log)
+        return pool
+
+    def _on_PlainPoolDeployed(self, log: Log):
+        coins = [_address(coin) for coin in log.args["coins"]]
+        coins = [coin for coin in coins if coin != ZERO_ADDRESS]
+        address = self.reader.pool_list(self.pool_count)
+        decimals = self.reader.decimals(address)[: len(coins)]
+        self._add_pool(log, address, coins, [10 ** (36 - precision) for precision in decimals])
+
+    def _on_MetaPoolDeployed(self, log: Log):
+        address = self.reader.pool_list(self.pool_count)
+        coins = self.reader.coins(address)
+        base_pool = _address(log.args["base_pool"])
+        if base_pool not in self.pools:
+            decimals = self.reader.underlying_decimals(address)[1:]
+            decimals = decimals[: decimals.index(0)] if 0 in decimals else decimals
+            base = PoolInfo(base_pool, [], [10 ** (36 - precision) for precision in decimals])
+            base.block = log.block
+            self.pools[base_pool] = base
+            self._store_pool(base)
+            self.states[base_pool] = self.reader.base_snapshot(
+                base_pool, coins[1], len(decimals), log.block
+            )
+            self._record(base_pool, log)
+
+        rate_multiplier = 10 ** (36 - self.reader.decimals(address)[0])
+        self._add_pool(log, address, coins, [rate_multiplier, PRECISION], base_pool)
+
+    def _on_LiquidityGaugeDeployed(self, log: Log):
+        pool = self.pools.get(_address(log.args["pool"]))
+        if pool is not None:
+            pool.gauge = _address(log.args["gauge"])
+            self._store_pool(pool)
+
+    # pool math
+
+    def _virtual_price(self, base_pool: str, timestamp: int) -> int:
+        pool, state = self.pools[base_pool], self.states[base_pool]
+        return int(
+            stableswap.get_virtual_price(
+                pool.rates, state.balances, state.A(timestamp), state.total_supply
+            )
+        )
+
+    def _rates(self, pool: PoolInfo, log: Log, underlying: bool = False) -> List[int]:
+        if pool.base_pool is None:
+            return pool.rates
+        tx_hash, rate = self._base_rate.get(pool.base_pool, (None, 0))
+        if not underlying or tx_hash != log.tx_hash:
+            rate = self._virtual_price(pool.base_pool, log.timestamp)
+        return [pool.rates[0], rate]
+
+    def _exchange(
+        self, pool: PoolInfo, state: PoolState, log: Log, i, j, dx, rates
+    ) -> Optional[int]:
+        amp = state.A(log.timestamp)
+        xp = [rate * balance // PRECISION for rate, balance in zip(rates, state.balances)]
+        x = xp[i] + dx * rates[i] // PRECISION
+        try:
+            y = get_y(i, j, x, xp, amp, get_D(xp, amp, pool.unrolled))
+        except (Revert, ZeroDivisionError):
+            # the indexed state can no longer reach the logged trade
+            state.exact = False
+            return None
+
+        dy = xp[j] - y - 1
+        dy_fee = dy * state.fee // FEE_DENOMINATOR
+        dy = (dy - dy_fee) * PRECISION // rates[j]
+        dy_admin_fee = dy_fee * state.admin_fee // FEE_DENOMINATOR * PRECISION // rates[j]
+
+        state.balances[i] += dx
+        state.balances[j] -= dy + dy_admin_fee
+        return dy
+
+    # pool events
+
+    def _on_TokenExchange(self, pool, state, log):
+        args = log.args
+        rates = self._rates(pool, log)
+        i, j = args["sold_id"], args["bought_id"]
+        dy = self._exchange(pool, state, log, i, j, args["tokens_sold"], rates)
+        state.exact &= dy == args["tokens_bought"]
+
+    def _on_TokenExchangeUnderlying(self, pool, state, log):
+        args = log.args
+        i, j = args["sold_id"], args["bought_id"]
+        if i != 0 and j != 0:
+            # routed through the base pool only
+            return
+        # for base pool inputs `tokens_sold` is the LP amount minted in the base pool
+        rates = self._rates(pool, log, underlying=True)
+        dy = self._exchange(pool, state, log, min(i, 1), min(j, 1), args["tokens_sold"], rates)
+        if j == 0:
+            state.exact &= dy == args["tokens_bought"]
+
+    def _on_AddLiquidity(self, pool, state, log):
+        args = log.args
+        for i, (amount, fee) in enumerate(zip(args["token_amounts"], args["fees"])):
+            state.balances[i] += amount - fee * state.admin_fee // FEE_DENOMINATOR
+        state.total_supply = args["token_supply"]
+
+    def _on_RemoveLiquidity(self, pool, state, log):
+        args = log.args
+        for i, amount in enumerate(args["token_amounts"]):
+            state.balances[i] -= amount
+        state.total_supply = args["token_supply"]
+
+    def _on_RemoveLiquidityImbalance(self, pool, state, log):
+        args = log.args
+        for i, (amount, fee) in enumerate(zip(args["token_amounts"], args["fees"])):
+            state.balances[i] -= amount + fee * state.admin_fee // FEE_DENOMINATOR
+        state.total_supply = args["token_supply"]
+
+    def _on_RemoveLiquidityOne(self, pool, state, log):
+        args = log.args
+        n_coins = len(state.balances)
+        # the coin index is not logged, find the one the withdrawn amount matches
+        dy, dy_fee = stableswap.calc_withdraw_one_coin(
+            [args["token_amount"]],
+            list(range(n_coins)),
+            [self._rates(pool, log)] * n_coins,
+            [state.balances] * n_coins,
+            state.A(log.timestamp),
+            state.fee,
+            state.total_supply,
+            pool.unrolled,
+        )
+        matches = [i for i in range(n_coins) if dy[i][0] == args["coin_amount"]]
+        if len(matches) > 1:
+            matches = self._withdrawn_coin(pool, log, matches)
+        if len(matches) == 1:
+            i = matches[0]
+            state.balances[i] -= dy[i][0] + dy_fee[i][0] * state.admin_fee // FEE_DENOMINATOR
+        else:
+            state.exact = False
+        state.total_supply = args["token_supply"]
+
+    def _withdrawn_coin(self, pool: PoolInfo, log: Log, matches: List[int]) -> List[int]:
+        # the coins among `matches` the pool sent the logged amount of in the same
+        # transaction, ether is sent without a log so it can not be told apart
+        tx_hash, transfers = self._transfers
+        if tx_hash != log.tx_hash:
+            return []
+        amount = log.args["coin_amount"]
+        sent = {
+            coin for sender, coin, value in transfers if (sender, value) == (pool.address, amount)
+        }
+        return [i for i in matches if i < len(pool.coins) and pool.coins[i] in sent]
+
+    def _on_RampA(self, pool, state, log):
+        args = log.args
+        state.initial_A, state.future_A = args["old_A"], args["new_A"]
+        state.initial_A_time, state.future_A_time = args["initial_time"], args["future_time"]
+
+    def _on_StopRampA(self, pool, state, log):
+        state.initial_A = state.future_A = log.args["A"]
+        state.initial_A_time = state.future_A_time = log.args["t"]
+
+    def _on_CommitNewFee(self, pool, state, log):
+        state.future_fee = log.args.get("new_fee", log.args.get("fee"))
+
+    def _on_ApplyNewFee(self, pool, state, log):
+        state.fee = log.args["fee"]
+        state.future_fee = 0
+
+    def _on_NewFee(self, pool, state, log):
+        state.fee = log.args["fee"]
+        state.admin_fee = log.args["admin_fee"]
+
+    # queries
+
+    def get_state(self, pool, block: Optional[int] = None) -> Optional[PoolState]:
+        """State of `pool` after the last indexed log at or before `block`"""
+        pool = _address(pool)
+        if block is None:
+            return self.states.get(pool)
+        row = self.db.execute(
+            "SELECT * FROM states WHERE address = ? AND block <= ? "
+            "ORDER BY block DESC, log_index DESC LIMIT 1",
+            (pool, block),
+        ).fetchone()
+        return None if row is None else self._state_from_row(row)
@@ -0,0 +1,107 @@
+"""
+Replay of the EMA price oracle of the 2 coin plain implementations.
+
+The oracle state is a single `last_prices_packed` slot holding the last spot
+price in the low 128 bits and the EMA price in the high 128 bits, plus
+`ma_last_time`. Every operation that moves the price saves the new spot price
+and the EMA decayed to the current block, weighting the previous EMA by
+`alpha = exp(-dt / ma_exp_time)`.
+
+The implementations differ only in how `alpha` is evaluated, and the choice
+shows in the lowest digits of the EMA:
+
+* `simulator.ema_alpha` - `Plain2BasicEMA` and `Plain2ETHEMA`, whose `exp` truncates
+  every intermediate division.
+* `price_alpha` - `Plain2Price`, whose `exp` rounds intermediates down by
+  arithmetic shifts.
+* `incremental_alpha` - `Plain2PriceIncrementalEMA`, which raises the decay over
+  one second to `dt` for short gaps and falls back to `price_alpha` otherwise.
+
+`replay_packed` runs a tape through a `PoolSimulator` built with one of them and
+returns the packed slot after every step, for comparing against
+`last_price` / `ema_price` reads in bulk. `Plain2Price` and its variants also
+price the balances rather than `xp` in `remove_liquidity_imbalance`, so their
+simulator is built with `price_balances=True`.
+"""
+
+from typing import Iterable, List, Tuple
+
+from offchain.simulator import PoolSimulator, Revert, _tdiv
+
+# `Plain2PriceIncrementalEMA` raises the one second decay for gaps below 2**ALPHA_BITS
+ALPHA_BITS = 10
+
+
+def pack_prices(last_price: int, ema_price: int) -> int:
+    assert last_price < 2 ** 128 and ema_price < 2 ** 128
+    return last_price | (ema_price << 128)
+
+
+def unpack_prices(packed: int) -> Tuple[int, int]:
+    """`(last_price, ema_price)` of a `last_prices_packed` value"""
+    return packed & (2 ** 128 - 1), packed >> 128
+
+
+def exp_floor(x: int) -> int:
+    """`e ** (x / 1e18)` with 1e18 precision, mirrors `exp` of `Plain2Price`"""
+    if x <= -42139678854452767551:
+        return 0
+    if x >= 135305999368893231589:
+        raise Revert("wad_exp overflow")
+
+    # `>>` on int256 is an arithmetic shift, rounding down like Python's
+    value = _tdiv(x << 78, 5 ** 18)
+    k = (_tdiv(value << 96, 54916777467707473351141471128) + 2 ** 95) >> 96
+    value = value - k * 54916777467707473351141471128
+
+    y = ((value + 1346386616545796478920950773328) * value >> 96) + 57155421227552351082224309758442
+    p = (
+        (y + value - 94201549194550492254356042504812) * y >> 96
+    ) + 28719021644029726153956944680412240
+    p = p * value + (4385272521454847904659076985693276 << 96)
+
+    q = ((value - 2855989394907223263936484059900) * value >> 96) + 50020603652535783019961831881945
+    q = (q * value >> 96) - 533845033583426703283633433725380
+    q = (q * value >> 96) + 3604857256930695427073651918091429
+    q = (q * value >> 96) - 14423608567350463180887372962807573
+    q = (q * value >> 96) + 26449188498355588339934803723976023
+
+    r = _tdiv(p, q) % 2 ** 256
+    return (r * 3822833074963236453042738258902158003155416615667 % 2 ** 256) >> (195 - k)
+
+
+def price_alpha(dt: int, ma_exp_time: int) -> int:
+    """`alpha` of `Plain2Price`"""
+    return exp_floor(-(dt * 10 ** 18 // ma_exp_time))
+
+
+def incremental_alpha(dt: int, ma_exp_time: int) -> int:
+    """`alpha` of `Plain2PriceIncrementalEMA`"""
+    if dt >= 2 ** ALPHA_BITS:
+        return price_alpha(dt, ma_exp_time)
+
+    base = price_alpha(1, ma_exp_time)
+    alpha = 10 ** 18
+    while True:
+        if dt & 1:
+            alpha = alpha * base // 10 ** 18
+        dt >>= 1
+        if dt == 0:
+            return alpha
+        base = base * base // 10 ** 18
+
+
+def replay_packed(simulator: PoolSimulator, tape: Iterable[tuple]) -> List[int]:
+    """
+    Apply `tape` to `simulator`, returning `last_prices_packed` after every step.
+
+    Steps that would revert leave the oracle unchanged.
+    """
+    packed = []
+    for step in tape:
+        try:
+            simulator.step(*step)
+        except (Revert, ZeroDivisionError):
+            pass
+        packed.append(pack_prices(simulator.last_price, simulator.ema_price))
+    return packed
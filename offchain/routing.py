@@ -0,0 +1,359 @@
+"""
+Route finder over the coin graph formed by the factory pools.
+
+`RouteGraph` indexes every market offered by the factory as a directed edge
+between two coin addresses: each ordered pair of coins within a pool, plus each
+ordered pair of underlying coins within a metapool. Edges are weighted by the
+amount they return, evaluated with the vectorized `stableswap` port against a
+locally held copy of the pool state, so a route can be priced at many input
+sizes without any RPC calls.
+
+Pools are loaded from `Factory.pool_list`, and the graph only ever loads pools
+it has not seen before. `PlainPoolDeployed` and `MetaPoolDeployed` do not
+include the new pool address, so either event simply triggers a sync of the
+indices past `pool_count`. Pool state changes on every trade and is refreshed
+separately via `RouteGraph.refresh`.
+
+Chain access is through two objects: the factory, and a `contract_at(address)`
+callable returning an object exposing `A_precise`, `fee`, `balances` and
+`totalSupply`. With brownie this can be `Contract.from_abi` using a pool ABI.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from offchain import stableswap
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+DEPLOY_EVENTS = ("PlainPoolDeployed", "MetaPoolDeployed")
+
+# `Router` accepts paths of up to this many pools
+MAX_HOPS = 4
+
+
+def _address(value) -> str:
+    return str(value).lower()
+
+
+def _rates(decimals) -> List[int]:
+    return [10 ** (36 - precision) for precision in decimals]
+
+
+@dataclass(eq=False)
+class BasePool:
+    address: str
+    lp_token: str
+    coins: List[str]
+    rates: List[int]
+    amp: int = 0
+    fee: int = 0
+    balances: List[int] = field(default_factory=list)
+    total_supply: int = 0
+
+
+@dataclass(eq=False)
+class Pool:
+    address: str
+    coins: List[str]
+    rates: List[int]
+    base_pool: Optional[BasePool] = None
+    amp: int = 0
+    fee: int = 0
+    balances: List[int] = field(default_factory=list)
+
+    @property
+    def is_meta(self) -> bool:
+        return self.base_pool is not None
+
+    @property
+    def underlying_coins(self) -> List[str]:
+        return self.coins[:1] + self.base_pool.coins
+
+    def get_dy(self, i: int, j: int, dx) -> np.ndarray:
+        rates = self.rates
+        if self.is_meta:
+            base = self.base_pool
+            virtual_price = stableswap.get_virtual_price(
+                base.rates, base.balances, base.amp, base.total_supply
+            )
+            rates = [rates[0], virtual_price]
+        # only the 2 coin plain implementations unroll `get_D`
+        unrolled = not self.is_meta and len(self.coins) == 2
+        return stableswap.get_dy(i, j, dx, rates, self.balances, self.amp, self.fee, unrolled)
+
+    def get_dy_underlying(self, i: int, j: int, dx) -> np.ndarray:
+        base = self.base_pool
+        return stableswap.get_dy_underlying(
+            i,
+            j,
+            dx,
+            self.rates[0],
+            self.balances,
+            self.amp,
+            self.fee,
+            base.rates,
+            base.balances,
+            base.amp,
+            base.fee,
+            base.total_supply,
+        )
+
+
+@dataclass(frozen=True)
+class Edge:
+    pool: Pool
+    coin_in: str
+    coin_out: str
+    i: int
+    j: int
+    is_underlying: bool
+
+    def quote(self, amounts) -> np.ndarray:
+        """Amounts of `coin_out` received for each of `amounts`, 0 where the exchange reverts"""
+        if self.is_underlying:
+            return self.pool.get_dy_underlying(self.i, self.j, amounts)
+        return self.pool.get_dy(self.i, self.j, amounts)
+
+
+@dataclass(frozen=True)
+class Route:
+    edges: Tuple[Edge, ...]
+    amount_in: int
+    amount_out: int
+
+    @property
+    def pools(self) -> List[str]:
+        return [edge.pool.address for edge in self.edges]
+
+    @property
+    def coins(self) -> List[str]:
+        return [self.edges[0].coin_in] + [edge.coin_out for edge in self.edges]
+
+    def router_args(self) -> Tuple[List[str], List[str]]:
+        """`_pools` and `_coins` arguments for `Router.exchange` and `Router.get_dy_path`"""
+        pools = self.pools
+        return (
+            pools + [ZERO_ADDRESS] * (MAX_HOPS - len(pools)),
+            self.coins + [ZERO_ADDRESS] * (MAX_HOPS - len(pools)),
+        )
+
+
+@dataclass(frozen=True)
+class Split:
+    routes: Tuple[Route, ...]
+
+    @property
+    def amount_in(self) -> int:
+        return sum(route.amount_in for route in self.routes)
+
+    @property
+    def amount_out(self) -> int:
+        return sum(route.amount_out for route in self.routes)
+
+
+def quote_path(edges, amounts) -> np.ndarray:
+    """Output of exchanging each of `amounts` along `edges`, one vectorized call per hop"""
+    amounts = stableswap.as_uint(amounts)
+    for edge in edges:
+        amounts = edge.quote(amounts)
+    return amounts
+
+
+class RouteGraph:
+    def __init__(self):
+        self.pools: Dict[str, Pool] = {}
+        self.base_pools: Dict[str, BasePool] = {}
+        # number of `Factory.pool_list` entries already indexed
+        self.pool_count = 0
+        # coin in -> coin out -> edges
+        self._edges = defaultdict(lambda: defaultdict(list))
+
+    @classmethod
+    def from_factory(cls, factory, contract_at: Callable) -> "RouteGraph":
+        graph = cls()
+        graph.sync(factory, contract_at)
+        return graph
+
+    # indexing
+
+    def add_pool(self, pool: Pool):
+        self.pools[pool.address] = pool
+        markets = [(pool.coins, False)]
+        if pool.is_meta:
+            markets.append((pool.underlying_coins, True))
+        for coins, is_underlying in markets:
+            for i, coin_in in enumerate(coins):
+                for j, coin_out in enumerate(coins):
+                    if i != j:
+                        edge = Edge(pool, coin_in, coin_out, i, j, is_underlying)
+                        self._edges[coin_in][coin_out].append(edge)
+
+    def edges(self, coin_in, coin_out=None) -> List[Edge]:
+        """Edges leaving `coin_in`, optionally only those arriving at `coin_out`"""
+        markets = self._edges.get(_address(coin_in), {})
+        if coin_out is not None:
+            return list(markets.get(_address(coin_out), []))
+        return [edge for edges in markets.values() for edge in edges]
+
+    def sync(self, factory, contract_at: Callable) -> List[Pool]:
+        """
+        Load every factory pool deployed since the last sync.
+
+        Returns the newly indexed pools.
+        """
+        count = factory.pool_count()
+        added = []
+        for idx in range(self.pool_count, count):
+            pool = self._load_pool(factory, _address(factory.pool_list(idx)), contract_at)
+            self.add_pool(pool)
+            added.append(pool)
+        self.pool_count = count
+        return added
+
+    def on_event(self, event, factory, contract_at: Callable) -> List[Pool]:
+        """
+        Apply a factory event, given as a brownie event or an event name.
+
+        Deployment events index the new pools, anything else is ignored.
+        """
+        if getattr(event, "name", event) in DEPLOY_EVENTS:
+            return self.sync(factory, contract_at)
+        return []
+
+    def _load_pool(self, factory, address: str, contract_at: Callable) -> Pool:
+        coins = [_address(coin) for coin in factory.get_coins(address)]
+        coins = [coin for coin in coins if coin != ZERO_ADDRESS]
+        pool = Pool(address, coins, _rates(factory.get_decimals(address)[: len(coins)]))
+
+        if factory.is_meta(address):
+            base_address = _address(factory.get_base_pool(address))
+            if base_address not in self.base_pools:
+                underlying = [_address(coin) for coin in factory.get_underlying_coins(address)]
+                base_coins = [coin for coin in underlying[1:] if coin != ZERO_ADDRESS]
+                decimals = factory.get_underlying_decimals(address)[1 : len(base_coins) + 1]
+                base_pool = BasePool(base_address, coins[1], base_coins, _rates(decimals))
+                self._read_base_state(base_pool, contract_at)
+                self.base_pools[base_address] = base_pool
+            pool.base_pool = self.base_pools[base_address]
+
+        self._read_state(pool, contract_at)
+        return pool
+
+    # pool state
+
+    @staticmethod
+    def _read_state(pool, contract_at: Callable):
+        contract = contract_at(pool.address)
+        pool.amp = contract.A_precise()
+        pool.fee = contract.fee()
+        pool.balances = [contract.balances(i) for i in range(len(pool.coins))]
+
+    def _read_base_state(self, base_pool: BasePool, contract_at: Callable):
+        self._read_state(base_pool, contract_at)
+        base_pool.total_supply = contract_at(base_pool.lp_token).totalSupply()
+
+    def refresh(self, contract_at: Callable, pools=None):
+        """
+        Reload the state of `pools` (all pools by default) and of their base pools.
+        """
+        pools = self.pools.values() if pools is None else [self.pools[_address(p)] for p in pools]
+        base_pools = set()
+        for pool in pools:
+            self._read_state(pool, contract_at)
+            if pool.is_meta:
+                base_pools.add(pool.base_pool)
+        for base_pool in base_pools:
+            self._read_base_state(base_pool, contract_at)
+
+    # routing
+
+    def find_routes(
+        self, coin_in, coin_out, amount: int, k: int = 3, max_hops: int = 3
+    ) -> List[Route]:
+        """
+        Find the `k` best paths for exchanging `amount` of `coin_in` for `coin_out`.
+
+        Paths are expanded one hop at a time, keeping the `k` best partial paths
+        into each intermediate coin. Amounts in different coins are not
+        comparable, so pruning only ever ranks paths ending at the same coin.
+        Within a hop every edge is quoted once for all partial paths using it.
+        """
+        assert 0 < max_hops <= MAX_HOPS
+        coin_in, coin_out = _address(coin_in), _address(coin_out)
+
+        routes = []
+        frontier = [((), coin_in, amount)]
+        for _ in range(max_hops):
+            pending = defaultdict(list)
+            for idx, (path, coin, _) in enumerate(frontier):
+                visited = {coin_in}.union(edge.coin_out for edge in path)
+                used = {edge.pool for edge in path}
+                for edge in self.edges(coin):
+                    if edge.coin_out not in visited and edge.pool not in used:
+                        pending[edge].append(idx)
+
+            best = defaultdict(list)
+            for edge, indices in pending.items():
+                amounts_out = edge.quote([frontier[idx][2] for idx in indices])
+                for idx, amount_out in zip(indices, amounts_out):
+                    if amount_out > 0:
+                        best[edge.coin_out].append((frontier[idx][0] + (edge,), amount_out))
+
+            frontier = []
+            for coin, paths in best.items():
+                paths.sort(key=lambda item: item[1], reverse=True)
+                if coin == coin_out:
+                    routes += [Route(path, amount, amount_out) for path, amount_out in paths]
+                else:
+                    frontier += [(path, coin, amount_out) for path, amount_out in paths[:k]]
+            if not frontier:
+                break
+
+        routes.sort(key=lambda route: route.amount_out, reverse=True)
+        return routes[:k]
+
+    def find_split(
+        self, coin_in, coin_out, amount: int, k: int = 3, max_hops: int = 3, parts: int = 20
+    ) -> Optional[Split]:
+        """
+        Find the best split of `amount` across the `k` best pool-disjoint paths.
+
+        `amount` is divided into `parts` equal chunks, each allocated to the path
+        with the largest marginal output. Every path is quoted at all chunk
+        multiples in a single vectorized pass.
+        """
+        chosen = []
+        used = set()
+        for route in self.find_routes(coin_in, coin_out, amount, k, max_hops):
+            # paths sharing a pool would move each other's price
+            if used.isdisjoint(route.pools):
+                chosen.append(route)
+                used.update(route.pools)
+        if not chosen:
+            return None
+
+        sizes = [amount * q // parts for q in range(parts + 1)]
+        outputs = [quote_path(route.edges, sizes) for route in chosen]
+
+        allocation = [0] * len(chosen)
+        for _ in range(parts):
+            gains = [
+                outputs[r][allocation[r] + 1] - outputs[r][allocation[r]]
+                for r in range(len(chosen))
+            ]
+            allocation[int(np.argmax(gains))] += 1
+
+        legs = []
+        largest = int(np.argmax(allocation))
+        remainder = amount - sum(sizes[q] for q in allocation)
+        for r, (route, q) in enumerate(zip(chosen, allocation)):
+            if r == largest and remainder:
+                amount_in = sizes[q] + remainder
+                legs.append(Route(route.edges, amount_in, quote_path(route.edges, [amount_in])[0]))
+            elif q:
+                legs.append(Route(route.edges, sizes[q], outputs[r][q]))
+
+        return Split(tuple(legs))
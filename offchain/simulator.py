@@ -0,0 +1,722 @@
+"""
+Block-replay simulator for a single factory pool.
+
+`PoolSimulator` holds the state of one pool as Python integers and applies
+exchanges and liquidity operations with the exact integer arithmetic of the plain
+and metapool templates, including the EMA price oracle of the EMA
+implementations. Replaying a tape of operations yields the balances, LP supply,
+virtual price, accumulated admin fees and oracle price after every step, so pool
+parameters can be evaluated against historical flow without forking a node.
+
+Where `stableswap` evaluates many independent quotes at once, the simulator
+advances one pool through a long chain of dependent steps, so it works on scalars
+and avoids repeating work between steps: the invariant of the state left by a
+step serves both the virtual price of that step and the next operation, and EMA
+decay factors are memoized by the time elapsed.
+
+A tape is a sequence of `(timestamp, action, *args)` tuples:
+
+    (t, EXCHANGE, i, j, dx[, min_dy])
+    (t, ADD_LIQUIDITY, amounts)
+    (t, REMOVE_LIQUIDITY, burn_amount)
+    (t, REMOVE_LIQUIDITY_IMBALANCE, amounts)
+    (t, REMOVE_LIQUIDITY_ONE, burn_amount, i, coin_amount)
+    (t, RAMP_A, future_A, future_time)
+    (t, STOP_RAMP_A)
+    (t, SET_FEE, fee)
+    (t, SET_MA_EXP_TIME, ma_exp_time)
+    (t, SET_RATES, rates)
+
+Amplification values include `A_PRECISION`, as in the `RampA` event. Metapools
+price their base LP token at the base pool virtual price read during each call,
+which is not part of the pool state and is supplied with `SET_RATES`. Steps that
+would revert on-chain leave the state unchanged and are flagged in the trace.
+Values are assumed to stay within uint256, which holds for any real pool.
+Implementations reading coin balances directly (`Balances`) are modelled as long
+as no coin rebases.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+from offchain import stableswap
+
+A_PRECISION = stableswap.A_PRECISION
+FEE_DENOMINATOR = stableswap.FEE_DENOMINATOR
+ADMIN_FEE = stableswap.ADMIN_FEE
+PRECISION = stableswap.PRECISION
+MAX_ITERATIONS = stableswap.MAX_ITERATIONS
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# default of the EMA implementations, 600 / ln(2)
+MA_EXP_TIME = 866
+
+(
+    EXCHANGE,
+    ADD_LIQUIDITY,
+    REMOVE_LIQUIDITY,
+    REMOVE_LIQUIDITY_IMBALANCE,
+    REMOVE_LIQUIDITY_ONE,
+    RAMP_A,
+    STOP_RAMP_A,
+    SET_FEE,
+    SET_MA_EXP_TIME,
+    SET_RATES,
+) = range(10)
+
+# pool events replayed as operations, which read the pool rates
+OPERATION_EVENTS = (
+    "TokenExchange",
+    "TokenExchangeUnderlying",
+    "AddLiquidity",
+    "RemoveLiquidity",
+    "RemoveLiquidityImbalance",
+    "RemoveLiquidityOne",
+)
+
+
+class Revert(Exception):
+    """The contract would revert. The simulated state is left unchanged."""
+
+
+# scalar ports of the template math
+
+
+def _tdiv(a: int, b: int) -> int:
+    # signed division truncating towards zero, as `unsafe_div` on int256
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def exp(power: int) -> int:
+    """`e ** (power / 1e18)` with 1e18 precision, mirrors `exp` of the EMA implementations"""
+    if power <= -42139678854452767551:
+        return 0
+    if power >= 135305999368893231589:
+        raise Revert("exp overflow")
+
+    x = _tdiv(power * 2 ** 96, 10 ** 18)
+    k = _tdiv(_tdiv(x * 2 ** 96, 54916777467707473351141471128) + 2 ** 95, 2 ** 96)
+    x = x - k * 54916777467707473351141471128
+
+    y = x + 1346386616545796478920950773328
+    y = _tdiv(y * x, 2 ** 96) + 57155421227552351082224309758442
+    p = y + x - 94201549194550492254356042504812
+    p = _tdiv(p * y, 2 ** 96) + 28719021644029726153956944680412240
+    p = p * x + 4385272521454847904659076985693276 * 2 ** 96
+
+    q = x - 2855989394907223263936484059900
+    q = _tdiv(q * x, 2 ** 96) + 50020603652535783019961831881945
+    q = _tdiv(q * x, 2 ** 96) - 533845033583426703283633433725380
+    q = _tdiv(q * x, 2 ** 96) + 3604857256930695427073651918091429
+    q = _tdiv(q * x, 2 ** 96) - 14423608567350463180887372962807573
+    q = _tdiv(q * x, 2 ** 96) + 26449188498355588339934803723976023
+
+    r = (_tdiv(p, q) * 3822833074963236453042738258902158003155416615667) % 2 ** 256
+    shift = k - 195
+    return r << shift if shift >= 0 else r >> -shift
+
+
+def ema_alpha(dt: int, ma_exp_time: int) -> int:
+    """Weight of the previous EMA after `dt` seconds, as `_ma_price` of the EMA implementations"""
+    return exp(-(dt * 10 ** 18 // ma_exp_time))
+
+
+def get_D(xp: List[int], amp: int, unrolled: bool = False) -> int:
+    """Mirrors `get_D`, see `stableswap` for the meaning of `unrolled`"""
+    S = sum(xp)
+    if S == 0:
+        return 0
+
+    n_coins = len(xp)
+    D = S
+    Ann = amp * n_coins
+    # loop invariant terms, evaluated exactly as the contract does on every iteration
+    Ann_S = Ann * S // A_PRECISION
+    Ann_1 = Ann - A_PRECISION
+    if unrolled:
+        x0, x1 = xp
+        for _ in range(MAX_ITERATIONS):
+            D_P = D * D // x0 * D // x1 // 4
+            D_prev = D
+            D = (Ann_S + D_P * 2) * D // (Ann_1 * D // A_PRECISION + 3 * D_P)
+            if D - D_prev <= 1 and D_prev - D <= 1:
+                return D
+        raise Revert("get_D did not converge")
+
+    for _ in range(MAX_ITERATIONS):
+        D_P = D
+        for x in xp:
+            D_P = D_P * D // (x * n_coins)
+        D_prev = D
+        D = (Ann_S + D_P * n_coins) * D // (Ann_1 * D // A_PRECISION + (n_coins + 1) * D_P)
+        if D - D_prev <= 1 and D_prev - D <= 1:
+            return D
+    raise Revert("get_D did not converge")
+
+
+def _solve_y(known: List[int], n_coins: int, amp: int, D: int) -> int:
+    # Newton solver shared by `get_y` and `get_y_D`, `known` holds every other
+    # balance in coin order
+    Ann = amp * n_coins
+    c = D
+    S_ = 0
+    for x in known:
+        S_ += x
+        c = c * D // (x * n_coins)
+    c = c * D * A_PRECISION // (Ann * n_coins)
+    # `2 * y + b - D` in the contract, reverting when negative
+    b_D = S_ + D * A_PRECISION // Ann - D
+
+    y = D
+    for _ in range(MAX_ITERATIONS):
+        y_prev = y
+        denominator = y + y + b_D
+        if denominator <= 0:
+            raise Revert("get_y underflow")
+        y = (y * y + c) // denominator
+        if y - y_prev <= 1 and y_prev - y <= 1:
+            return y
+    raise Revert("get_y did not converge")
+
+
+def get_y(i: int, j: int, x: int, xp: List[int], amp: int, D: int) -> int:
+    """Mirrors `get_y`"""
+    n_coins = len(xp)
+    if i == j or not (0 <= i < n_coins and 0 <= j < n_coins):
+        raise Revert("invalid coin index")
+    known = [x if k == i else xp[k] for k in range(n_coins) if k != j]
+    return _solve_y(known, n_coins, amp, D)
+
+
+def get_y_D(amp: int, i: int, xp: List[int], D: int) -> int:
+    """Mirrors `get_y_D`"""
+    n_coins = len(xp)
+    if not 0 <= i < n_coins:
+        raise Revert("invalid coin index")
+    return _solve_y(xp[:i] + xp[i + 1 :], n_coins, amp, D)
+
+
+def get_p(xp: List[int], amp: int, D: int) -> int:
+    """Spot price of coin 1 in coin 0, mirrors `_get_p` of the 2 coin EMA implementations"""
+    ANN = amp * 2
+    Dr = D // 4 * D // xp[0] * D // xp[1]
+    xp0_A = ANN * xp[0] // A_PRECISION
+    return PRECISION * (xp0_A + Dr * xp[0] // xp[1]) // (xp0_A + Dr)
+
+
+def _checked(value: int) -> int:
+    if value < 0:
+        raise Revert("underflow")
+    return value
+
+
+@dataclass
+class Trace:
+    """State after every step of a replay, one entry per tape step"""
+
+    timestamps: List[int] = field(default_factory=list)
+    results: list = field(default_factory=list)
+    reverted: List[bool] = field(default_factory=list)
+    balances: List[tuple] = field(default_factory=list)
+    admin_balances: List[tuple] = field(default_factory=list)
+    total_supply: List[int] = field(default_factory=list)
+    virtual_price: List[int] = field(default_factory=list)
+    price_oracle: List[Optional[int]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class PoolSimulator:
+    """
+    State of a single pool.
+
+    @param rates Rate multipliers, or `[rate_multiplier, base virtual price]` for metapools
+    @param balances Pool balances
+    @param total_supply LP token total supply
+    @param amp Amplification coefficient with `A_PRECISION`
+    @param fee Pool fee with 1e10 precision
+    @param unrolled True when modelling a 2-coin plain implementation
+    @param ma_exp_time EMA time constant of the oracle, None for pools without one
+    @param ema_alpha `(dt, ma_exp_time) -> alpha` of the modelled implementation
+    @param price_balances True when modelling an implementation that prices the
+                          balances rather than `xp` in `remove_liquidity_imbalance`,
+                          as `Plain2Price` and `Plain2Balances` do
+    """
+
+    def __init__(
+        self,
+        rates: List[int],
+        balances: List[int],
+        total_supply: int,
+        amp: int,
+        fee: int,
+        admin_fee: int = ADMIN_FEE,
+        unrolled: bool = False,
+        ma_exp_time: Optional[int] = None,
+        last_price: int = PRECISION,
+        ema_price: int = PRECISION,
+        ma_last_time: int = 0,
+        admin_balances: Optional[List[int]] = None,
+        timestamp: int = 0,
+        ema_alpha: Callable[[int, int], int] = ema_alpha,
+        price_balances: bool = False,
+    ):
+        self.n_coins = len(balances)
+        self.rates = list(rates)
+        self.balances = list(balances)
+        self.total_supply = total_supply
+        self.admin_balances = list(admin_balances or [0] * self.n_coins)
+        self.initial_A = self.future_A = amp
+        self.initial_A_time = self.future_A_time = 0
+        self.fee = fee
+        self.admin_fee = admin_fee
+        self.unrolled = unrolled
+        self.timestamp = timestamp
+
+        self.ma_exp_time = ma_exp_time
+        self.last_price = last_price
+        self.ema_price = ema_price
+        self.ma_last_time = ma_last_time
+        self.ema_alpha = ema_alpha
+        self.price_balances = price_balances
+
+        # (amp, xp, D) of the current balances and rates
+        self._invariant_cache = None
+        # time elapsed -> EMA decay factor, for the current `ma_exp_time`
+        self._alpha_cache = {}
+        self._actions = (
+            self.exchange,
+            self.add_liquidity,
+            self.remove_liquidity,
+            self.remove_liquidity_imbalance,
+            self.remove_liquidity_one_coin,
+            self.ramp_A,
+            self.stop_ramp_A,
+            self.set_fee,
+            self.set_ma_exp_time,
+            self.set_rates,
+        )
+
+    @classmethod
+    def from_state(cls, pool, state, timestamp: int, **kwargs) -> "PoolSimulator":
+        """Start from a `PoolInfo` and `PoolState` held by `offchain.indexer.Indexer`"""
+        sim = cls(
+            pool.rates,
+            state.balances,
+            state.total_supply,
+            state.future_A,
+            state.fee,
+            admin_fee=state.admin_fee,
+            unrolled=pool.unrolled,
+            timestamp=timestamp,
+            **kwargs,
+        )
+        sim.initial_A, sim.initial_A_time = state.initial_A, state.initial_A_time
+        sim.future_A_time = state.future_A_time
+        return sim
+
+    # views
+
+    def A(self) -> int:
+        """Amplification coefficient with `A_PRECISION`, mirrors `_A`"""
+        t1 = self.future_A_time
+        A1 = self.future_A
+        timestamp = self.timestamp
+        if timestamp < t1:
+            A0, t0 = self.initial_A, self.initial_A_time
+            if A1 > A0:
+                return A0 + (A1 - A0) * (timestamp - t0) // (t1 - t0)
+            return A0 - (A0 - A1) * (timestamp - t0) // (t1 - t0)
+        return A1
+
+    def _invariant(self, amp: int):
+        cache = self._invariant_cache
+        if cache is not None and cache[0] == amp:
+            return cache[1], cache[2]
+        xp = [rate * balance // PRECISION for rate, balance in zip(self.rates, self.balances)]
+        D = get_D(xp, amp, self.unrolled)
+        self._invariant_cache = (amp, xp, D)
+        return xp, D
+
+    def get_virtual_price(self) -> int:
+        _, D = self._invariant(self.A())
+        return D * PRECISION // self.total_supply
+
+    def price_oracle(self) -> Optional[int]:
+        if self.ma_exp_time is None:
+            return None
+        return self._ma_price()
+
+    def _alpha(self, dt: int) -> int:
+        alpha = self._alpha_cache.get(dt)
+        if alpha is None:
+            alpha = self._alpha_cache[dt] = self.ema_alpha(dt, self.ma_exp_time)
+        return alpha
+
+    def _ma_price(self) -> int:
+        if self.ma_last_time < self.timestamp:
+            alpha = self._alpha(self.timestamp - self.ma_last_time)
+            return (self.last_price * (PRECISION - alpha) + self.ema_price * alpha) // PRECISION
+        return self.ema_price
+
+    def _save_p(self, price: int):
+        if price != 0:
+            self.ema_price = self._ma_price()
+            self.last_price = price
+            if self.ma_last_time < self.timestamp:
+                self.ma_last_time = self.timestamp
+
+    def _set_balances(self, balances: List[int]):
+        self.balances = balances
+        self._invariant_cache = None
+
+    # pool operations
+
+    def exchange(self, i: int, j: int, dx: int, min_dy: int = 0) -> int:
+        rates = self.rates
+        balances = self.balances
+        amp = self.A()
+        xp, D = self._invariant(amp)
+
+        n_coins = self.n_coins
+        if i == j or not (0 <= i < n_coins and 0 <= j < n_coins):
+            raise Revert("invalid coin index")
+        x = xp[i] + dx * rates[i] // PRECISION
+        if n_coins == 2:
+            y = _solve_y([x], 2, amp, D)
+        else:
+            y = get_y(i, j, x, xp, amp, D)
+
+        dy = xp[j] - y - 1
+        if dy < 0:
+            raise Revert("underflow")
+        dy_fee = dy * self.fee // FEE_DENOMINATOR
+        rate_j = rates[j]
+        dy = (dy - dy_fee) * PRECISION // rate_j
+        if dy < min_dy:
+            raise Revert("Exchange resulted in fewer coins than expected")
+        dy_admin_fee = dy_fee * self.admin_fee // FEE_DENOMINATOR * PRECISION // rate_j
+        balance_j = balances[j] - dy - dy_admin_fee
+        if balance_j < 0:
+            raise Revert("underflow")
+
+        if self.ma_exp_time is not None:
+            xp = list(xp)
+            xp[i] = x
+            xp[j] = y
+            # D is not changed because no fee was applied
+            self._save_p(get_p(xp, amp, D))
+
+        balances[i] += dx
+        balances[j] = balance_j
+        self._invariant_cache = None
+        self.admin_balances[j] += dy_admin_fee
+        return dy
+
+    def _charge_fees(self, old_balances, new_balances, D0, D1, stored):
+        # imbalance fees of `add_liquidity` and `remove_liquidity_imbalance`
+        n_coins = self.n_coins
+        base_fee = self.fee * n_coins // (4 * (n_coins - 1))
+        fees = []
+        for k in range(n_coins):
+            ideal_balance = D1 * old_balances[k] // D0
+            fee = base_fee * abs(ideal_balance - new_balances[k]) // FEE_DENOMINATOR
+            fees.append(fee)
+            stored[k] = _checked(new_balances[k] - fee * self.admin_fee // FEE_DENOMINATOR)
+            new_balances[k] = _checked(new_balances[k] - fee)
+        return fees
+
+    def add_liquidity(self, amounts: List[int]) -> int:
+        amp = self.A()
+        old_balances = self.balances
+        _, D0 = self._invariant(amp)
+        total_supply = self.total_supply
+
+        if total_supply == 0 and 0 in amounts:
+            raise Revert("initial deposit requires all coins")
+        new_balances = [balance + amount for balance, amount in zip(old_balances, amounts)]
+        rates = self.rates
+        xp = [rate * balance // PRECISION for rate, balance in zip(rates, new_balances)]
+        D1 = get_D(xp, amp, self.unrolled)
+        if D1 <= D0:
+            raise Revert("D1 <= D0")
+
+        if total_supply > 0:
+            stored = list(new_balances)
+            fees = self._charge_fees(old_balances, new_balances, D0, D1, stored)
+            xp = [rate * balance // PRECISION for rate, balance in zip(rates, new_balances)]
+            D2 = get_D(xp, amp, self.unrolled)
+            mint_amount = total_supply * (D2 - D0) // D0
+            if self.ma_exp_time is not None:
+                self._save_p(get_p(xp, amp, D2))
+            for k, fee in enumerate(fees):
+                self.admin_balances[k] += fee * self.admin_fee // FEE_DENOMINATOR
+        else:
+            stored = new_balances
+            mint_amount = D1
+
+        self._set_balances(stored)
+        self.total_supply = total_supply + mint_amount
+        return mint_amount
+
+    def remove_liquidity(self, burn_amount: int) -> List[int]:
+        total_supply = self.total_supply
+        if burn_amount > total_supply:
+            raise Revert("burn exceeds supply")
+        amounts = [balance * burn_amount // total_supply for balance in self.balances]
+        self._set_balances([balance - amount for balance, amount in zip(self.balances, amounts)])
+        self.total_supply = total_supply - burn_amount
+        return amounts
+
+    def remove_liquidity_imbalance(self, amounts: List[int]) -> int:
+        amp = self.A()
+        old_balances = self.balances
+        _, D0 = self._invariant(amp)
+
+        new_balances = [
+            _checked(balance - amount) for balance, amount in zip(old_balances, amounts)
+        ]
+        rates = self.rates
+        xp = [rate * balance // PRECISION for rate, balance in zip(rates, new_balances)]
+        D1 = get_D(xp, amp, self.unrolled)
+
+        stored = list(new_balances)
+        fees = self._charge_fees(old_balances, new_balances, D0, D1, stored)
+        xp = [rate * balance // PRECISION for rate, balance in zip(rates, new_balances)]
+        D2 = get_D(xp, amp, self.unrolled)
+
+        total_supply = self.total_supply
+        burn_amount = _checked(D0 - D2) * total_supply // D0 + 1
+        if burn_amount <= 1:
+            raise Revert("zero tokens burned")
+        if burn_amount > total_supply:
+            raise Revert("burn exceeds supply")
+
+        if self.ma_exp_time is not None:
+            self._save_p(get_p(new_balances if self.price_balances else xp, amp, D2))
+        self._set_balances(stored)
+        for k, fee in enumerate(fees):
+            self.admin_balances[k] += fee * self.admin_fee // FEE_DENOMINATOR
+        self.total_supply = total_supply - burn_amount
+        return burn_amount
+
+    def calc_withdraw_one_coin(self, burn_amount: int, i: int):
+        """Mirrors `_calc_withdraw_one_coin`, returning `(dy, fee, last price)`"""
+        amp = self.A()
+        rates = self.rates
+        xp, D0 = self._invariant(amp)
+
+        D1 = _checked(D0 - burn_amount * D0 // self.total_supply)
+        new_y = get_y_D(amp, i, xp, D1)
+
+        n_coins = self.n_coins
+        base_fee = self.fee * n_coins // (4 * (n_coins - 1))
+        xp_reduced = []
+        for k, xp_k in enumerate(xp):
+            if k == i:
+                dx_expected = _checked(xp_k * D1 // D0 - new_y)
+            else:
+                dx_expected = xp_k - xp_k * D1 // D0
+            xp_reduced.append(_checked(xp_k - base_fee * dx_expected // FEE_DENOMINATOR))
+
+        dy = _checked(xp_reduced[i] - get_y_D(amp, i, xp_reduced, D1))
+        dy_0 = _checked(xp[i] - new_y) * PRECISION // rates[i]
+        dy = _checked(dy - 1) * PRECISION // rates[i]
+
+        last_price = 0
+        if self.ma_exp_time is not None and new_y > 0:
+            xp = list(xp)
+            xp[i] = new_y
+            last_price = get_p(xp, amp, D1)
+        return dy, _checked(dy_0 - dy), last_price
+
+    def _match_coin(self, burn_amount: int, coin_amount: int) -> int:
+        # `RemoveLiquidityOne` does not log the coin, find the one the amount matches
+        exact, best, best_distance = [], [], None
+        for k in range(self.n_coins):
+            try:
+                dy = self.calc_withdraw_one_coin(burn_amount, k)[0]
+            except (Revert, ZeroDivisionError):
+                continue
+            if dy == coin_amount:
+                exact.append(k)
+            # with other pool parameters amounts never match, take the closest in value
+            distance = abs(dy - coin_amount) * self.rates[k]
+            if best_distance is None or distance < best_distance:
+                best, best_distance = [k], distance
+            elif distance == best_distance:
+                best.append(k)
+        matches = exact or best
+        if not matches:
+            raise Revert("no coin can be withdrawn")
+        if len(matches) > 1:
+            # e.g. a balanced pool of equal rates, the coin transfer tells them apart
+            raise Revert("ambiguous coin index")
+        return matches[0]
+
+    def remove_liquidity_one_coin(
+        self, burn_amount: int, i: Optional[int] = None, coin_amount: Optional[int] = None
+    ) -> int:
+        """
+        Withdraw a single coin. When `i` is None it is inferred from `coin_amount`,
+        which reverts if several coins match it equally well.
+        """
+        if i is None:
+            i = self._match_coin(burn_amount, coin_amount)
+        dy, dy_fee, last_price = self.calc_withdraw_one_coin(burn_amount, i)
+        dy_admin_fee = dy_fee * self.admin_fee // FEE_DENOMINATOR
+
+        balance = _checked(self.balances[i] - dy - dy_admin_fee)
+        total_supply = _checked(self.total_supply - burn_amount)
+
+        self.balances[i] = balance
+        self._invariant_cache = None
+        self.admin_balances[i] += dy_admin_fee
+        self.total_supply = total_supply
+        if self.ma_exp_time is not None:
+            self._save_p(last_price)
+        return dy
+
+    # parameter changes
+
+    def ramp_A(self, future_A: int, future_time: int):
+        self.initial_A = self.A()
+        self.future_A = future_A
+        self.initial_A_time = self.timestamp
+        self.future_A_time = future_time
+
+    def stop_ramp_A(self):
+        self.initial_A = self.future_A = self.A()
+        self.initial_A_time = self.future_A_time = self.timestamp
+
+    def set_fee(self, fee: int):
+        self.fee = fee
+
+    def set_ma_exp_time(self, ma_exp_time: int):
+        self.ma_exp_time = ma_exp_time
+        self._alpha_cache = {}
+
+    def set_rates(self, rates: List[int]):
+        self.rates = list(rates)
+        self._invariant_cache = None
+
+    # replay
+
+    def step(self, timestamp: int, action: int, *args):
+        """Apply a single tape step, returning the result of the operation"""
+        self.timestamp = timestamp
+        return self._actions[action](*args)
+
+    def run(self, tape: Iterable[tuple]) -> Trace:
+        """Replay `tape`, recording the pool state after every step"""
+        trace = Trace()
+        timestamps, results, reverted = trace.timestamps, trace.results, trace.reverted
+        balances, admin_balances = trace.balances, trace.admin_balances
+        total_supply, virtual_price = trace.total_supply, trace.virtual_price
+        price_oracle = trace.price_oracle
+        actions = self._actions
+
+        for step in tape:
+            timestamp = self.timestamp = step[0]
+            try:
+                results.append(actions[step[1]](*step[2:]))
+                reverted.append(False)
+            except (Revert, ZeroDivisionError):
+                results.append(None)
+                reverted.append(True)
+
+            timestamps.append(timestamp)
+            balances.append(tuple(self.balances))
+            admin_balances.append(tuple(self.admin_balances))
+            total_supply.append(self.total_supply)
+            try:
+                virtual_price.append(self.get_virtual_price())
+            except (Revert, ZeroDivisionError):
+                virtual_price.append(0)
+            price_oracle.append(None if self.ma_exp_time is None else self._ma_price())
+
+        return trace
+
+
+def tape_from_logs(
+    logs: Iterable,
+    pool: str,
+    rates: Optional[Callable] = None,
+    min_dy: bool = False,
+    coins: Optional[Iterable[str]] = None,
+) -> List[tuple]:
+    """
+    Build a tape from the `offchain.indexer.Log` records of `pool`.
+
+    Logs of other contracts are ignored, except the `Transfer` logs of `coins`.
+    `rates(log)` gives the rates in effect for each pool operation, and is
+    required for metapools and pools with oracle rates; a `SET_RATES` step is
+    added whenever they change. Underlying exchanges are replayed as the
+    metapool exchange they contain, using the logged base LP amount for base
+    coin inputs. With `min_dy`, exchanges require at least the logged output, so
+    a replay under other pool parameters reverts the trades that would have
+    received less. `RemoveLiquidityOne` does not log the coin withdrawn: given
+    the pool `coins`, it is taken from the coin the pool transferred the logged
+    amount of, otherwise the simulator infers it from the amount.
+    """
+    pool = str(pool).lower()
+    coins = [str(i).lower() for i in coins or []]
+    tape = []
+    current_rates = None
+    burn_amount = 0
+    # coin transfers sent by the pool within the current transaction
+    transfers = (None, [])
+
+    for log in logs:
+        if log.address != pool:
+            if log.event == "Transfer" and log.address in coins:
+                sender, _, amount = log.args.values()
+                if str(sender).lower() == pool:
+                    if transfers[0] != log.tx_hash:
+                        transfers = (log.tx_hash, [])
+                    transfers[1].append((coins.index(log.address), int(amount)))
+            continue
+        args, timestamp = log.args, log.timestamp
+
+        if log.event == "Transfer":
+            if str(args["receiver"]).lower() == ZERO_ADDRESS:
+                # logged by every withdrawal ahead of the pool event
+                burn_amount = args["value"]
+            continue
+
+        if rates is not None and log.event in OPERATION_EVENTS:
+            log_rates = list(rates(log))
+            if log_rates != current_rates:
+                tape.append((timestamp, SET_RATES, log_rates))
+                current_rates = log_rates
+
+        if log.event == "TokenExchange":
+            step = (timestamp, EXCHANGE, args["sold_id"], args["bought_id"], args["tokens_sold"])
+            tape.append(step + (args["tokens_bought"],) if min_dy else step)
+        elif log.event == "TokenExchangeUnderlying":
+            i, j = args["sold_id"], args["bought_id"]
+            if i == 0 or j == 0:
+                tape.append((timestamp, EXCHANGE, min(i, 1), min(j, 1), args["tokens_sold"]))
+        elif log.event == "AddLiquidity":
+            tape.append((timestamp, ADD_LIQUIDITY, list(args["token_amounts"])))
+        elif log.event == "RemoveLiquidity":
+            tape.append((timestamp, REMOVE_LIQUIDITY, burn_amount))
+        elif log.event == "RemoveLiquidityImbalance":
+            tape.append((timestamp, REMOVE_LIQUIDITY_IMBALANCE, list(args["token_amounts"])))
+        elif log.event == "RemoveLiquidityOne":
+            # the coin index is not logged, take it from the coin transfer if unique
+            sent = [] if transfers[0] != log.tx_hash else transfers[1]
+            matches = {k for k, amount in sent if amount == args["coin_amount"]}
+            i = matches.pop() if len(matches) == 1 else None
+            amounts = (args["token_amount"], i, args["coin_amount"])
+            tape.append((timestamp, REMOVE_LIQUIDITY_ONE, *amounts))
+        elif log.event == "RampA":
+            tape.append((timestamp, RAMP_A, args["new_A"], args["future_time"]))
+        elif log.event == "StopRampA":
+            tape.append((timestamp, STOP_RAMP_A))
+        elif log.event in ("ApplyNewFee", "NewFee"):
+            tape.append((timestamp, SET_FEE, args["fee"]))
+
+    return tape
@@ -0,0 +1,617 @@
+"""
+Vectorized off-chain port of the StableSwap math used by the factory pool
+implementations.
+
+Every function mirrors the integer arithmetic of the Vyper source bit-for-bit:
+multiplications, divisions and subtractions are evaluated in the same order and
+with the same truncation, and anything that would revert on-chain (overflow,
+underflow, division by zero, a Newton loop that fails to converge) is tracked.
+Values are held in NumPy `object` arrays so that every element is an unbounded
+Python integer, which keeps the uint256 semantics exact while letting a single
+call evaluate many pools and many trade sizes at once.
+
+Pool arguments are given as `(P, N)` arrays for `rates` / `balances` and `(P,)`
+arrays (or scalars) for per-pool values such as `amp` and `fee`. Trade sizes are
+given as `(P, M)` arrays, or `(M,)` arrays when every pool is quoted at the same
+sizes. Passing a single pool as `(N,)` arrays drops the leading dimension from
+the result. Results for inputs where the contract would revert are returned as 0.
+
+The `unrolled` flag selects the `D_P` form used in `get_D`: the 2-coin plain
+implementations compute `D * D / x0 * D / x1 / 4`, while the 3 and 4 coin plain
+implementations and the metapools use the `D_P = D_P * D / (x * N)` loop. Both
+forms round differently, so the flag must match the implementation being modelled.
+"""
+
+import numpy as np
+
+A_PRECISION = 100
+FEE_DENOMINATOR = 10 ** 10
+ADMIN_FEE = 5000000000
+PRECISION = 10 ** 18
+MAX_ITERATIONS = 255
+MAX_UINT256 = 2 ** 256 - 1
+
+
+def as_uint(values) -> np.ndarray:
+    """Convert `values` to an object array of python integers."""
+    return np.asarray(values).astype(object)
+
+
+# checked uint256 arithmetic - each helper flags lanes that would revert in `failed`
+
+
+def _add(a, b, failed):
+    result = a + b
+    failed |= result > MAX_UINT256
+    return result
+
+
+def _sub(a, b, failed):
+    underflow = a < b
+    failed |= underflow
+    return np.where(underflow, 0, a - b)
+
+
+def _mul(a, b, failed):
+    result = a * b
+    failed |= result > MAX_UINT256
+    return result
+
+
+def _div(a, b, failed):
+    zero = b == 0
+    failed |= zero
+    return a // np.where(zero, 1, b)
+
+
+def _converged(new, old):
+    return abs(new - old) <= 1
+
+
+# lane-level implementations
+# all arrays are flat: `xp` is (L, N), everything else is (L,)
+
+
+def _xp_mem(rates, balances, failed):
+    result = rates * balances
+    failed |= (result > MAX_UINT256).any(axis=1)
+    return result // PRECISION
+
+
+def _get_D(xp, amp, failed, unrolled):
+    n_coins = xp.shape[1]
+    S = xp.sum(axis=1)
+    failed |= S > MAX_UINT256
+    D = S.copy()
+    Ann = _mul(amp, n_coins, failed)
+
+    active = np.flatnonzero((S != 0) & ~failed)
+    for _ in range(MAX_ITERATIONS):
+        if active.size == 0:
+            return D
+
+        x = xp[active]
+        d = D[active]
+        f = failed[active]
+        ann = Ann[active]
+
+        if unrolled:
+            D_P = _div(_mul(_div(_mul(d, d, f), x[:, 0], f), d, f), x[:, 1], f) // n_coins ** 2
+        else:
+            D_P = d.copy()
+            for k in range(n_coins):
+                D_P = _div(_mul(D_P, d, f), _mul(x[:, k], n_coins, f), f)
+
+        numerator = _mul(
+            _add(_div(_mul(ann, S[active], f), A_PRECISION, f), _mul(D_P, n_coins, f), f), d, f
+        )
+        denominator = _add(
+            _div(_mul(_sub(ann, A_PRECISION, f), d, f), A_PRECISION, f),
+            _mul(D_P, n_coins + 1, f),
+            f,
+        )
+        d_next = _div(numerator, denominator, f)
+
+        D[active] = d_next
+        failed[active] = f
+        active = active[~_converged(d_next, d) & ~f]
+
+    # convergence typically occurs in 4 rounds or less, the contract raises otherwise
+    failed[active] = True
+    return D
+
+
+def _solve_y(xp, exclude, amp, D, failed):
+    """
+    Newton solver shared by `get_y` and `get_y_D`.
+
+    Solves for the balance at index `exclude`, using every other value in `xp`.
+    """
+    n_coins = xp.shape[1]
+    S_ = np.zeros(len(D), dtype=object)
+    c = D.copy()
+    Ann = _mul(amp, n_coins, failed)
+
+    for k in range(n_coins):
+        sel = np.flatnonzero(exclude != k)
+        f = failed[sel]
+        _x = xp[sel, k]
+        S_[sel] = _add(S_[sel], _x, f)
+        c[sel] = _div(_mul(c[sel], D[sel], f), _mul(_x, n_coins, f), f)
+        failed[sel] = f
+
+    c = _div(_mul(_mul(c, D, failed), A_PRECISION, failed), _mul(Ann, n_coins, failed), failed)
+    b = _add(S_, _div(_mul(D, A_PRECISION, failed), Ann, failed), failed)
+    y = D.copy()
+
+    active = np.flatnonzero(~failed)
+    for _ in range(MAX_ITERATIONS):
+        if active.size == 0:
+            return y
+
+        y_prev = y[active]
+        f = failed[active]
+        numerator = _add(_mul(y_prev, y_prev, f), c[active], f)
+        denominator = _sub(_add(_mul(y_prev, 2, f), b[active], f), D[active], f)
+        y_next = _div(numerator, denominator, f)
+
+        y[active] = y_next
+        failed[active] = f
+        active = active[~_converged(y_next, y_prev) & ~f]
+
+    failed[active] = True
+    return y
+
+
+def _check_index(idx, n_coins, failed):
+    failed |= (idx < 0) | (idx >= n_coins)
+    return np.clip(idx, 0, n_coins - 1)
+
+
+def _get_y(i, j, x, xp, amp, D, failed):
+    n_coins = xp.shape[1]
+    failed |= i == j
+    i = _check_index(i, n_coins, failed)
+    j = _check_index(j, n_coins, failed)
+
+    xs = xp.copy()
+    xs[np.arange(len(x)), i] = x
+    return _solve_y(xs, j, amp, D, failed)
+
+
+def _get_y_D(amp, i, xp, D, failed):
+    i = _check_index(i, xp.shape[1], failed)
+    return _solve_y(xp, i, amp, D, failed)
+
+
+def _calc_withdraw_one_coin(burn_amount, i, rates, xp, amp, fee, D0, total_supply, failed):
+    n_coins = xp.shape[1]
+    lanes = np.arange(len(D0))
+    i = _check_index(i, n_coins, failed)
+
+    D1 = _sub(D0, _div(_mul(burn_amount, D0, failed), total_supply, failed), failed)
+    new_y = _get_y_D(amp, i, xp, D1, failed)
+
+    base_fee = _div(_mul(fee, n_coins, failed), 4 * (n_coins - 1), failed)
+    xp_reduced = np.empty_like(xp)
+    for k in range(n_coins):
+        xp_k = xp[:, k]
+        scaled = _div(_mul(xp_k, D1, failed), D0, failed)
+        # only the branch that is actually taken can revert
+        underflow = np.where(i == k, scaled < new_y, xp_k < scaled)
+        failed |= underflow
+        dx_expected = np.where(underflow, 0, np.where(i == k, scaled - new_y, xp_k - scaled))
+        xp_reduced[:, k] = _sub(
+            xp_k, _div(_mul(base_fee, dx_expected, failed), FEE_DENOMINATOR, failed), failed
+        )
+
+    rate_i = rates[lanes, i]
+    dy = _sub(xp_reduced[lanes, i], _get_y_D(amp, i, xp_reduced, D1, failed), failed)
+    dy_0 = _div(_mul(_sub(xp[lanes, i], new_y, failed), PRECISION, failed), rate_i, failed)
+    dy = _div(_mul(_sub(dy, 1, failed), PRECISION, failed), rate_i, failed)
+
+    return dy, _sub(dy_0, dy, failed)
+
+
+def _get_dy(i, j, dx, rates, xp, amp, D, fee, failed):
+    lanes = np.arange(len(dx))
+    n_coins = xp.shape[1]
+    ii = _check_index(i, n_coins, failed)
+    jj = _check_index(j, n_coins, failed)
+
+    x = _add(xp[lanes, ii], _div(_mul(dx, rates[lanes, ii], failed), PRECISION, failed), failed)
+    y = _get_y(i, j, x, xp, amp, D, failed)
+
+    dy = _sub(_sub(xp[lanes, jj], y, failed), 1, failed)
+    dy_fee = _div(_mul(fee, dy, failed), FEE_DENOMINATOR, failed)
+    return _div(_mul(_sub(dy, dy_fee, failed), PRECISION, failed), rates[lanes, jj], failed)
+
+
+def _calc_token_amount_deposit(amount, i, rates, balances, amp, D0, total_supply, failed):
+    lanes = np.arange(len(amount))
+    i = _check_index(i, balances.shape[1], failed)
+    balances = balances.copy()
+    balances[lanes, i] = _add(balances[lanes, i], amount, failed)
+
+    D1 = _get_D(_xp_mem(rates, balances, failed), amp, failed, False)
+    return _div(_mul(_sub(D1, D0, failed), total_supply, failed), D0, failed)
+
+
+# argument handling
+
+
+def _pool_arrays(rates, balances):
+    rates = as_uint(rates)
+    balances = as_uint(balances)
+    is_single = balances.ndim == 1
+    rates, balances = np.broadcast_arrays(np.atleast_2d(rates), np.atleast_2d(balances))
+    return rates.copy(), balances.copy(), is_single
+
+
+def _per_pool(values, n_pools, dtype=object):
+    return np.broadcast_to(np.asarray(values).astype(dtype), (n_pools,)).copy()
+
+
+def _per_trade(values, n_pools):
+    values = as_uint(values)
+    if values.ndim < 2:
+        values = np.broadcast_to(np.atleast_1d(values), (n_pools, np.atleast_1d(values).size))
+    return values
+
+
+def _result(values, failed, shape, is_single):
+    values = np.where(failed, 0, values).reshape(shape)
+    return values[0] if is_single else values
+
+
+# public api
+
+
+def xp_mem(rates, balances) -> np.ndarray:
+    """
+    Normalize balances to 18 decimal precision.
+
+    Mirrors `_xp_mem`: `rates[i] * balances[i] / PRECISION`.
+    """
+    rates, balances, is_single = _pool_arrays(rates, balances)
+    failed = np.zeros(len(balances), dtype=bool)
+    xp = _xp_mem(rates, balances, failed)
+    return _result(xp, failed[:, None], xp.shape, is_single)
+
+
+def get_D(xp, amp, unrolled: bool = False) -> np.ndarray:
+    """
+    Calculate the StableSwap invariant for one or more pools.
+
+    Mirrors `get_D`.
+
+    @param xp (P, N) array of normalized balances
+    @param amp Amplification coefficient with `A_PRECISION`, per pool
+    @param unrolled True when modelling a 2-coin plain implementation
+    """
+    xp = as_uint(xp)
+    is_single = xp.ndim == 1
+    xp = np.atleast_2d(xp)
+    failed = np.zeros(len(xp), dtype=bool)
+    D = _get_D(xp, _per_pool(amp, len(xp)), failed, unrolled)
+    return _result(D, failed, D.shape, is_single)
+
+
+def get_y(i, j, x, xp, amp, D) -> np.ndarray:
+    """
+    Calculate `xp[j]` after setting `xp[i]` to `x`, holding `D` constant.
+
+    Mirrors `get_y`. Arguments are per pool; `x` may hold several values
+    per pool as a (P, M) array.
+    """
+    xp = as_uint(xp)
+    is_single = xp.ndim == 1
+    xp = np.atleast_2d(xp)
+    n_pools = len(xp)
+
+    x = _per_trade(x, n_pools)
+    shape = x.shape
+    pool_idx = np.repeat(np.arange(n_pools), shape[1])
+    failed = np.zeros(pool_idx.size, dtype=bool)
+
+    y = _get_y(
+        _per_pool(i, n_pools, int)[pool_idx],
+        _per_pool(j, n_pools, int)[pool_idx],
+        x.ravel(),
+        xp[pool_idx],
+        _per_pool(amp, n_pools)[pool_idx],
+        _per_pool(D, n_pools)[pool_idx],
+        failed,
+    )
+    return _result(y, failed, shape, is_single)
+
+
+def get_y_D(amp, i, xp, D) -> np.ndarray:
+    """
+    Calculate `xp[i]` after reducing the invariant to `D`.
+
+    Mirrors `get_y_D`. `D` may hold several values per pool as a (P, M) array.
+    """
+    xp = as_uint(xp)
+    is_single = xp.ndim == 1
+    xp = np.atleast_2d(xp)
+    n_pools = len(xp)
+
+    D = _per_trade(D, n_pools)
+    shape = D.shape
+    pool_idx = np.repeat(np.arange(n_pools), shape[1])
+    failed = np.zeros(pool_idx.size, dtype=bool)
+
+    y = _get_y_D(
+        _per_pool(amp, n_pools)[pool_idx],
+        _per_pool(i, n_pools, int)[pool_idx],
+        xp[pool_idx],
+        D.ravel(),
+        failed,
+    )
+    return _result(y, failed, shape, is_single)
+
+
+def get_virtual_price(rates, balances, amp, total_supply, unrolled: bool = False) -> np.ndarray:
+    """
+    Calculate the LP token virtual price for one or more pools.
+
+    Mirrors `get_virtual_price`.
+    """
+    rates, balances, is_single = _pool_arrays(rates, balances)
+    n_pools = len(balances)
+    failed = np.zeros(n_pools, dtype=bool)
+
+    xp = _xp_mem(rates, balances, failed)
+    D = _get_D(xp, _per_pool(amp, n_pools), failed, unrolled)
+    price = _div(_mul(D, PRECISION, failed), _per_pool(total_supply, n_pools), failed)
+    return _result(price, failed, price.shape, is_single)
+
+
+def get_dy(i, j, dx, rates, balances, amp, fee, unrolled: bool = False) -> np.ndarray:
+    """
+    Calculate the output of an exchange for many pools and trade sizes.
+
+    Mirrors `get_dy`. The invariant is computed once per pool and reused for
+    every trade size.
+
+    @param i Index value for the coin to send, per pool
+    @param j Index value of the coin to receive, per pool
+    @param dx (P, M) or (M,) array of amounts of `i` being exchanged
+    @param rates (P, N) array of rate multipliers (or stored rates)
+    @param balances (P, N) array of pool balances
+    @param amp Amplification coefficient with `A_PRECISION`, per pool
+    @param fee Pool fee with 1e10 precision, per pool
+    @param unrolled True when modelling a 2-coin plain implementation
+    @return (P, M) array of amounts of `j` received
+    """
+    rates, balances, is_single = _pool_arrays(rates, balances)
+    n_pools = len(balances)
+
+    pool_failed = np.zeros(n_pools, dtype=bool)
+    amp = _per_pool(amp, n_pools)
+    xp = _xp_mem(rates, balances, pool_failed)
+    D = _get_D(xp, amp, pool_failed, unrolled)
+
+    dx = _per_trade(dx, n_pools)
+    shape = dx.shape
+    pool_idx = np.repeat(np.arange(n_pools), shape[1])
+    failed = pool_failed[pool_idx]
+
+    dy = _get_dy(
+        _per_pool(i, n_pools, int)[pool_idx],
+        _per_pool(j, n_pools, int)[pool_idx],
+        dx.ravel(),
+        rates[pool_idx],
+        xp[pool_idx],
+        amp[pool_idx],
+        D[pool_idx],
+        _per_pool(fee, n_pools)[pool_idx],
+        failed,
+    )
+    return _result(dy, failed, shape, is_single)
+
+
+def calc_withdraw_one_coin(
+    burn_amount, i, rates, balances, amp, fee, total_supply, unrolled: bool = False
+) -> tuple:
+    """
+    Calculate the amount received when withdrawing a single coin.
+
+    Mirrors `_calc_withdraw_one_coin`. The initial invariant is computed once
+    per pool and reused for every burn amount.
+
+    @param burn_amount (P, M) or (M,) array of LP token amounts to burn
+    @param i Index value of the coin to withdraw, per pool
+    @param rates (P, N) array of rate multipliers (or stored rates)
+    @param balances (P, N) array of pool balances
+    @param amp Amplification coefficient with `A_PRECISION`, per pool
+    @param fee Pool fee with 1e10 precision, per pool
+    @param total_supply LP token total supply, per pool
+    @param unrolled True when modelling a 2-coin plain implementation
+    @return (P, M) arrays of coin amounts received and of fees charged
+    """
+    rates, balances, is_single = _pool_arrays(rates, balances)
+    n_pools = len(balances)
+
+    pool_failed = np.zeros(n_pools, dtype=bool)
+    amp = _per_pool(amp, n_pools)
+    xp = _xp_mem(rates, balances, pool_failed)
+    D0 = _get_D(xp, amp, pool_failed, unrolled)
+
+    burn_amount = _per_trade(burn_amount, n_pools)
+    shape = burn_amount.shape
+    pool_idx = np.repeat(np.arange(n_pools), shape[1])
+    failed = pool_failed[pool_idx]
+
+    dy, dy_fee = _calc_withdraw_one_coin(
+        burn_amount.ravel(),
+        _per_pool(i, n_pools, int)[pool_idx],
+        rates[pool_idx],
+        xp[pool_idx],
+        amp[pool_idx],
+        _per_pool(fee, n_pools)[pool_idx],
+        D0[pool_idx],
+        _per_pool(total_supply, n_pools)[pool_idx],
+        failed,
+    )
+    return _result(dy, failed, shape, is_single), _result(dy_fee, failed, shape, is_single)
+
+
+def get_dy_underlying(
+    i,
+    j,
+    dx,
+    rate_multiplier,
+    balances,
+    amp,
+    fee,
+    base_rates,
+    base_balances,
+    base_amp,
+    base_fee,
+    base_total_supply,
+) -> np.ndarray:
+    """
+    Calculate the output of an underlying exchange for many metapools and trade sizes.
+
+    Mirrors the metapool `get_dy_underlying`, including the calls it makes into
+    the base pool. Coin 0 is the metapool coin and coins `1..N` are the base pool
+    coins. The base pool virtual price, which the metapool uses as the rate of
+    its LP token, is derived from the base pool state rather than passed in.
+
+    @param i Index value of the underlying coin to send, per pool
+    @param j Index value of the underlying coin to receive, per pool
+    @param dx (P, M) or (M,) array of amounts of `i` being exchanged
+    @param rate_multiplier Rate multiplier of the metapool coin, per pool
+    @param balances (P, 2) array of metapool balances
+    @param amp Metapool amplification coefficient with `A_PRECISION`, per pool
+    @param fee Metapool fee with 1e10 precision, per pool
+    @param base_rates (P, N) array of base pool rates
+    @param base_balances (P, N) array of base pool balances
+    @param base_amp Base pool amplification coefficient with `A_PRECISION`, per pool
+    @param base_fee Base pool fee with 1e10 precision, per pool
+    @param base_total_supply Base pool LP token total supply, per pool
+    @return (P, M) array of amounts of `j` received
+    """
+    balances = as_uint(balances)
+    is_single = balances.ndim == 1
+    balances = np.atleast_2d(balances)
+    n_pools = len(balances)
+
+    base_rates, base_balances, _ = _pool_arrays(base_rates, base_balances)
+    base_shape = (n_pools, base_balances.shape[1])
+    base_rates = np.broadcast_to(base_rates, base_shape).copy()
+    base_balances = np.broadcast_to(base_balances, base_shape).copy()
+
+    pool_failed = np.zeros(n_pools, dtype=bool)
+    base_amp = _per_pool(base_amp, n_pools)
+    base_fee = _per_pool(base_fee, n_pools)
+    base_supply = _per_pool(base_total_supply, n_pools)
+    base_xp = _xp_mem(base_rates, base_balances, pool_failed)
+    base_D = _get_D(base_xp, base_amp, pool_failed, False)
+
+    # `[rate_multiplier, base_pool.get_virtual_price()]`, read on every call
+    virtual_price = _div(_mul(base_D, PRECISION, pool_failed), base_supply, pool_failed)
+    rates = np.stack([_per_pool(rate_multiplier, n_pools), virtual_price], axis=1)
+    amp = _per_pool(amp, n_pools)
+    fee = _per_pool(fee, n_pools)
+    xp = _xp_mem(rates, balances, pool_failed)
+    D = _get_D(xp, amp, pool_failed, False)
+
+    dx = _per_trade(dx, n_pools)
+    shape = dx.shape
+    pool_idx = np.repeat(np.arange(n_pools), shape[1])
+    failed = pool_failed[pool_idx]
+    i = _per_pool(i, n_pools, int)[pool_idx]
+    j = _per_pool(j, n_pools, int)[pool_idx]
+    dx = dx.ravel()
+    dy = np.zeros(dx.size, dtype=object)
+
+    # each branch is evaluated on its own lanes, so only the path taken can revert
+    both_base = np.flatnonzero((i != 0) & (j != 0))
+    if both_base.size:
+        # both coins are in the base pool, the metapool is not involved
+        p = pool_idx[both_base]
+        f = failed[both_base]
+        dy[both_base] = _get_dy(
+            i[both_base] - 1,
+            j[both_base] - 1,
+            dx[both_base],
+            base_rates[p],
+            base_xp[p],
+            base_amp[p],
+            base_D[p],
+            base_fee[p],
+            f,
+        )
+        failed[both_base] = f
+
+    x = np.zeros(dx.size, dtype=object)
+
+    from_meta = np.flatnonzero(i == 0)
+    if from_meta.size:
+        p = pool_idx[from_meta]
+        f = failed[from_meta]
+        scaled = _mul(dx[from_meta], rates[p, 0] // PRECISION, f)
+        x[from_meta] = _add(xp[p, 0], scaled, f)
+        failed[from_meta] = f
+
+    from_base = np.flatnonzero((i != 0) & (j == 0))
+    if from_base.size:
+        # deposit into the base pool, less half the base fee as an approximation
+        p = pool_idx[from_base]
+        f = failed[from_base]
+        lp_amount = _calc_token_amount_deposit(
+            dx[from_base],
+            i[from_base] - 1,
+            base_rates[p],
+            base_balances[p],
+            base_amp[p],
+            base_D[p],
+            base_supply[p],
+            f,
+        )
+        x_base = _div(_mul(lp_amount, rates[p, 1], f), PRECISION, f)
+        x_base = _sub(x_base, _div(_mul(x_base, base_fee[p], f), 2 * FEE_DENOMINATOR, f), f)
+        x[from_base] = _add(x_base, xp[p, 1], f)
+        failed[from_base] = f
+
+    meta = np.flatnonzero((i == 0) | (j == 0))
+    if meta.size:
+        p = pool_idx[meta]
+        f = failed[meta]
+        meta_i = (i[meta] != 0).astype(int)
+        meta_j = (j[meta] != 0).astype(int)
+        y = _get_y(meta_i, meta_j, x[meta], xp[p], amp[p], D[p], f)
+
+        dy_meta = _sub(_sub(xp[p, meta_j], y, f), 1, f)
+        dy_meta = _sub(dy_meta, _div(_mul(fee[p], dy_meta, f), FEE_DENOMINATOR, f), f)
+        failed[meta] = f
+
+        to_meta = meta[j[meta] == 0]
+        if to_meta.size:
+            f = failed[to_meta]
+            dy[to_meta] = _div(dy_meta[j[meta] == 0], rates[pool_idx[to_meta], 0] // PRECISION, f)
+            failed[to_meta] = f
+
+        to_base = meta[j[meta] != 0]
+        if to_base.size:
+            # withdraw the received LP tokens from the base pool, fees included
+            p = pool_idx[to_base]
+            f = failed[to_base]
+            burn_amount = _div(_mul(dy_meta[j[meta] != 0], PRECISION, f), rates[p, 1], f)
+            dy[to_base], _ = _calc_withdraw_one_coin(
+                burn_amount,
+                j[to_base] - 1,
+                base_rates[p],
+                base_xp[p],
+                base_amp[p],
+                base_fee[p],
+                base_D[p],
+                base_supply[p],
+                f,
+            )
+            failed[to_base] = f
+
+    return _result(dy, failed, shape, is_single)
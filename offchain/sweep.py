@@ -0,0 +1,251 @@
+"""
+Parameter sweep over the amplification, fee and oracle EMA time of a pool.
+
+A historical trade tape is replayed with `PoolSimulator` once for every point of
+a `(A, fee, ma_exp_time)` grid, starting from the same pool state, to compare
+how each parameter set would have served the observed flow:
+
+* `lp_pnl` - change in value of the pool balances against holding the initial
+  balances, with coins valued at `prices`. Fees raise it, trading inventory away
+  from a depegging coin lowers it.
+* `volume` / `captured` - volume the pool executed, in coin 0 equivalents with
+  1e18 precision, and its share of the tape volume. Trades carrying a `min_dy`
+  (see `tape_from_logs`) only execute when they receive at least as much as they
+  did historically; otherwise the trader is assumed to have gone elsewhere.
+* `oracle_deviation` - mean and maximum relative deviation of `price_oracle`
+  from the spot price after each executed trade, for 2 coin pools with an
+  oracle.
+
+Only `EXCHANGE` steps of the tape are replayed, and rates stay at those of the
+initial state. Every grid point replays the whole tape at roughly 50k trades per
+second per core, so the grid is fanned out over a process pool. The trades are
+packed into a fixed width array in shared memory, which each worker decodes once
+rather than receiving a copy per grid point.
+"""
+
+from dataclasses import dataclass
+from itertools import product
+from multiprocessing import Pool, shared_memory
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from offchain.indexer import ADMIN_FEE
+from offchain.simulator import (
+    A_PRECISION,
+    EXCHANGE,
+    FEE_DENOMINATOR,
+    PRECISION,
+    PoolSimulator,
+    Revert,
+)
+
+# uint256 amounts are stored as little-endian 64 bit limbs
+LIMBS = 4
+TRADE_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("i", "u1"),
+        ("j", "u1"),
+        ("dx", "<u8", (LIMBS,)),
+        ("min_dy", "<u8", (LIMBS,)),
+    ]
+)
+
+
+@dataclass(frozen=True)
+class InitialState:
+    """
+    Pool state every grid point starts from.
+
+    @param rates Rate multipliers, or `[rate_multiplier, base virtual price]` for metapools
+    @param balances Pool balances
+    @param total_supply LP token total supply
+    @param unrolled True when modelling a 2-coin plain implementation
+    @param timestamp Time of the state, the oracle starts from it at the peg
+    """
+
+    rates: Tuple[int, ...]
+    balances: Tuple[int, ...]
+    total_supply: int
+    unrolled: bool = False
+    admin_fee: int = ADMIN_FEE
+    timestamp: int = 0
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    A: int
+    fee: int
+    ma_exp_time: Optional[int]
+    lp_pnl: float
+    volume: int
+    captured: float
+    trades: int
+    oracle_deviation: Optional[float]
+    max_oracle_deviation: Optional[float]
+    balances: Tuple[int, ...]
+
+
+def _to_limbs(value: int) -> List[int]:
+    return [(value >> (64 * k)) & (2 ** 64 - 1) for k in range(LIMBS)]
+
+
+def pack_trades(tape: Iterable[tuple], slippage: int = 0) -> np.ndarray:
+    """
+    Pack the `EXCHANGE` steps of `tape` into a `TRADE_DTYPE` array.
+
+    `slippage` (1e10 precision) lowers every `min_dy`, so trades still execute
+    when receiving slightly less than they did historically.
+    """
+    trades = [step for step in tape if step[1] == EXCHANGE]
+    packed = np.zeros(len(trades), dtype=TRADE_DTYPE)
+    for idx, (timestamp, _, i, j, dx, *min_dy) in enumerate(trades):
+        min_dy = min_dy[0] * (FEE_DENOMINATOR - slippage) // FEE_DENOMINATOR if min_dy else 0
+        packed[idx] = (timestamp, i, j, _to_limbs(dx), _to_limbs(min_dy))
+    return packed
+
+
+def unpack_trades(packed: np.ndarray) -> List[tuple]:
+    """Decode a packed array back to `(timestamp, i, j, dx, min_dy)` tuples of ints"""
+    columns = []
+    for name in ("dx", "min_dy"):
+        limbs = packed[name].astype(object)
+        columns.append(sum(limbs[:, k] << (64 * k) for k in range(LIMBS)))
+    return list(
+        zip(
+            packed["timestamp"].tolist(),
+            packed["i"].tolist(),
+            packed["j"].tolist(),
+            *(column.tolist() for column in columns),
+        )
+    )
+
+
+def _value(balances: Sequence[int], rates: Sequence[int], prices: Sequence[int]) -> int:
+    return sum(
+        b * rate // PRECISION * p // PRECISION for b, rate, p in zip(balances, rates, prices)
+    )
+
+
+def evaluate(
+    state: InitialState,
+    trades: List[tuple],
+    A: int,
+    fee: int,
+    ma_exp_time: Optional[int] = None,
+    prices: Optional[Sequence[int]] = None,
+) -> SweepResult:
+    """
+    Replay unpacked `trades` from `state` with a single parameter set.
+
+    @param A Amplification coefficient, without `A_PRECISION`
+    @param fee Pool fee with 1e10 precision
+    @param ma_exp_time EMA time constant of the oracle, None for pools without one
+    @param prices Coin prices in coin 0 with 1e18 precision, the peg by default
+    """
+    n_coins = len(state.balances)
+    assert ma_exp_time is None or n_coins == 2, "the oracle is only modelled for 2 coins"
+    if prices is None:
+        prices = [PRECISION] * n_coins
+
+    sim = PoolSimulator(
+        state.rates,
+        state.balances,
+        state.total_supply,
+        A * A_PRECISION,
+        fee,
+        admin_fee=state.admin_fee,
+        unrolled=state.unrolled,
+        ma_exp_time=ma_exp_time,
+        ma_last_time=state.timestamp,
+        timestamp=state.timestamp,
+    )
+    rates = state.rates
+    exchange = sim.exchange
+
+    total_volume = volume = executed = 0
+    deviation = max_deviation = 0.0
+    for timestamp, i, j, dx, min_dy in trades:
+        sim.timestamp = timestamp
+        amount = dx * rates[i] // PRECISION
+        total_volume += amount
+        try:
+            exchange(i, j, dx, min_dy)
+        except (Revert, ZeroDivisionError):
+            continue
+        volume += amount
+        executed += 1
+        if ma_exp_time is not None:
+            spot = sim.last_price
+            step_deviation = abs(sim.price_oracle() - spot) / spot
+            deviation += step_deviation
+            max_deviation = max(max_deviation, step_deviation)
+
+    initial_value = _value(state.balances, rates, prices)
+    has_oracle = ma_exp_time is not None
+    return SweepResult(
+        A=A,
+        fee=fee,
+        ma_exp_time=ma_exp_time,
+        lp_pnl=(_value(sim.balances, rates, prices) - initial_value) / initial_value,
+        volume=volume,
+        captured=volume / total_volume if total_volume else 0.0,
+        trades=executed,
+        oracle_deviation=deviation / executed if has_oracle and executed else None,
+        max_oracle_deviation=max_deviation if has_oracle and executed else None,
+        balances=tuple(sim.balances),
+    )
+
+
+# state of each worker process, set once by `_init_worker`
+_worker = {}
+
+
+def _init_worker(name: str, size: int, state: InitialState, prices):
+    memory = shared_memory.SharedMemory(name=name)
+    packed = np.ndarray((size,), dtype=TRADE_DTYPE, buffer=memory.buf)
+    _worker.update(trades=unpack_trades(packed), state=state, prices=prices)
+    del packed
+    memory.close()
+
+
+def _evaluate_point(point: tuple) -> SweepResult:
+    return evaluate(_worker["state"], _worker["trades"], *point, prices=_worker["prices"])
+
+
+def sweep(
+    state: InitialState,
+    tape: Iterable[tuple],
+    A: Iterable[int],
+    fee: Iterable[int],
+    ma_exp_time: Iterable[Optional[int]] = (None,),
+    prices: Optional[Sequence[int]] = None,
+    slippage: int = 0,
+    processes: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> List[SweepResult]:
+    """
+    Evaluate every combination of `A`, `fee` and `ma_exp_time` against `tape`.
+
+    Results are returned in grid order, `ma_exp_time` varying fastest. `processes`
+    defaults to the CPU count; with a single process the grid is evaluated in
+    this process.
+    """
+    points = list(product(A, fee, ma_exp_time))
+    packed = pack_trades(tape, slippage)
+    if processes == 1:
+        trades = unpack_trades(packed)
+        return [evaluate(state, trades, *point, prices=prices) for point in points]
+
+    memory = shared_memory.SharedMemory(create=True, size=max(packed.nbytes, 1))
+    try:
+        shared = np.ndarray(packed.shape, dtype=TRADE_DTYPE, buffer=memory.buf)
+        shared[:] = packed
+        del shared
+        initargs = (memory.name, len(packed), state, prices)
+        with Pool(processes, _init_worker, initargs) as pool:
+            return pool.map(_evaluate_point, points, chunksize)
+    finally:
+        memory.close()
+        memory.unlink()
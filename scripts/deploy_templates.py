@@ -5,7 +5,14 @@ Constants should be set here for substitution in the contracts.
 """
 from pathlib import Path
 
-from brownie import ZERO_ADDRESS, MetaBalances, MetaStandard, accounts, compile_source
+from brownie import (
+    ZERO_ADDRESS,
+    MetaBalances,
+    MetaBalancesSnapshot,
+    MetaStandard,
+    accounts,
+    compile_source,
+)
 
 DEPLOYER = accounts.at("0x7EeAC6CDdbd1D0B8aF061742D41877D7F707289a", force=True)
 
@@ -47,7 +54,7 @@ def main():
     with open("tmp/deployments.txt", "a") as f:
         f.write(f"Base Pool Templates - {BASE_POOL}\n")
 
-    for implementation in [MetaStandard, MetaBalances]:
+    for implementation in [MetaStandard, MetaBalances, MetaBalancesSnapshot]:
         source = implementation._build["source"]
         meta_impl = deploy_meta_implementation(source)
 
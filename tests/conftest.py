@@ -1,8 +1,11 @@
-from pathlib import Path
+import itertools
+import re
+from pathlib import Path, PurePosixPath
 
 import pytest
 from brownie._config import CONFIG
 from brownie.project.main import get_loaded_projects
+from xdist.scheduler import LoadScopeScheduling
 
 pytest_plugins = [
     "fixtures.accounts",
@@ -10,6 +13,7 @@ pytest_plugins = [
     "fixtures.constants",
     "fixtures.deployments",
     "fixtures.functions",
+    "fixtures.gas",
 ]
 
 pool_types = {
@@ -23,6 +27,65 @@ pool_types = {
 }
 return_types = {"revert": 0, "False": 1, "None": 2}
 
+# values assumed for parameters a test does not use
+PARAM_DEFAULTS = {
+    "plain_pool_size": 2,
+    "pool_type": 2,
+    "return_type": 0,
+    "decimals": 18,
+    "meta_implementation_idx": 0,
+}
+
+# (test paths, when, require) - for tests matching any of the paths and none of the
+# "!" prefixed ones (None for all tests), combinations matching `when` must match `require`
+PARAM_CONSTRAINTS = [
+    # optimized pool only supports return True/revert and precision == 18
+    (None, {"pool_type": [2]}, {"return_type": [0], "decimals": [18]}),
+    # meta pools we only test against 1 type no parameterization needed
+    (
+        None,
+        {"pool_type": [4, 5, 6]},
+        {"return_type": [0], "decimals": [18], "plain_pool_size": [2]},
+    ),
+    (None, {"pool_type": [0, 1, 2, 3]}, {"meta_implementation_idx": [0]}),
+    # zap tests only apply to the meta implementations
+    # and we only use the template zap DepositZap.vy
+    # all the zaps are essentially copies of this with
+    # constants set appropriately
+    (["tests/zaps/*.py"], {}, {"pool_type": [4, 5, 6]}),
+    (["tests/pools/rebase/*.py"], {}, {"pool_type": [3]}),
+    # the closed form, warm start and incremental EMA implementations are 2 coin variants
+    # of the basic and price pools
+    (
+        [
+            "tests/pools/closed_form/*.py",
+            "tests/pools/warm_start/*.py",
+            "tests/pools/incremental_ema/*.py",
+        ],
+        {},
+        {"pool_type": [0], "plain_pool_size": [2]},
+    ),
+    # the price implementations exist for every plain pool size
+    (["tests/pools/price/*.py"], {}, {"pool_type": [0]}),
+    # only allow meta pools in the meta directory
+    (["tests/pools/meta/*.py"], {}, {"pool_type": [4, 5, 6]}),
+    (["test_sidechain_rewards.py"], {}, {"pool_type": [6]}),
+    # gauge variant tests deploy a second optimized plain pool next to `swap`
+    (
+        ["tests/gauge/test_checkpoint_partial.py", "tests/gauge/test_reward_bitmap.py"],
+        {},
+        {"pool_type": [2], "plain_pool_size": [2]},
+    ),
+    # the off-chain gauge evaluator does not depend on the pool implementation
+    (["tests/gauge/test_offchain_gauge.py"], {}, {"pool_type": [2], "plain_pool_size": [2]}),
+    # factory independent tests in the root directory only run once
+    (
+        ["tests/*.py", "!tests/test_factory.py", "!tests/test_factory_packed.py"],
+        {},
+        {"pool_type": [2], "plain_pool_size": [2]},
+    ),
+]
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -49,131 +112,116 @@ def pytest_addoption(parser):
         default="18",
         help="comma-separated list of ERC20 token precisions to test against",
     )
+    parser.addoption(
+        "--gas-report",
+        action="store",
+        default=None,
+        help="path to write the gas benchmark results to, as CSV if it ends in .csv else JSON",
+    )
+    parser.addoption(
+        "--gas-threshold",
+        action="store",
+        type=float,
+        default=0.02,
+        help="allowed relative gas increase over the checked in baseline",
+    )
+    parser.addoption(
+        "--update-gas-baseline",
+        action="store_true",
+        default=False,
+        help="overwrite the checked in gas baseline with the benchmark results",
+    )
 
 
-def pytest_generate_tests(metafunc):
-    if "plain_pool_size" in metafunc.fixturenames:
-        cli_options = metafunc.config.getoption("plain_pool_size").split(",")
-        pool_sizes = [int(v) for v in cli_options]
-        metafunc.parametrize(
-            "plain_pool_size",
-            pool_sizes,
-            indirect=True,
-            ids=[f"(PoolSize={i})" for i in cli_options],
-        )
-    if "pool_type" in metafunc.fixturenames:
-        cli_options = metafunc.config.getoption("pool_type").split(",")
-        pool_type_ids = [pool_types[v] for v in cli_options]
-        metafunc.parametrize(
-            "pool_type",
-            pool_type_ids,
-            indirect=True,
-            ids=[f"(PoolType={i})" for i in cli_options],
-        )
-    if "return_type" in metafunc.fixturenames:
-        cli_options = metafunc.config.getoption("return_type").split(",")
-        return_type_ids = [return_types[v] for v in cli_options]
-        metafunc.parametrize(
-            "return_type",
-            return_type_ids,
-            indirect=True,
-            ids=[f"(ReturnType={i})" for i in cli_options],
-        )
-    if "decimals" in metafunc.fixturenames:
-        cli_options = metafunc.config.getoption("decimals").split(",")
-        metafunc.parametrize(
-            "decimals",
-            [int(i) for i in cli_options],
-            indirect=True,
-            ids=[f"(Decimals={i})" for i in cli_options],
-        )
-    if "meta_implementation_idx" in metafunc.fixturenames:
-        metafunc.parametrize(
-            "meta_implementation_idx",
-            [0, 1],
-            indirect=True,
-            ids=[f"(Meta-Implementation={i})" for i in ["Standard", "Rebase"]],
-        )
+def _param_values(config, argname):
+    # (value, id) pairs for each value of `argname` selected on the command line
+    if argname == "plain_pool_size":
+        options = config.getoption("plain_pool_size").split(",")
+        return [(int(i), f"(PoolSize={i})") for i in options]
+    if argname == "pool_type":
+        options = config.getoption("pool_type").split(",")
+        return [(pool_types[i], f"(PoolType={i})") for i in options]
+    if argname == "return_type":
+        options = config.getoption("return_type").split(",")
+        return [(return_types[i], f"(ReturnType={i})") for i in options]
+    if argname == "decimals":
+        options = config.getoption("decimals").split(",")
+        return [(int(i), f"(Decimals={i})") for i in options]
+    return [(0, "(Meta-Implementation=Standard)"), (1, "(Meta-Implementation=Rebase)")]
+
+
+def _matches(path, patterns):
+    if any(path.match(i[1:]) for i in patterns if i.startswith("!")):
+        return False
+    return any(path.match(i) for i in patterns if not i.startswith("!"))
+
+
+def _is_allowed(path, params):
+    for paths, when, require in PARAM_CONSTRAINTS:
+        if paths is not None and not _matches(path, paths):
+            continue
+        if any(params[k] not in v for k, v in when.items()):
+            continue
+        if any(params[k] not in v for k, v in require.items()):
+            return False
+    return True
 
 
-def pytest_collection_modifyitems(config, items):
+def pytest_generate_tests(metafunc):
+    argnames = [i for i in PARAM_DEFAULTS if i in metafunc.fixturenames]
+    if not argnames:
+        return
+
     project = get_loaded_projects()[0]
+    path = PurePosixPath(Path(metafunc.definition.fspath).relative_to(project._path).as_posix())
 
-    for item in items.copy():
-        path = Path(item.fspath).relative_to(project._path)
-        path_parts = path.parts[1:-1]
-        try:
-            params = item.callspec.params
-            pool_size = params.get("plain_pool_size", 2)
-            pool_type = params.get("pool_type", 2)
-            return_type = params.get("return_type", 0)
-            decimals = params.get("decimals", 18)
-            meta_implementation_idx = params.get("meta_implementation_idx", 0)
-        except Exception:
-            if path_parts == ():
-                if pool_type != 2:
-                    items.remove(item)
-                    continue
-
-        # optimized pool only supports return True/revert
-        if pool_type == 2 and return_type != 0:
-            items.remove(item)
-            continue
+    argvalues = []
+    ids = []
+    for combination in itertools.product(*[_param_values(metafunc.config, i) for i in argnames]):
+        params = dict(PARAM_DEFAULTS, **{k: v[0] for k, v in zip(argnames, combination)})
+        if _is_allowed(path, params):
+            argvalues.append(tuple(i[0] for i in combination))
+            ids.append("-".join(i[1] for i in combination))
 
-        # optimized pool only supports precision == 18
-        if pool_type == 2 and decimals != 18:
-            items.remove(item)
-            continue
+    metafunc.parametrize(argnames, argvalues, indirect=True, ids=ids)
+
+
+def _is_empty_parameter_set(item):
+    marker = item.get_closest_marker("skip")
+    return marker is not None and marker.kwargs.get("reason", "").startswith(
+        "got empty parameter set"
+    )
 
-        # meta pools we only test against 1 type no parameterization needed
-        if pool_type in [4, 5, 6]:
-            if decimals != 18:
-                items.remove(item)
-                continue
-
-            if return_type != 0:
-                items.remove(item)
-                continue
-
-            if pool_size > 2:
-                items.remove(item)
-                continue
-
-        else:
-            if meta_implementation_idx > 0:
-                items.remove(item)
-                continue
-
-            if "zaps" in path_parts:
-                # zap tests only apply to the meta implementations
-                # and we only use the template zap DepositZap.vy
-                # all the zaps are essentially copies of this with
-                # constants set appropriately
-                items.remove(item)
-                continue
-
-        if len(path_parts) > 1 and path_parts[1] == "rebase":
-            if pool_type != 3:
-                items.remove(item)
-                continue
-
-        # only allow meta pools in the meta directory
-        if len(path_parts) > 1 and path_parts[1] == "meta":
-            if pool_type not in [4, 5, 6]:
-                items.remove(item)
-                continue
-
-        if pool_type != 6 and "test_sidechain_rewards.py" in path.parts:
-            items.remove(item)
-            continue
 
-        if "test_factory.py" not in path.parts and len(path.parts) == 2:
-            if pool_type != 2 or pool_size != 2:
-                items.remove(item)
-                continue
+class PoolShardScheduling(LoadScopeScheduling):
+    """
+    Schedule every test of a (pool type, pool size) pair on the same xdist worker,
+    so the parametrized session fixtures deploy once per shard
+    """
 
-    # hacky magic to ensure the correct number of tests is shown in collection report
-    config.pluginmanager.get_plugin("terminalreporter")._numcollected = len(items)
+    def _split_scope(self, nodeid):
+        pool_type = re.search(r"\(PoolType=([^)]+)\)", nodeid)
+        pool_size = re.search(r"\(PoolSize=(\d+)\)", nodeid)
+        if pool_type is None and pool_size is None:
+            # unparametrized tests only share module level state
+            return nodeid.split("::", 1)[0]
+        # unparametrized values take the same defaults as in collection
+        pool_type = pool_type.group(1) if pool_type else "optimized"
+        pool_size = pool_size.group(1) if pool_size else "2"
+        return f"{pool_type}-{pool_size}"
+
+
+@pytest.hookimpl(optionalhook=True, tryfirst=True)
+def pytest_xdist_make_scheduler(config, log):
+    return PoolShardScheduling(config, log)
+
+
+def pytest_collection_modifyitems(config, items):
+    # tests without any allowed combination are generated as a single empty parameter set
+    deselected = [i for i in items if _is_empty_parameter_set(i)]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [i for i in items if not _is_empty_parameter_set(i)]
 
 
 @pytest.fixture(scope="session")
@@ -238,12 +286,19 @@ def is_forked():
 
 
 @pytest.fixture(scope="module", autouse=True)
-def mod_isolation(chain):
+def module_isolation(chain):
+    # overrides the brownie fixture, which resets the chain and with it the session
+    # deployments, xdist workers only run tests which request a fixture of this name
     chain.snapshot()
     yield
     chain.revert()
 
 
+@pytest.fixture(scope="module")
+def mod_isolation(module_isolation):
+    yield
+
+
 @pytest.fixture(autouse=True)
 def isolation(chain, history):
     start = len(history)
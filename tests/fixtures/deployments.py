@@ -1,12 +1,53 @@
+from functools import lru_cache
+
 import pytest
 from brownie import ZERO_ADDRESS, Contract, compile_source, convert
 from brownie.network import state
+from brownie.network.contract import ContractContainer
+from brownie.project import get_loaded_projects
 from hexbytes import HexBytes
 
-# keys are keccak256(source)
-# values are
+from brownie_hooks import artifact_path, compiler_version, load_artifact, store_artifact
+
+# keys are implementation addresses
+# values are their abis, used to load factory deployed metapools
 meta_contracts = {}
 
+# `compile_source` builds with its own defaults rather than the project settings
+COMPILE_SOURCE_SETTINGS = {"evm_version": None}
+
+
+@lru_cache(maxsize=None)
+def compile_cached(source):
+    """
+    `compile_source` backed by the artifact cache under build/cache, keyed on the
+    final source and the compiler its pragma selects, so fixtures substituting the
+    same addresses compile each contract once across sessions
+    """
+    build_json = load_artifact(source, COMPILE_SOURCE_SETTINGS)
+    if build_json is None:
+        container = compile_source(source, vyper_version=compiler_version(source)).Vyper
+        store_artifact(source, container._build, COMPILE_SOURCE_SETTINGS)
+        return container
+
+    # dev revert strings are read from the source, so it is restored to a real path
+    source_path = artifact_path(source, COMPILE_SOURCE_SETTINGS).with_suffix(".vy")
+    if not source_path.exists():
+        source_path.write_text(source)
+    paths = {build_json["sourcePath"]: str(source_path)}
+    build_json["sourcePath"] = str(source_path)
+    build_json["allSourcePaths"] = {
+        k: paths.get(v, v) for k, v in build_json["allSourcePaths"].items()
+    }
+    return ContractContainer(get_loaded_projects()[0], build_json)
+
+
+def deploy_meta_implementation(deployer, source):
+    container = compile_cached(source)
+    instance = container.deploy({"from": deployer})
+    meta_contracts[instance.address] = container.abi
+    return instance
+
 
 def pack_values(values) -> bytes:
     """Stolen from curvefi/curve-pool-registry"""
@@ -130,153 +171,68 @@ def _replace_usd(source, base_pool, base_coins, lp_token):
 
 
 @pytest.fixture(scope="session")
-def meta_btc(alice, MetaBTC, base_pool, base_coins, lp_token, pytestconfig):
-    meta_btc_abi = pytestconfig.cache.get("meta_btc_abi", False)
-    meta_btc_bytecode = pytestconfig.cache.get("meta_btc_bytecode", False)
-    if meta_btc_abi and meta_btc_bytecode:
-        tx = alice.transfer(data=meta_btc_bytecode)
-        instance = Contract.from_abi("Meta BTC", tx.contract_address, meta_btc_abi)
-        meta_contracts[tx.contract_address] = meta_btc_abi
-        return instance
+def meta_btc(alice, MetaBTC, base_pool, base_coins, lp_token):
+    source = _replace_btc(MetaBTC._build["source"], base_pool, base_coins, lp_token)
+    return deploy_meta_implementation(alice, source)
 
-    source = MetaBTC._build["source"]
-    new_source = _replace_btc(source, base_pool, base_coins, lp_token)
-    NewMetaBTC = compile_source(new_source).Vyper
-    instance = NewMetaBTC.deploy({"from": alice})
-    meta_contracts[instance.address] = NewMetaBTC.abi
 
-    pytestconfig.cache.set("meta_btc_abi", NewMetaBTC.abi)
-    pytestconfig.cache.set("meta_btc_bytecode", NewMetaBTC.bytecode)
-    return instance
+@pytest.fixture(scope="session")
+def meta_usd(alice, MetaUSD, base_pool, base_coins, lp_token):
+    source = _replace_usd(MetaUSD._build["source"], base_pool, base_coins, lp_token)
+    return deploy_meta_implementation(alice, source)
 
 
 @pytest.fixture(scope="session")
-def meta_usd(alice, MetaUSD, base_pool, base_coins, lp_token, pytestconfig):
-    meta_usd_abi = pytestconfig.cache.get("meta_usd_abi", False)
-    meta_usd_bytecode = pytestconfig.cache.get("meta_usd_bytecode", False)
-    if meta_usd_abi and meta_usd_bytecode:
-        tx = alice.transfer(data=meta_usd_bytecode)
-        instance = Contract.from_abi("Meta USD", tx.contract_address, meta_usd_abi)
-        meta_contracts[tx.contract_address] = meta_usd_abi
-        return instance
+def meta_btc_rebase(alice, MetaBTCBalances, base_pool, base_coins, lp_token):
+    source = _replace_btc(MetaBTCBalances._build["source"], base_pool, base_coins, lp_token)
+    return deploy_meta_implementation(alice, source)
 
-    source = MetaUSD._build["source"]
-    new_source = _replace_usd(source, base_pool, base_coins, lp_token)
-    NewMetaUSD = compile_source(new_source).Vyper
-    instance = NewMetaUSD.deploy({"from": alice})
-    meta_contracts[instance.address] = NewMetaUSD.abi
 
-    pytestconfig.cache.set("meta_usd_abi", NewMetaUSD.abi)
-    pytestconfig.cache.set("meta_usd_bytecode", NewMetaUSD.bytecode)
-    return instance
+@pytest.fixture(scope="session")
+def meta_usd_rebase(alice, MetaUSDBalances, base_pool, base_coins, lp_token):
+    source = _replace_usd(MetaUSDBalances._build["source"], base_pool, base_coins, lp_token)
+    return deploy_meta_implementation(alice, source)
 
 
 @pytest.fixture(scope="session")
-def meta_btc_rebase(alice, MetaBTCBalances, base_pool, base_coins, lp_token, pytestconfig):
-    meta_btc_rebase_abi = pytestconfig.cache.get("meta_btc_rebase_abi", False)
-    meta_btc_rebase_bytecode = pytestconfig.cache.get("meta_btc_rebase_bytecode", False)
-    if meta_btc_rebase_abi and meta_btc_rebase_bytecode:
-        tx = alice.transfer(data=meta_btc_rebase_bytecode)
-        instance = Contract.from_abi("Meta BTC Rebase", tx.contract_address, meta_btc_rebase_abi)
-        meta_contracts[tx.contract_address] = meta_btc_rebase_abi
-        return instance
+def meta_sidechain(alice, MetaStandard, base_gauge, base_pool, base_coins, lp_token):
+    source = MetaStandard._build["source"]
+    for repl in [base_pool, *base_coins, lp_token, base_gauge]:
+        source = source.replace(ZERO_ADDRESS, repl.address, 1)
 
-    source = MetaBTCBalances._build["source"]
-    new_source = _replace_btc(source, base_pool, base_coins, lp_token)
-    NewMetaBTCBalances = compile_source(new_source).Vyper
-    instance = NewMetaBTCBalances.deploy({"from": alice})
-    meta_contracts[instance.address] = NewMetaBTCBalances.abi
-
-    pytestconfig.cache.set("meta_btc_rebase_abi", NewMetaBTCBalances.abi)
-    pytestconfig.cache.set("meta_btc_rebase_bytecode", NewMetaBTCBalances.bytecode)
-    return instance
+    return deploy_meta_implementation(alice, source)
 
 
 @pytest.fixture(scope="session")
-def meta_usd_rebase(alice, MetaUSDBalances, base_pool, base_coins, lp_token, pytestconfig):
-    meta_usd_rebase_abi = pytestconfig.cache.get("meta_usd_rebase_abi", False)
-    meta_usd_rebase_bytecode = pytestconfig.cache.get("meta_usd_rebase_bytecode", False)
-    if meta_usd_rebase_abi and meta_usd_rebase_bytecode:
-        tx = alice.transfer(data=meta_usd_rebase_bytecode)
-        instance = Contract.from_abi("Meta USD Rebase", tx.contract_address, meta_usd_rebase_abi)
-        meta_contracts[tx.contract_address] = meta_usd_rebase_abi
-        return instance
-
-    source = MetaUSDBalances._build["source"]
-    new_source = _replace_usd(source, base_pool, base_coins, lp_token)
-    NewMetaUSDBalances = compile_source(new_source).Vyper
-    instance = NewMetaUSDBalances.deploy({"from": alice})
-    meta_contracts[instance.address] = NewMetaUSDBalances.abi
+def meta_sidechain_rebase(alice, MetaBalances, base_gauge, base_pool, base_coins, lp_token):
+    source = MetaBalances._build["source"]
+    for repl in [base_pool, *base_coins, lp_token, base_gauge]:
+        source = source.replace(ZERO_ADDRESS, repl.address, 1)
 
-    pytestconfig.cache.set("meta_usd_rebase_abi", NewMetaUSDBalances.abi)
-    pytestconfig.cache.set("meta_usd_rebase_bytecode", NewMetaUSDBalances.bytecode)
-    return instance
+    return deploy_meta_implementation(alice, source)
 
 
 @pytest.fixture(scope="session")
-def meta_sidechain(
-    alice,
-    MetaStandard,
-    base_gauge,
-    base_pool,
-    base_coins,
-    lp_token,
-    pytestconfig,
-):
-    meta_sidechain_abi = pytestconfig.cache.get("meta_sidechain_abi", False)
-    meta_sidechain_bytecode = pytestconfig.cache.get("meta_sidechain_bytecode", False)
-    if meta_sidechain_abi and meta_sidechain_bytecode:
-        tx = alice.transfer(data=meta_sidechain_bytecode)
-        instance = Contract.from_abi(
-            "MetaStandard Sidechain", tx.contract_address, meta_sidechain_abi
-        )
-        meta_contracts[tx.contract_address] = meta_sidechain_abi
-        return instance
-
-    source = MetaStandard._build["source"]
-    for repl in [base_pool, *base_coins, lp_token, base_gauge]:
-        source = source.replace(ZERO_ADDRESS, repl.address, 1)
+def meta_btc_rebase_snapshot(alice, MetaBTCBalancesSnapshot, base_pool, base_coins, lp_token):
+    source = _replace_btc(MetaBTCBalancesSnapshot._build["source"], base_pool, base_coins, lp_token)
+    return deploy_meta_implementation(alice, source)
 
-    NewMeta = compile_source(source).Vyper
-    instance = NewMeta.deploy({"from": alice})
-    meta_contracts[instance.address] = NewMeta.abi
 
-    pytestconfig.cache.set("meta_sidechain_abi", NewMeta.abi)
-    pytestconfig.cache.set("meta_sidechain_bytecode", NewMeta.bytecode)
-    return instance
+@pytest.fixture(scope="session")
+def meta_usd_rebase_snapshot(alice, MetaUSDBalancesSnapshot, base_pool, base_coins, lp_token):
+    source = _replace_usd(MetaUSDBalancesSnapshot._build["source"], base_pool, base_coins, lp_token)
+    return deploy_meta_implementation(alice, source)
 
 
 @pytest.fixture(scope="session")
-def meta_sidechain_rebase(
-    alice,
-    MetaBalances,
-    base_gauge,
-    base_pool,
-    base_coins,
-    lp_token,
-    pytestconfig,
+def meta_sidechain_rebase_snapshot(
+    alice, MetaBalancesSnapshot, base_gauge, base_pool, base_coins, lp_token
 ):
-    meta_sidechain_rebase_abi = pytestconfig.cache.get("meta_sidechain_rebase_abi", False)
-    meta_sidechain_rebase_bytecode = pytestconfig.cache.get("meta_sidechain_rebase_bytecode", False)
-    if meta_sidechain_rebase_abi and meta_sidechain_rebase_bytecode:
-        tx = alice.transfer(data=meta_sidechain_rebase_bytecode)
-        instance = Contract.from_abi(
-            "MetaBalances Sidechain", tx.contract_address, meta_sidechain_rebase_abi
-        )
-        meta_contracts[tx.contract_address] = meta_sidechain_rebase_abi
-        return instance
-
-    source = MetaBalances._build["source"]
+    source = MetaBalancesSnapshot._build["source"]
     for repl in [base_pool, *base_coins, lp_token, base_gauge]:
         source = source.replace(ZERO_ADDRESS, repl.address, 1)
 
-    NewMeta = compile_source(source).Vyper
-    instance = NewMeta.deploy({"from": alice})
-    meta_contracts[instance.address] = NewMeta.abi
-
-    pytestconfig.cache.set("meta_sidechain_rebase_abi", NewMeta.abi)
-    pytestconfig.cache.set("meta_sidechain_rebase_bytecode", NewMeta.bytecode)
-    return instance
+    return deploy_meta_implementation(alice, source)
 
 
 # gauge implementation
@@ -309,24 +265,31 @@ def minter(alice, crv, pm, gauge_controller):
 
 
 @pytest.fixture(scope="session")
-def gauge_implementation(
-    alice, LiquidityGauge, minter, crv, voting_escrow, gauge_controller, mock_veboost_proxy
+def deploy_gauge_implementation(
+    alice, minter, crv, voting_escrow, gauge_controller, mock_veboost_proxy
 ):
-    source = LiquidityGauge._build["source"]
-    old_addrs = [
-        "0xd061D61a4d941c39E5453435B6345Dc261C2fcE0",  # minter
-        "0xD533a949740bb3306d119CC777fa900bA034cd52",  # crv
-        "0x5f3b5DfEb7B28CDbD7FAba78963EE202a494e2A2",  # voting escrow
-        "0x2F50D538606Fa9EDD2B11E2446BEb18C9D5846bB",  # gauge controller
-        "0x8E0c00ed546602fD9927DF742bbAbF726D5B0d16",  # veboost proxy
-    ]
-    for old, new in zip(
-        old_addrs, [minter, crv, voting_escrow, gauge_controller, mock_veboost_proxy]
-    ):
-        source = source.replace(old, new.address)
+    def _deploy(container):
+        source = container._build["source"]
+        old_addrs = [
+            "0xd061D61a4d941c39E5453435B6345Dc261C2fcE0",  # minter
+            "0xD533a949740bb3306d119CC777fa900bA034cd52",  # crv
+            "0x5f3b5DfEb7B28CDbD7FAba78963EE202a494e2A2",  # voting escrow
+            "0x2F50D538606Fa9EDD2B11E2446BEb18C9D5846bB",  # gauge controller
+            "0x8E0c00ed546602fD9927DF742bbAbF726D5B0d16",  # veboost proxy
+        ]
+        for old, new in zip(
+            old_addrs, [minter, crv, voting_escrow, gauge_controller, mock_veboost_proxy]
+        ):
+            source = source.replace(old, new.address)
+
+        return compile_cached(source).deploy({"from": alice})
+
+    return _deploy
+
 
-    NewLiquidityGauge = compile_source(source).Vyper
-    return NewLiquidityGauge.deploy({"from": alice})
+@pytest.fixture(scope="session")
+def gauge_implementation(LiquidityGauge, deploy_gauge_implementation):
+    return deploy_gauge_implementation(LiquidityGauge)
 
 
 @pytest.fixture(scope="session")
@@ -351,18 +314,33 @@ def meta_implementations(
 
 
 @pytest.fixture(scope="session")
-def factory(alice, frank, Factory, address_provider, pytestconfig):
-    # if factory_bytecode := pytestconfig.cache.get("factory_bytecode", False):
-    #     tx = alice.transfer(data=factory_bytecode)
-    #     return Factory.at(tx.contract_address)
-
+def factory(alice, frank, Factory, address_provider):
     source = Factory._build["source"]
     new_source = source.replace(
         "0x0000000022D53366457F9d5E68Ec105046FC4383", address_provider.address
     )
-    NewFactory = compile_source(new_source).Vyper
-    # pytestconfig.cache.set("factory_bytecode", NewFactory.deploy.encode_input(frank))
-    return NewFactory.deploy(frank, {"from": alice})
+    return compile_cached(new_source).deploy(frank, {"from": alice})
+
+
+@pytest.fixture(scope="session")
+def factory_reader(alice, FactoryReader):
+    return FactoryReader.deploy({"from": alice})
+
+
+@pytest.fixture(scope="session")
+def deploy_factory(alice, frank, address_provider, factory):
+    """Deploy a fresh `container` factory, migrating existing pools from `factory`"""
+
+    def _deploy(container):
+        source = container._build["source"]
+        for old, new in [
+            ("0x0000000022D53366457F9d5E68Ec105046FC4383", address_provider),
+            ("0xB9fC157394Af804a3578134A6585C0dc9cc990d4", factory),
+        ]:
+            source = source.replace(old, new.address)
+        return compile_cached(source).deploy(frank, {"from": alice})
+
+    return _deploy
 
 
 # Mock contracts
@@ -432,6 +410,40 @@ def gauge(alice, factory, swap, LiquidityGauge, set_gauge_implementation):
     return LiquidityGauge.at(tx.return_value)
 
 
+@pytest.fixture(scope="module")
+def deploy_variant_gauge(
+    alice,
+    factory,
+    coins,
+    gauge,
+    project,
+    initial_amounts,
+    plain_implementations,
+    deploy_gauge_implementation,
+):
+    """
+    Deploy a gauge of implementation `container` on a new optimized plain pool,
+    with `gauge` already deployed so both implementations can be used side by side
+    """
+
+    def _deploy(container):
+        tx = factory.deploy_plain_pool(
+            "Variant Pool", "VP", coins + [ZERO_ADDRESS] * 2, 200, 4000000, 0, 2, {"from": alice}
+        )
+        pool = getattr(project, plain_implementations[2]._name).at(tx.return_value)
+        for coin, amount in zip(coins, initial_amounts):
+            coin._mint_for_testing(alice, amount, {"from": alice})
+            coin.approve(pool, 2 ** 256 - 1, {"from": alice})
+        pool.add_liquidity(initial_amounts, 0, {"from": alice})
+
+        implementation = deploy_gauge_implementation(container)
+        factory.set_gauge_implementation(implementation, {"from": alice})
+        tx = factory.deploy_gauge(pool, {"from": alice})
+        return container.at(tx.return_value)
+
+    return _deploy
+
+
 @pytest.fixture(scope="module")
 def zap(alice, base_coins, base_pool, lp_token, DepositZap):
     source = DepositZap._build["source"]
@@ -446,4 +458,9 @@ def zap(alice, base_coins, base_pool, lp_token, DepositZap):
     for token in [base_pool, lp_token]:
         source = source.replace(f"= {ZERO_ADDRESS}", f"= {token.address}", 1)
 
-    return compile_source(source).Vyper.deploy({"from": alice})
+    return compile_cached(source).deploy({"from": alice})
+
+
+@pytest.fixture(scope="module")
+def zap_multi(alice, factory, DepositZapMulti):
+    return DepositZapMulti.deploy(factory, {"from": alice})
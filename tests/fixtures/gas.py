@@ -0,0 +1,116 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+BASELINE_PATH = Path(__file__).parent.parent.joinpath("pools/gas/baseline.json")
+REPORT_FIELDS = ["key", "implementation", "function", "scenario", "gas_used", "baseline"]
+
+PLAIN_IMPLEMENTATIONS = ["Basic", "ETH", "Optimized", "Balances"]
+META_IMPLEMENTATIONS = {
+    4: ["MetaUSD", "MetaUSDBalances"],
+    5: ["MetaBTC", "MetaBTCBalances"],
+    6: ["MetaStandard", "MetaBalances"],
+}
+RETURN_TYPES = ["revert", "False", "None"]
+
+# keys are `gas_key` values, collected over the session and written out on exit
+gas_records = {}
+
+
+def gas_key(implementation, return_type, decimals, function, scenario):
+    precisions = "/".join(str(i) for i in decimals)
+    return f"{implementation}[{RETURN_TYPES[return_type]},{precisions}]::{function}::{scenario}"
+
+
+def _load_baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    with BASELINE_PATH.open() as fp:
+        return json.load(fp)
+
+
+def _write_report(path, records):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rows = [records[key] for key in sorted(records)]
+    if path.suffix == ".csv":
+        with path.open("w", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with path.open("w") as fp:
+            json.dump(rows, fp, indent=2)
+
+
+def pytest_sessionfinish(session):
+    worker_path = Path(str(session.config.cache.makedir("gas_records")))
+    if hasattr(session.config, "workerinput"):
+        # xdist workers hand their records to the controller, which writes the report
+        if gas_records:
+            worker_id = session.config.workerinput["workerid"]
+            with worker_path.joinpath(f"{worker_id}.json").open("w") as fp:
+                json.dump(gas_records, fp)
+        return
+
+    for path in worker_path.glob("*.json"):
+        with path.open() as fp:
+            gas_records.update(json.load(fp))
+        path.unlink()
+
+    if not gas_records:
+        return
+
+    report_path = session.config.getoption("gas_report")
+    if report_path:
+        _write_report(report_path, gas_records)
+
+    if session.config.getoption("update_gas_baseline"):
+        baseline = _load_baseline()
+        baseline.update({key: record["gas_used"] for key, record in gas_records.items()})
+        with BASELINE_PATH.open("w") as fp:
+            json.dump(dict(sorted(baseline.items())), fp, indent=2)
+            fp.write("\n")
+
+
+@pytest.fixture(scope="session")
+def gas_baseline():
+    return _load_baseline()
+
+
+@pytest.fixture(scope="session")
+def implementation_name(plain_pool_size, pool_type, is_meta_pool, meta_implementation_idx):
+    if is_meta_pool:
+        return META_IMPLEMENTATIONS[pool_type][meta_implementation_idx]
+    return f"Plain{plain_pool_size}{PLAIN_IMPLEMENTATIONS[pool_type]}"
+
+
+@pytest.fixture
+def record_gas(pytestconfig, gas_baseline, return_type, decimals):
+    """
+    Record the gas used by `tx`, failing when it exceeds the checked in baseline
+    by more than `--gas-threshold` or has no baseline entry
+    """
+
+    def _record(implementation, function, scenario, tx):
+        key = gas_key(implementation, return_type, decimals, function, scenario)
+        baseline = gas_baseline.get(key)
+        gas_records[key] = {
+            "key": key,
+            "implementation": implementation,
+            "function": function,
+            "scenario": scenario,
+            "gas_used": tx.gas_used,
+            "baseline": baseline,
+        }
+
+        if pytestconfig.getoption("update_gas_baseline"):
+            return
+        # an unchecked record would let a regression through unnoticed
+        assert baseline is not None, f"{key}: no gas baseline, run with --update-gas-baseline"
+        limit = int(baseline * (1 + pytestconfig.getoption("gas_threshold")))
+        assert tx.gas_used <= limit, f"{key}: {tx.gas_used} gas exceeds baseline {baseline}"
+
+    return _record
@@ -0,0 +1,100 @@
+import math
+
+import brownie
+import pytest
+
+WEEK = 7 * 86400
+
+
+@pytest.fixture(scope="module")
+def resumable_gauge(deploy_variant_gauge, LiquidityGaugeResumable):
+    return deploy_variant_gauge(LiquidityGaugeResumable)
+
+
+@pytest.fixture(autouse=True)
+def setup(add_initial_liquidity, alice, swap, gauge, resumable_gauge, gauge_controller):
+    gauge_controller.add_type(b"Liquidity", 10 ** 10, {"from": alice})
+    for contract in [gauge, resumable_gauge]:
+        gauge_controller.add_gauge(contract, 0, 10 ** 18, {"from": alice})
+        lp_token = brownie.Contract.from_abi("LP", contract.lp_token(), swap.abi)
+        lp_token.approve(contract, 2 ** 256 - 1, {"from": alice})
+        contract.deposit(10 ** 21, {"from": alice})
+
+
+@pytest.mark.parametrize("idle_weeks", [1, 3, 10])
+def test_partial_matches_full(alice, chain, gauge, resumable_gauge, idle_weeks):
+    chain.sleep(idle_weeks * WEEK)
+    chain.mine()
+    for _ in range(idle_weeks + 1):
+        tx = resumable_gauge.checkpoint_partial(2, {"from": alice})
+        if tx.return_value == tx.timestamp:
+            break
+
+    for contract in [gauge, resumable_gauge]:
+        contract.user_checkpoint(alice, {"from": alice})
+
+    # both gauges carry the same weight and supply, only a few seconds apart
+    expected = gauge.integrate_fraction(alice)
+    assert expected > 0
+    assert math.isclose(resumable_gauge.integrate_fraction(alice), expected, rel_tol=1e-4)
+
+
+def test_partial_stops_on_week_boundary(alice, chain, resumable_gauge):
+    start = resumable_gauge.integrate_checkpoint()
+    chain.sleep(10 * WEEK)
+
+    end = resumable_gauge.checkpoint_partial(3, {"from": alice}).return_value
+    assert end == (start // WEEK + 3) * WEEK
+    assert resumable_gauge.integrate_checkpoint() == end
+
+    tx = resumable_gauge.checkpoint_partial(500, {"from": alice})
+    assert tx.return_value == tx.timestamp
+    assert resumable_gauge.integrate_checkpoint() == tx.timestamp
+
+
+@pytest.mark.parametrize("max_weeks", [0, 501])
+def test_partial_invalid_weeks(alice, resumable_gauge, max_weeks):
+    with brownie.reverts("dev: invalid number of weeks"):
+        resumable_gauge.checkpoint_partial(max_weeks, {"from": alice})
+
+
+def test_cached_weight(alice, chain, gauge_controller, resumable_gauge):
+    chain.sleep(2 * WEEK)
+    tx = resumable_gauge.user_checkpoint(alice, {"from": alice})
+    week_start = tx.timestamp // WEEK * WEEK
+
+    cached_weight = resumable_gauge.cached_weight()
+    assert cached_weight >> 128 == week_start
+    assert cached_weight % 2 ** 128 == gauge_controller.gauge_relative_weight(
+        resumable_gauge, week_start
+    )
+
+    # later checkpoints within the same week read the weight from the cache
+    chain.sleep(60)
+    tx = resumable_gauge.user_checkpoint(alice, {"from": alice})
+    assert gauge_controller.address not in [i["to"] for i in tx.subcalls]
+
+
+@pytest.mark.parametrize("idle_weeks", [1, 10, 52, 200])
+def test_gas_idle_weeks(
+    alice, chain, gauge, resumable_gauge, gauge_controller, idle_weeks, record_gas
+):
+    chain.sleep(idle_weeks * WEEK)
+    # keep the catch up of the gauge controller itself out of the measurements
+    for contract in [gauge, resumable_gauge]:
+        gauge_controller.checkpoint_gauge(contract, {"from": alice})
+
+    scenario = f"{idle_weeks}-idle-weeks"
+    tx = gauge.user_checkpoint(alice, {"from": alice})
+    record_gas("LiquidityGauge", "user_checkpoint", scenario, tx)
+    full = resumable_gauge.user_checkpoint(alice, {"from": alice})
+    record_gas("LiquidityGaugeResumable", "user_checkpoint", scenario, full)
+    chain.undo()
+
+    tx = resumable_gauge.checkpoint_partial(idle_weeks, {"from": alice})
+    record_gas("LiquidityGaugeResumable", "checkpoint_partial", scenario, tx)
+    resumed = resumable_gauge.user_checkpoint(alice, {"from": alice})
+    record_gas("LiquidityGaugeResumable", "user_checkpoint", f"{scenario}-after-partial", resumed)
+
+    if idle_weeks > 1:
+        assert resumed.gas_used < full.gas_used
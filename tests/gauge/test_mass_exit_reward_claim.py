@@ -1,6 +1,8 @@
 import math
 
+import brownie
 import pytest
+from brownie import ETH_ADDRESS, ZERO_ADDRESS, Contract
 
 REWARD = 10 ** 20
 WEEK = 7 * 86400
@@ -47,3 +49,199 @@ def test_mass_withdraw_claim_rewards(accounts, gauge, coin_reward):
     for account in accounts[:10]:
         gauge.claim_rewards({"from": account})
         assert math.isclose(coin_reward.balanceOf(account), REWARD / 10)
+
+
+@pytest.fixture(scope="module")
+def claimer(alice, GaugeBatchClaimer, RewardForwarder):
+    implementation = RewardForwarder.deploy({"from": alice})
+    return GaugeBatchClaimer.deploy(implementation, {"from": alice})
+
+
+@pytest.fixture
+def opt_in(claimer, RewardForwarder):
+    def _opt_in(gauges, account, receiver=None):
+        receiver = receiver or account
+        if claimer.forwarders(receiver) == ZERO_ADDRESS:
+            claimer.deploy_forwarder(receiver, {"from": account})
+        forwarder = RewardForwarder.at(claimer.forwarders(receiver))
+        for gauge in gauges:
+            gauge.set_rewards_receiver(forwarder, {"from": account})
+        return forwarder
+
+    return _opt_in
+
+
+@pytest.fixture
+def extra_gauges(
+    alice,
+    accounts,
+    chain,
+    factory,
+    base_pool,
+    coins,
+    swap,
+    coin_reward,
+    gauge_controller,
+    initial_amounts,
+    plain_pool_size,
+    pool_type,
+    is_meta_pool,
+    meta_implementation_idx,
+    eth_amount,
+    LiquidityGauge,
+):
+    gauges = []
+    for i in range(2):
+        if is_meta_pool:
+            tx = factory.deploy_metapool(
+                base_pool,
+                f"Extra {i}",
+                f"EX{i}",
+                coins[0],
+                200,
+                4000000,
+                meta_implementation_idx,
+                {"from": alice},
+            )
+        else:
+            tx = factory.deploy_plain_pool(
+                f"Extra {i}",
+                f"EX{i}",
+                coins + [ZERO_ADDRESS] * (4 - plain_pool_size),
+                200,
+                4000000,
+                0,
+                pool_type,
+                {"from": alice},
+            )
+        pool = Contract.from_abi("Extra Pool", tx.return_value, swap.abi)
+        for coin, amount in zip(coins, initial_amounts):
+            if coin != ETH_ADDRESS:
+                coin._mint_for_testing(alice, amount, {"from": alice})
+                coin.approve(pool, 2 ** 256 - 1, {"from": alice})
+        pool.add_liquidity(
+            initial_amounts, 0, {"from": alice, "value": eth_amount(initial_amounts[0])}
+        )
+
+        gauge = LiquidityGauge.at(factory.deploy_gauge(pool, {"from": alice}).return_value)
+        gauge_controller.add_gauge(gauge, 0, 0, {"from": alice})
+        pool.approve(gauge, 2 ** 256 - 1, {"from": alice})
+        gauge.deposit(10 ** 18, accounts[0], {"from": alice})
+
+        gauge.add_reward(coin_reward, alice, {"from": alice})
+        coin_reward._mint_for_testing(alice, REWARD, {"from": alice})
+        coin_reward.approve(gauge, 2 ** 256 - 1, {"from": alice})
+        gauge.deposit_reward_token(coin_reward, REWARD, {"from": alice})
+        gauges.append(gauge)
+
+    chain.sleep(WEEK)
+    return gauges
+
+
+def _transfers_from(tx, token, senders):
+    senders = [i.address for i in senders]
+    return [i for i in tx.events["Transfer"] if i.address == token and i.values()[0] in senders]
+
+
+def test_batch_claim_for_users(accounts, gauge, claimer, coin_reward, opt_in, record_gas):
+    forwarders = [opt_in([gauge], account) for account in accounts[:10]]
+
+    tx = claimer.claim_for_users(gauge, accounts[:10] + [ZERO_ADDRESS] * 22, {"from": accounts[0]})
+    record_gas("GaugeBatchClaimer", "claim_for_users", "10-users", tx)
+
+    for account, forwarder in zip(accounts[:10], forwarders):
+        assert math.isclose(coin_reward.balanceOf(account), REWARD / 10)
+        assert coin_reward.balanceOf(forwarder) == 0
+    assert len(_transfers_from(tx, coin_reward, forwarders)) == 10
+
+
+def test_batch_claim_shared_receiver(accounts, gauge, claimer, coin_reward, opt_in):
+    receiver = accounts[10]
+    for account in accounts[:10]:
+        forwarder = opt_in([gauge], account, receiver)
+
+    tx = claimer.claim_for_users(gauge, accounts[:10] + [ZERO_ADDRESS] * 22, {"from": accounts[0]})
+
+    assert math.isclose(coin_reward.balanceOf(receiver), REWARD)
+    assert coin_reward.balanceOf(forwarder) == 0
+    # the rewards of every user are forwarded to the shared receiver at once
+    assert len(_transfers_from(tx, coin_reward, [forwarder])) == 1
+
+
+def test_batch_claim_not_opted_in(accounts, gauge, claimer, coin_reward):
+    claimer.claim_for_users(gauge, accounts[:10] + [ZERO_ADDRESS] * 22, {"from": accounts[0]})
+
+    # claims for users without a forwarder are transferred to them by the gauge
+    for account in accounts[:10]:
+        assert math.isclose(coin_reward.balanceOf(account), REWARD / 10)
+
+
+def test_batch_claim_many_gauges(
+    accounts, chain, gauge, extra_gauges, claimer, coin_reward, opt_in, record_gas
+):
+    gauges = [gauge] + extra_gauges
+    account = accounts[0]
+
+    separate = 0
+    for i, contract in enumerate(gauges):
+        tx = contract.claim_rewards({"from": account})
+        record_gas("LiquidityGauge", "claim_rewards", f"gauge-{i}", tx)
+        separate += tx.gas_used
+    expected = coin_reward.balanceOf(account)
+    chain.undo(len(gauges))
+
+    # without a forwarder each gauge pays the user within the batch
+    direct_tx = claimer.claim_many(gauges + [ZERO_ADDRESS] * 29, {"from": account})
+    record_gas("GaugeBatchClaimer", "claim_many", f"{len(gauges)}-gauges-direct", direct_tx)
+    assert math.isclose(coin_reward.balanceOf(account), expected)
+    chain.undo()
+
+    forwarder = opt_in(gauges, account)
+    tx = claimer.claim_many(gauges + [ZERO_ADDRESS] * 29, {"from": account})
+    record_gas("GaugeBatchClaimer", "claim_many", f"{len(gauges)}-gauges", tx)
+
+    assert coin_reward.balanceOf(account) == expected
+    assert math.isclose(expected, REWARD / 10 + 2 * REWARD)
+    assert len(_transfers_from(tx, coin_reward, [forwarder])) == 1
+    # the transactions saved outweigh the transfer the forwarder adds per reward token
+    assert tx.gas_used < separate
+    assert direct_tx.gas_used < tx.gas_used
+
+
+def test_batch_claim_unknown_gauge(accounts, claimer, swap):
+    with brownie.reverts():
+        claimer.claim_many([swap] + [ZERO_ADDRESS] * 31, {"from": accounts[0]})
+
+
+def test_direct_claim_forwarded(bob, chain, accounts, gauge, claimer, coin_reward, opt_in):
+    account = accounts[1]
+    forwarder = opt_in([gauge], account)
+    # claimed directly on the gauge by a third party, outside of any batch
+    gauge.claim_rewards(account, {"from": bob})
+    amount = coin_reward.balanceOf(forwarder)
+    assert amount > 0
+
+    # forwarded with the next batch, along with the rewards accrued since
+    chain.sleep(3600)
+    claimer.claim_many([gauge] + [ZERO_ADDRESS] * 31, account, {"from": bob})
+    assert coin_reward.balanceOf(account) > amount
+    assert coin_reward.balanceOf(forwarder) == 0
+
+
+def test_direct_forward(bob, accounts, gauge, coin_reward, opt_in):
+    account = accounts[1]
+    forwarder = opt_in([gauge], account)
+    gauge.claim_rewards(account, {"from": bob})
+    amount = coin_reward.balanceOf(forwarder)
+
+    # the balance only belongs to the receiver, so anyone can forward it
+    tx = forwarder.forward(coin_reward, {"from": bob})
+    assert tx.return_value == amount
+    assert coin_reward.balanceOf(account) == amount
+    assert coin_reward.balanceOf(forwarder) == 0
+
+
+def test_deploy_forwarder_twice(alice, bob, claimer):
+    claimer.deploy_forwarder(alice, {"from": bob})
+    with brownie.reverts("dev: forwarder exists"):
+        claimer.deploy_forwarder({"from": alice})
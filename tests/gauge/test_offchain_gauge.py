@@ -0,0 +1,152 @@
+import pytest
+from brownie_tokens import ERC20
+
+from offchain.gauge import GaugeLedger, GaugeReader, evaluate
+from offchain.indexer import receipt_logs
+
+REWARD = 10 ** 20
+WEEK = 7 * 86400
+YEAR = 86400 * 365
+
+
+@pytest.fixture(scope="module")
+def reward_tokens(coin_reward):
+    return [coin_reward, ERC20()]
+
+
+@pytest.fixture(autouse=True)
+def start_block(
+    add_initial_liquidity, chain, alice, accounts, swap, gauge, gauge_controller, reward_tokens
+):
+    start = chain.height + 1
+    gauge_controller.add_type(b"Liquidity", 10 ** 10, {"from": alice})
+    gauge_controller.add_gauge(gauge, 0, 10 ** 18, {"from": alice})
+
+    swap.approve(gauge, 2 ** 256 - 1, {"from": alice})
+    for i, account in enumerate(accounts[:5]):
+        gauge.deposit(10 ** 20 * (i + 1), account, {"from": alice})
+    # gauge weights apply from the week after the gauge is added
+    chain.sleep(WEEK)
+
+    for amount, token in zip([REWARD, REWARD // 3], reward_tokens):
+        gauge.add_reward(token, alice, {"from": alice})
+        token._mint_for_testing(alice, amount, {"from": alice})
+        token.approve(gauge, 2 ** 256 - 1, {"from": alice})
+        gauge.deposit_reward_token(token, amount, {"from": alice})
+
+    return start
+
+
+@pytest.fixture(autouse=True)
+def activity(start_block, chain, accounts, gauge, minter):
+    chain.sleep(WEEK // 2)
+    # leaves claimable rewards stored in `claim_data` for both accounts
+    gauge.transfer(accounts[1], 10 ** 19, {"from": accounts[0]})
+    gauge.claim_rewards({"from": accounts[2]})
+    minter.mint(gauge, {"from": accounts[3]})
+    gauge.withdraw(10 ** 20, {"from": accounts[4]})
+
+
+@pytest.fixture
+def reader(gauge, gauge_controller, crv, minter, web3):
+    def read_storage(address, slot, block):
+        return int.from_bytes(web3.eth.get_storage_at(address, slot, block), "big")
+
+    return GaugeReader(gauge, gauge_controller, crv, minter, read_storage)
+
+
+@pytest.fixture
+def build_ledger(chain, gauge, start_block):
+    def _build_ledger(block):
+        ledger = GaugeLedger(gauge.address)
+        for number in range(start_block, block + 1):
+            for txid in chain[number].transactions:
+                tx = chain.get_transaction(txid.hex())
+                ledger.ingest(receipt_logs(tx, chain[number].timestamp))
+        return ledger
+
+    return _build_ledger
+
+
+@pytest.fixture
+def snapshot(build_ledger, reader):
+    def _snapshot(block, timestamp):
+        ledger = build_ledger(block)
+        table = reader.user_table(ledger, block)
+        return table.users, evaluate(reader.gauge_state(ledger, block, timestamp), table)
+
+    return _snapshot
+
+
+def _row(users, account):
+    return users.index(account.address.lower())
+
+
+def test_ledger_matches_storage(chain, accounts, gauge, build_ledger):
+    ledger = build_ledger(chain.height)
+
+    assert ledger.users == sorted(i.address.lower() for i in accounts[:5])
+    for account in accounts[:5]:
+        assert ledger.balances[account.address.lower()] == gauge.balanceOf(account)
+        assert ledger.working_balances[account.address.lower()] == gauge.working_balances(account)
+    assert ledger.total_supply == gauge.totalSupply()
+    assert ledger.working_supply == gauge.working_supply()
+
+
+def test_claim_data_slot(chain, accounts, gauge, reward_tokens, reader):
+    for account in accounts[:5]:
+        for token in reward_tokens:
+            claim_data = reader.claim_data(account.address.lower(), token.address.lower(), "latest")
+            assert claim_data % 2 ** 128 == gauge.claimed_reward(account, token)
+
+    assert gauge.claimed_reward(accounts[2], reward_tokens[0]) > 0
+    token = reward_tokens[0].address.lower()
+    for account in accounts[:2]:
+        assert reader.claim_data(account.address.lower(), token, "latest") >> 128 > 0
+
+
+@pytest.mark.parametrize("sleep", [3600, 3 * WEEK])
+def test_claimable_reward(alice, chain, accounts, gauge, reward_tokens, snapshot, sleep):
+    chain.sleep(sleep)
+    chain.mine()
+
+    for account in accounts[:5]:
+        for i, token in enumerate(reward_tokens):
+            block = chain.height
+            tx = gauge.claimable_reward.transact(account, token, {"from": alice})
+            users, result = snapshot(block, tx.timestamp)
+            assert result.claimable_reward[_row(users, account), i] == tx.return_value
+
+
+@pytest.mark.parametrize("sleep", [3600, 3 * WEEK, int(YEAR * 1.1)])
+def test_claimable_tokens(alice, chain, accounts, gauge, snapshot, sleep):
+    chain.sleep(sleep)
+    chain.mine()
+
+    for account in accounts[:5]:
+        block = chain.height
+        tx = gauge.claimable_tokens(account, {"from": alice})
+        users, result = snapshot(block, tx.timestamp)
+        assert tx.return_value > 0
+        assert result.claimable_tokens[_row(users, account)] == tx.return_value
+        chain.undo()
+
+
+def test_checkpoint_values(alice, chain, accounts, gauge, reward_tokens, snapshot):
+    chain.sleep(WEEK)
+    chain.mine()
+    account = accounts[1]
+
+    block = chain.height
+    tx = gauge.claim_rewards(account, {"from": alice})
+    users, result = snapshot(block, tx.timestamp)
+    idx = _row(users, account)
+    for i, token in enumerate(reward_tokens):
+        assert result.reward_integral[i] == gauge.reward_data(token)["integral"]
+        assert result.reward_integral_for[idx, i] == gauge.reward_integral_for(token, account)
+
+    block = chain.height
+    tx = gauge.user_checkpoint(account, {"from": account})
+    users, result = snapshot(block, tx.timestamp)
+    assert result.integrate_inv_supply == gauge.integrate_inv_supply(gauge.period())
+    assert result.integrate_fraction[idx] == gauge.integrate_fraction(account)
@@ -0,0 +1,96 @@
+import math
+
+import brownie
+import pytest
+from brownie_tokens import ERC20
+
+REWARD = 10 ** 20
+WEEK = 7 * 86400
+
+
+@pytest.fixture(scope="module")
+def bitmap_gauge(deploy_variant_gauge, LiquidityGaugeRewardBitmap):
+    return deploy_variant_gauge(LiquidityGaugeRewardBitmap)
+
+
+@pytest.fixture(scope="module")
+def reward_tokens():
+    return [ERC20() for _ in range(8)]
+
+
+@pytest.fixture(scope="module")
+def gauges(gauge, bitmap_gauge):
+    return {"LiquidityGauge": gauge, "LiquidityGaugeRewardBitmap": bitmap_gauge}
+
+
+@pytest.fixture(autouse=True)
+def setup(add_initial_liquidity, alice, bob, swap, gauges, reward_tokens):
+    for contract in gauges.values():
+        lp_token = brownie.Contract.from_abi("LP", contract.lp_token(), swap.abi)
+        lp_token.approve(contract, 2 ** 256 - 1, {"from": alice})
+        for account in [alice, bob]:
+            contract.deposit(10 ** 21, account, {"from": alice})
+        # every reward slot is in use, only the first `n_active` tokens are ever funded
+        for token in reward_tokens:
+            contract.add_reward(token, alice, {"from": alice})
+
+
+def _fund(alice, chain, gauges, reward_tokens, n_active):
+    for contract in gauges.values():
+        for token in reward_tokens[:n_active]:
+            token._mint_for_testing(alice, REWARD, {"from": alice})
+            token.approve(contract, 2 ** 256 - 1, {"from": alice})
+            contract.deposit_reward_token(token, REWARD, {"from": alice})
+    chain.sleep(WEEK // 2)
+
+
+def test_claimed_rewards_match(alice, bob, chain, gauges, reward_tokens):
+    _fund(alice, chain, gauges, reward_tokens, 4)
+    claimed = {}
+    for name, contract in gauges.items():
+        contract.claim_rewards({"from": bob})
+        claimed[name] = [contract.claimed_reward(bob, token) for token in reward_tokens]
+
+    assert claimed["LiquidityGaugeRewardBitmap"][4:] == [0] * 4
+    for expected, amount in zip(claimed["LiquidityGauge"], claimed["LiquidityGaugeRewardBitmap"]):
+        assert math.isclose(amount, expected, rel_tol=1e-4)
+
+
+def test_pending_rewards(alice, bob, chain, bitmap_gauge, gauges, reward_tokens):
+    _fund(alice, chain, gauges, reward_tokens, 3)
+    assert bitmap_gauge.pending_rewards(alice) == 0
+
+    # checkpoints without claiming record the pending tokens
+    bitmap_gauge.transfer(bob, 10 ** 18, {"from": alice})
+    assert bitmap_gauge.pending_rewards(alice) == 0b111
+    assert bitmap_gauge.pending_rewards(bob) == 0b111
+    for token in reward_tokens[3:]:
+        assert bitmap_gauge.claimable_reward(alice, token) == 0
+
+    bitmap_gauge.claim_rewards({"from": alice})
+    assert bitmap_gauge.pending_rewards(alice) == 0
+    assert bitmap_gauge.pending_rewards(bob) == 0b111
+    for token in reward_tokens[:3]:
+        assert token.balanceOf(alice) == bitmap_gauge.claimed_reward(alice, token) > 0
+
+
+@pytest.mark.parametrize("n_active", [1, 4, 8])
+@pytest.mark.parametrize("function", ["deposit", "withdraw", "transfer", "claim_rewards"])
+def test_gas(alice, bob, chain, gauges, reward_tokens, n_active, function, record_gas):
+    _fund(alice, chain, gauges, reward_tokens, n_active)
+
+    gas_used = {}
+    for name, contract in gauges.items():
+        if function == "deposit":
+            tx = contract.deposit(10 ** 18, bob, {"from": alice})
+        elif function == "withdraw":
+            tx = contract.withdraw(10 ** 18, {"from": bob})
+        elif function == "transfer":
+            tx = contract.transfer(alice, 10 ** 18, {"from": bob})
+        else:
+            tx = contract.claim_rewards({"from": bob})
+        gas_used[name] = tx.gas_used
+        record_gas(name, function, f"{n_active}-active-rewards", tx)
+
+    if n_active < 8:
+        assert gas_used["LiquidityGaugeRewardBitmap"] < gas_used["LiquidityGauge"]
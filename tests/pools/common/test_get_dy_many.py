@@ -0,0 +1,49 @@
+import pytest
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity")
+
+MAX_QUOTES = 32
+
+
+def _pad(amounts):
+    return amounts + [0] * (MAX_QUOTES - len(amounts))
+
+
+@pytest.mark.parametrize("sending,receiving", [(0, 1), (1, 0)])
+def test_get_dy_many(swap, decimals, sending, receiving):
+    amounts = [10 ** decimals[sending] * i for i in (1, 10, 1_000, 100_000, 500_000)]
+    expected = [swap.get_dy(sending, receiving, amount) for amount in amounts]
+
+    quotes = swap.get_dy_many(sending, receiving, _pad(amounts))
+
+    for quote, amount in zip(quotes, expected):
+        assert abs(quote - amount) <= 1
+    assert quotes[len(amounts) :] == [0] * (MAX_QUOTES - len(amounts))
+
+
+def test_get_dy_many_descending(swap, decimals):
+    amounts = [10 ** decimals[0] * i for i in (500_000, 1_000, 1)]
+    expected = [swap.get_dy(0, 1, amount) for amount in amounts]
+
+    assert swap.get_dy_many(0, 1, _pad(amounts))[: len(amounts)] == expected
+
+
+@pytest.mark.parametrize("idx", range(2))
+def test_calc_withdraw_one_coin_many(alice, swap, idx):
+    balance = swap.balanceOf(alice)
+    amounts = [10 ** 18, 10 ** 21, balance // 10, balance // 3, balance // 2]
+    expected = [swap.calc_withdraw_one_coin(amount, idx) for amount in amounts]
+
+    quotes = swap.calc_withdraw_one_coin_many(_pad(amounts), idx)
+
+    for quote, amount in zip(quotes, expected):
+        assert abs(quote - amount) <= 1
+    assert quotes[len(amounts) :] == [0] * (MAX_QUOTES - len(amounts))
+
+
+def test_calc_withdraw_one_coin_many_descending(alice, swap):
+    balance = swap.balanceOf(alice)
+    amounts = [balance // 2, balance // 10, 10 ** 18]
+    expected = [swap.calc_withdraw_one_coin(amount, 0) for amount in amounts]
+
+    assert swap.calc_withdraw_one_coin_many(_pad(amounts), 0)[: len(amounts)] == expected
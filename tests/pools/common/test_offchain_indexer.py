@@ -0,0 +1,164 @@
+import pytest
+from brownie import ETH_ADDRESS, ZERO_ADDRESS, Contract
+
+from offchain.indexer import FactoryReader, Indexer, receipt_logs
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob", "mint_bob")
+
+MIN_RAMP_TIME = 86400
+
+
+@pytest.fixture(scope="module")
+def fetch_logs(chain):
+    def _fetch_logs(start, stop):
+        for number in range(start, stop + 1):
+            block = chain[number]
+            for txid in block.transactions:
+                yield from receipt_logs(chain.get_transaction(txid.hex()), block.timestamp)
+
+    return _fetch_logs
+
+
+@pytest.fixture(scope="module")
+def contract_at(swap):
+    # every state getter used by the indexer is part of the pool ABI
+    return lambda address: Contract.from_abi("Pool", address, swap.abi)
+
+
+@pytest.fixture
+def open_indexer(tmp_path, factory, contract_at):
+    return lambda: Indexer(
+        tmp_path.joinpath("index.db"), factory, FactoryReader(factory, contract_at)
+    )
+
+
+@pytest.fixture(autouse=True)
+def activity(request, chain, alice, bob, swap, coins, initial_amounts, eth_amount, is_meta_pool):
+    amount = initial_amounts[0] // 4
+    swap.exchange(0, 1, amount, 0, {"from": bob, "value": eth_amount(amount)})
+    swap.exchange(1, 0, initial_amounts[1] // 8, 0, {"from": bob})
+
+    swap.remove_liquidity_one_coin(10 ** 22, 1, 0, {"from": alice})
+    amounts = [i // 10 for i in initial_amounts]
+    swap.remove_liquidity_imbalance(amounts, 2 ** 256 - 1, {"from": alice})
+    swap.remove_liquidity(10 ** 22, [0] * len(coins), {"from": alice})
+
+    # exchange midway through a ramp, so the indexed A must be interpolated
+    swap.ramp_A(swap.A() * 2, chain.time() + MIN_RAMP_TIME * 2, {"from": alice})
+    chain.sleep(MIN_RAMP_TIME)
+    swap.exchange(0, 1, amount, 0, {"from": bob, "value": eth_amount(amount)})
+
+    if is_meta_pool:
+        request.getfixturevalue("mint_bob_underlying")
+        request.getfixturevalue("approve_bob_underlying")
+        swap.exchange_underlying(0, 2, amount, 0, {"from": bob})
+        swap.exchange_underlying(3, 0, amount, 0, {"from": bob})
+        swap.exchange_underlying(1, 2, amount, 0, {"from": bob})
+
+
+@pytest.fixture
+def indexer(chain, factory, fetch_logs, open_indexer):
+    indexer = open_indexer()
+    indexer.backfill(fetch_logs, chain.height, start=factory.tx.block_number, step=50)
+    return indexer
+
+
+def _assert_state_matches(state, swap, n_coins):
+    assert state.exact
+    assert state.balances == [swap.balances(i) for i in range(n_coins)]
+    assert state.total_supply == swap.totalSupply()
+    assert state.initial_A == swap.initial_A()
+    assert state.future_A == swap.future_A()
+    assert state.future_A_time == swap.future_A_time()
+    assert state.fee == swap.fee()
+
+
+def test_pool_state(indexer, swap, coins):
+    _assert_state_matches(indexer.get_state(swap), swap, len(coins))
+
+
+def test_base_pool_state(indexer, base_pool, lp_token, is_meta_pool):
+    if not is_meta_pool:
+        pytest.skip("only metapools index a base pool")
+
+    state = indexer.get_state(base_pool)
+    assert state.balances == [base_pool.balances(i) for i in range(3)]
+    assert state.total_supply == lp_token.totalSupply()
+
+
+def test_indexed_pools(indexer, factory, swap):
+    assert indexer.pool_count == factory.pool_count()
+    assert swap.address.lower() in indexer.pools
+
+
+def test_historical_state(chain, indexer, swap, coins):
+    block = chain.height - 3
+    state = indexer.get_state(swap, block)
+
+    assert state.balances == [swap.balances(i, block_identifier=block) for i in range(len(coins))]
+    assert state.total_supply == swap.totalSupply(block_identifier=block)
+
+
+def test_resume(chain, factory, swap, coins, fetch_logs, open_indexer):
+    indexer = open_indexer()
+    indexer.backfill(fetch_logs, chain.height - 5, start=factory.tx.block_number, step=50)
+    indexer.close()
+
+    indexer = open_indexer()
+    indexer.backfill(fetch_logs, chain.height, step=50)
+
+    _assert_state_matches(indexer.get_state(swap), swap, len(coins))
+
+
+@pytest.mark.parametrize("with_transfers", [True, False])
+def test_remove_one_coin_ambiguous(
+    alice,
+    chain,
+    factory,
+    swap,
+    coins,
+    decimals,
+    initial_amounts,
+    plain_pool_size,
+    pool_type,
+    is_meta_pool,
+    eth_amount,
+    fetch_logs,
+    open_indexer,
+    with_transfers,
+):
+    if is_meta_pool or len(set(decimals)) > 1:
+        pytest.skip("only a balanced pool of coins sharing decimals is ambiguous")
+
+    tx = factory.deploy_plain_pool(
+        "Balanced Pool",
+        "BP",
+        coins + [ZERO_ADDRESS] * (4 - plain_pool_size),
+        200,
+        4000000,
+        0,
+        pool_type,
+        {"from": alice},
+    )
+    pool = Contract.from_abi("Balanced Pool", tx.return_value, swap.abi)
+    for coin, amount in zip(coins, initial_amounts):
+        if coin != ETH_ADDRESS:
+            coin._mint_for_testing(alice, amount, {"from": alice})
+            coin.approve(pool, 2 ** 256 - 1, {"from": alice})
+    pool.add_liquidity(initial_amounts, 0, {"from": alice, "value": eth_amount(initial_amounts[0])})
+
+    # every coin withdraws the same amount, only the coin transfer tells them apart
+    assert len({pool.calc_withdraw_one_coin(10 ** 21, i) for i in range(plain_pool_size)}) == 1
+    pool.remove_liquidity_one_coin(10 ** 21, 1, 0, {"from": alice})
+
+    def _fetch_logs(start, stop):
+        for log in fetch_logs(start, stop):
+            if with_transfers or log.event != "Transfer":
+                yield log
+
+    indexer = open_indexer()
+    indexer.backfill(_fetch_logs, chain.height, start=factory.tx.block_number, step=50)
+    if with_transfers:
+        _assert_state_matches(indexer.get_state(pool), pool, plain_pool_size)
+    else:
+        assert not indexer.get_state(pool).exact
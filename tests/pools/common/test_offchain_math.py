@@ -0,0 +1,81 @@
+import pytest
+
+from offchain import stableswap
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob", "mint_bob")
+
+
+@pytest.fixture(scope="module")
+def rates(decimals, is_meta_pool, base_pool):
+    rates = [10 ** (36 - precision) for precision in decimals]
+    if is_meta_pool:
+        rates[1] = base_pool.get_virtual_price()
+    return rates
+
+
+@pytest.fixture(scope="module")
+def unrolled(plain_pool_size, is_meta_pool):
+    # the 2 coin plain implementations unroll the `D_P` product within `get_D`
+    return plain_pool_size == 2 and not is_meta_pool
+
+
+@pytest.fixture
+def imbalance(bob, swap, initial_amounts, eth_amount):
+    amount = initial_amounts[0] // 3
+    swap.exchange(0, 1, amount, 0, {"from": bob, "value": eth_amount(amount)})
+
+
+@pytest.fixture
+def balances(swap, coins, imbalance):
+    return [swap.balances(i) for i in range(len(coins))]
+
+
+def test_virtual_price(swap, rates, balances, unrolled):
+    expected = swap.get_virtual_price()
+    price = stableswap.get_virtual_price(
+        rates, balances, swap.A_precise(), swap.totalSupply(), unrolled
+    )
+
+    assert price == expected
+
+
+@pytest.mark.parametrize("sending,receiving", [(0, 1), (1, 0)])
+def test_get_dy(swap, rates, balances, unrolled, decimals, sending, receiving):
+    amounts = [10 ** decimals[sending] * i for i in (1, 10, 1_000, 100_000, 500_000)]
+    expected = [swap.get_dy(sending, receiving, amount) for amount in amounts]
+
+    dy = stableswap.get_dy(
+        sending, receiving, amounts, rates, balances, swap.A_precise(), swap.fee(), unrolled
+    )
+
+    assert dy.tolist() == expected
+
+
+@pytest.mark.parametrize("idx", range(2))
+def test_calc_withdraw_one_coin(alice, swap, rates, balances, unrolled, idx):
+    total_supply = swap.totalSupply()
+    amounts = [10 ** 18, 10 ** 21, swap.balanceOf(alice) // 10, swap.balanceOf(alice)]
+    expected = [swap.calc_withdraw_one_coin(amount, idx) for amount in amounts]
+
+    dy, _ = stableswap.calc_withdraw_one_coin(
+        amounts, idx, rates, balances, swap.A_precise(), swap.fee(), total_supply, unrolled
+    )
+
+    assert dy.tolist() == expected
+
+
+def test_multiple_pools(swap, rates, balances, unrolled, decimals):
+    # quoting the same pool at two states in one call matches quoting each state alone
+    amounts = [10 ** decimals[0] * i for i in (1, 1_000)]
+    doubled = [balance * 2 for balance in balances]
+    amp, fee = swap.A_precise(), swap.fee()
+
+    batched = stableswap.get_dy(
+        0, 1, amounts, [rates, rates], [balances, doubled], amp, fee, unrolled
+    )
+
+    assert batched[0].tolist() == [swap.get_dy(0, 1, amount) for amount in amounts]
+    assert (
+        batched[1].tolist()
+        == stableswap.get_dy(0, 1, amounts, rates, doubled, amp, fee, unrolled).tolist()
+    )
@@ -0,0 +1,206 @@
+import pytest
+from brownie import ZERO_ADDRESS
+
+from offchain.indexer import receipt_logs
+from offchain.simulator import REMOVE_LIQUIDITY_ONE, PoolSimulator, tape_from_logs
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob", "mint_bob")
+
+MIN_RAMP_TIME = 86400
+
+
+@pytest.fixture(scope="module")
+def unrolled(plain_pool_size, is_meta_pool):
+    return plain_pool_size == 2 and not is_meta_pool
+
+
+@pytest.fixture(scope="module")
+def rates(decimals, is_meta_pool, base_pool):
+    rate_multipliers = [10 ** (36 - precision) for precision in decimals]
+
+    def _rates(block):
+        if is_meta_pool:
+            # metapools read the base pool virtual price at the start of every call
+            return [rate_multipliers[0], base_pool.get_virtual_price(block_identifier=block)]
+        return rate_multipliers
+
+    return _rates
+
+
+def _simulator(chain, swap, n_coins, rates, **kwargs):
+    return PoolSimulator(
+        rates(chain.height),
+        [swap.balances(i) for i in range(n_coins)],
+        swap.totalSupply(),
+        swap.A_precise(),
+        swap.fee(),
+        admin_balances=[swap.admin_balances(i) for i in range(n_coins)],
+        timestamp=chain[-1].timestamp,
+        **kwargs,
+    )
+
+
+def _replay(simulator, swap, tx, rates, coins):
+    logs = receipt_logs(tx, tx.timestamp)
+    tape = tape_from_logs(logs, swap.address, lambda log: rates(log.block - 1), coins=coins)
+    return simulator.run(tape)
+
+
+def _assert_matches(trace, swap, n_coins, block):
+    assert not any(trace.reverted)
+    assert list(trace.balances[-1]) == [swap.balances(i) for i in range(n_coins)]
+    assert list(trace.admin_balances[-1]) == [swap.admin_balances(i) for i in range(n_coins)]
+    assert trace.total_supply[-1] == swap.totalSupply()
+    assert trace.virtual_price[-1] == swap.get_virtual_price(block_identifier=block)
+
+
+def test_replay(
+    request,
+    chain,
+    alice,
+    bob,
+    swap,
+    coins,
+    initial_amounts,
+    eth_amount,
+    rates,
+    unrolled,
+    is_meta_pool,
+):
+    n_coins = len(coins)
+    simulator = _simulator(chain, swap, n_coins, rates, unrolled=unrolled)
+    amount = initial_amounts[0] // 4
+    deposit = [i // (k + 3) for k, i in enumerate(initial_amounts)]
+    withdrawal = [i // 10 for i in initial_amounts]
+
+    # (seconds elapsed before, operation)
+    operations = [
+        (0, lambda: swap.exchange(0, 1, amount, 0, {"from": bob, "value": eth_amount(amount)})),
+        (0, lambda: swap.exchange(1, 0, initial_amounts[1] // 8, 0, {"from": bob})),
+        (0, lambda: swap.add_liquidity(deposit, 0, {"from": bob, "value": eth_amount(deposit[0])})),
+        (0, lambda: swap.remove_liquidity_one_coin(10 ** 22, 1, 0, {"from": alice})),
+        (0, lambda: swap.remove_liquidity_imbalance(withdrawal, 2 ** 256 - 1, {"from": alice})),
+        (0, lambda: swap.remove_liquidity(10 ** 22, [0] * n_coins, {"from": alice})),
+        (0, lambda: swap.ramp_A(swap.A() * 2, chain.time() + MIN_RAMP_TIME * 2, {"from": alice})),
+        # exchange midway through the ramp, so A must be interpolated
+        (
+            MIN_RAMP_TIME,
+            lambda: swap.exchange(0, 1, amount, 0, {"from": bob, "value": eth_amount(amount)}),
+        ),
+    ]
+    for delay, operation in operations:
+        chain.sleep(delay)
+        tx = operation()
+        trace = _replay(simulator, swap, tx, rates, coins)
+        assert trace.results[-1] == tx.return_value
+        _assert_matches(trace, swap, n_coins, tx.block_number)
+
+    if is_meta_pool:
+        request.getfixturevalue("mint_bob_underlying")
+        request.getfixturevalue("approve_bob_underlying")
+        # the base pool virtual price moves within these, so only balances are comparable
+        for i, j in [(0, 2), (3, 0)]:
+            tx = swap.exchange_underlying(i, j, amount, 0, {"from": bob})
+            trace = _replay(simulator, swap, tx, rates, coins)
+            assert list(trace.balances[-1]) == [swap.balances(k) for k in range(n_coins)]
+
+        tx = swap.exchange(1, 0, initial_amounts[1] // 8, 0, {"from": bob})
+        trace = _replay(simulator, swap, tx, rates, coins)
+        _assert_matches(trace, swap, n_coins, tx.block_number)
+
+
+@pytest.fixture
+def ema_swap(
+    alice,
+    bob,
+    coins,
+    factory,
+    project,
+    initial_amounts,
+    plain_implementations,
+    pool_type,
+    plain_pool_size,
+    deploy_plain_implementation,
+):
+    if pool_type != 0 or plain_pool_size != 2:
+        pytest.skip("the EMA implementation is a 2 coin variant of the basic pool")
+
+    implementation = deploy_plain_implementation(_pool_size=2, _pool_type="BasicEMA")
+    factory.set_plain_implementations(
+        2, plain_implementations + [implementation] + [ZERO_ADDRESS] * 5, {"from": alice}
+    )
+    tx = factory.deploy_plain_pool(
+        "EMA Pool",
+        "EMA",
+        coins + [ZERO_ADDRESS] * 2,
+        200,
+        4000000,
+        0,
+        len(plain_implementations),
+        {"from": alice},
+    )
+    swap = getattr(project, implementation._name).at(tx.return_value)
+    for coin, amount in zip(coins, initial_amounts):
+        coin._mint_for_testing(alice, amount, {"from": alice})
+        coin.approve(swap, 2 ** 256 - 1, {"from": alice})
+        coin.approve(swap, 2 ** 256 - 1, {"from": bob})
+    swap.add_liquidity(initial_amounts, 0, {"from": alice})
+    return swap
+
+
+def test_replay_ema(chain, alice, bob, ema_swap, coins, initial_amounts, rates):
+    swap = ema_swap
+    simulator = _simulator(
+        chain,
+        swap,
+        2,
+        rates,
+        unrolled=True,
+        ma_exp_time=swap.ma_exp_time(),
+        last_price=swap.last_price(),
+        ema_price=swap.ema_price(),
+        ma_last_time=swap.ma_last_time(),
+    )
+    amount = initial_amounts[0] // 4
+
+    # the oracle decays with the time elapsed between operations
+    operations = [
+        (0, lambda: swap.exchange(0, 1, amount, 0, {"from": bob})),
+        (60, lambda: swap.exchange(1, 0, amount // 2, 0, {"from": bob})),
+        (600, lambda: swap.add_liquidity([amount, 0], 0, {"from": bob})),
+        (1, lambda: swap.remove_liquidity_one_coin(10 ** 22, 1, 0, {"from": alice})),
+        (
+            3600,
+            lambda: swap.remove_liquidity_imbalance(
+                [0, amount // 2], 2 ** 256 - 1, {"from": alice}
+            ),
+        ),
+        (86400, lambda: swap.remove_liquidity(10 ** 22, [0, 0], {"from": alice})),
+        (300, lambda: swap.exchange(0, 1, amount, 0, {"from": bob})),
+    ]
+    for delay, operation in operations:
+        chain.sleep(delay)
+        tx = operation()
+        trace = _replay(simulator, swap, tx, rates, coins)
+
+        assert trace.results[-1] == tx.return_value
+        _assert_matches(trace, swap, 2, tx.block_number)
+        assert simulator.last_price == swap.last_price()
+        assert simulator.ema_price == swap.ema_price()
+        assert simulator.ma_last_time == swap.ma_last_time()
+        assert trace.price_oracle[-1] == swap.price_oracle(block_identifier=tx.block_number)
+
+
+def test_remove_one_coin_ambiguous():
+    simulator = PoolSimulator([10 ** 18] * 2, [10 ** 24] * 2, 2 * 10 ** 24, 20000, 4000000)
+    coin_amount = simulator.calc_withdraw_one_coin(10 ** 21, 1)[0]
+    assert simulator.calc_withdraw_one_coin(10 ** 21, 0)[0] == coin_amount
+
+    # both coins withdraw the same amount, the index must come from the coin transfer
+    trace = simulator.run([(0, REMOVE_LIQUIDITY_ONE, 10 ** 21, None, coin_amount)])
+    assert trace.reverted == [True]
+    assert simulator.balances == [10 ** 24] * 2
+
+    trace = simulator.run([(0, REMOVE_LIQUIDITY_ONE, 10 ** 21, 1, coin_amount)])
+    assert trace.reverted == [False]
+    assert simulator.balances[0] == 10 ** 24
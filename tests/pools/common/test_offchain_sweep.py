@@ -0,0 +1,72 @@
+import pytest
+
+from offchain.indexer import receipt_logs
+from offchain.simulator import tape_from_logs
+from offchain.sweep import InitialState, sweep
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob", "mint_bob")
+
+
+@pytest.fixture
+def initial_state(chain, swap, coins, decimals, is_meta_pool, plain_pool_size, base_pool):
+    rates = [10 ** (36 - precision) for precision in decimals]
+    if is_meta_pool:
+        rates = [rates[0], base_pool.get_virtual_price()]
+    return InitialState(
+        tuple(rates),
+        tuple(swap.balances(i) for i in range(len(coins))),
+        swap.totalSupply(),
+        unrolled=plain_pool_size == 2 and not is_meta_pool,
+        timestamp=chain[-1].timestamp,
+    )
+
+
+@pytest.fixture
+def tape(chain, bob, swap, initial_amounts, eth_amount, initial_state):
+    # requests `initial_state` so the state is read ahead of the trades
+    logs = []
+    for k in range(4):
+        chain.sleep(60)
+        i = k % 2
+        amount = initial_amounts[i] // (4 + k)
+        tx = swap.exchange(
+            i, 1 - i, amount, 0, {"from": bob, "value": eth_amount(amount * (1 - i))}
+        )
+        logs += receipt_logs(tx, tx.timestamp)
+    return tape_from_logs(logs, swap.address, min_dy=True)
+
+
+def test_sweep_grid(swap, coins, initial_state, tape):
+    A, fee = swap.A(), swap.fee()
+    results = sweep(initial_state, tape, [A, A * 2], [fee, fee * 10], processes=2)
+
+    assert [(r.A, r.fee) for r in results] == [
+        (A, fee),
+        (A, fee * 10),
+        (A * 2, fee),
+        (A * 2, fee * 10),
+    ]
+    assert results == sweep(initial_state, tape, [A, A * 2], [fee, fee * 10], processes=1)
+
+    # the pool parameters reproduce the pool
+    exact = results[0]
+    assert exact.trades == len(tape)
+    assert exact.captured == 1
+    assert list(exact.balances) == [swap.balances(i) for i in range(len(coins))]
+
+    # trades paying more than they did on-chain go elsewhere
+    assert results[1].trades < len(tape)
+    assert results[1].volume < exact.volume
+
+
+def test_sweep_oracle(swap, initial_state, tape, plain_pool_size, is_meta_pool):
+    if plain_pool_size != 2 or is_meta_pool:
+        pytest.skip("the oracle is only modelled for 2 coin plain pools")
+
+    A, fee = swap.A(), swap.fee()
+    fast, slow = sweep(initial_state, tape, [A], [fee], [60, 86400], processes=2)
+
+    assert fast.balances == slow.balances
+    assert fast.oracle_deviation > 0 and slow.oracle_deviation > 0
+    assert fast.oracle_deviation != slow.oracle_deviation
+    assert fast.max_oracle_deviation >= fast.oracle_deviation
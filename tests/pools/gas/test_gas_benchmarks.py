@@ -0,0 +1,123 @@
+import pytest
+from brownie import ZERO_ADDRESS
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "mint_bob", "approve_bob")
+
+# percentage of the initial coin 0 balance swapped into the pool before measuring
+SCENARIOS = {"balanced": 0, "skewed": 50, "imbalanced": 90}
+
+
+@pytest.fixture(
+    scope="module", params=["Factory", "Price", "PriceIncrementalEMA", "BalancesSnapshot"]
+)
+def bench_swap(
+    request,
+    alice,
+    factory,
+    coins,
+    project,
+    swap,
+    pool_type,
+    plain_pool_size,
+    plain_implementations,
+    deploy_plain_implementation,
+    set_plain_implementations,
+):
+    if request.param == "Factory":
+        return swap
+    if request.param == "BalancesSnapshot":
+        if pool_type != 3:
+            pytest.skip("the balances snapshot implementations are benchmarked with rebasing coins")
+    elif pool_type != 0:
+        pytest.skip("price implementations are benchmarked with the basic coins")
+    if request.param == "PriceIncrementalEMA" and plain_pool_size != 2:
+        pytest.skip("the incremental EMA implementation is a 2 coin variant")
+
+    implementation = deploy_plain_implementation(
+        _pool_size=plain_pool_size, _pool_type=request.param
+    )
+    factory.set_plain_implementations(
+        plain_pool_size,
+        plain_implementations + [implementation] + [ZERO_ADDRESS] * 5,
+        {"from": alice},
+    )
+    tx = factory.deploy_plain_pool(
+        "Bench Pool",
+        "BP",
+        coins + [ZERO_ADDRESS] * (4 - plain_pool_size),
+        200,
+        4000000,
+        0,
+        len(plain_implementations),
+        {"from": alice},
+    )
+    swap = getattr(project, implementation._name).at(tx.return_value)
+    if request.param != "BalancesSnapshot":
+        # rates are only readable once the oracles are set, without any they are the multipliers
+        swap.set_oracles([0] * plain_pool_size, [ZERO_ADDRESS] * plain_pool_size, {"from": alice})
+    return swap
+
+
+@pytest.fixture(scope="module")
+def bench_name(bench_swap, swap, implementation_name):
+    if bench_swap == swap:
+        return implementation_name
+    return bench_swap._name
+
+
+@pytest.fixture(autouse=True)
+def setup(alice, bob, coins, initial_amounts, bench_swap, swap):
+    if bench_swap != swap:
+        for coin, amount in zip(coins, initial_amounts):
+            coin._mint_for_testing(alice, amount, {"from": alice})
+            coin.approve(bench_swap, 2 ** 256 - 1, {"from": alice})
+            coin.approve(bench_swap, 2 ** 256 - 1, {"from": bob})
+        bench_swap.add_liquidity(initial_amounts, 0, {"from": alice})
+
+
+@pytest.fixture(params=list(SCENARIOS))
+def scenario(request, bob, bench_swap, initial_amounts, eth_amount):
+    amount = initial_amounts[0] * SCENARIOS[request.param] // 100
+    if amount:
+        bench_swap.exchange(0, 1, amount, 0, {"from": bob, "value": eth_amount(amount)})
+    return request.param
+
+
+def test_exchange(bob, bench_swap, bench_name, decimals, eth_amount, scenario, record_gas):
+    dx = 1_000 * 10 ** decimals[0]
+    tx = bench_swap.exchange(0, 1, dx, 0, {"from": bob, "value": eth_amount(dx)})
+    record_gas(bench_name, "exchange", scenario, tx)
+
+
+def test_exchange_underlying(
+    request, bob, bench_swap, bench_name, is_meta_pool, underlying_decimals, scenario, record_gas
+):
+    if not is_meta_pool:
+        pytest.skip("only metapools have underlying coins")
+    request.getfixturevalue("mint_bob_underlying")
+    request.getfixturevalue("approve_bob_underlying")
+
+    # routes through the base pool, the more expensive direction
+    dx = 1_000 * 10 ** underlying_decimals[0]
+    tx = bench_swap.exchange_underlying(0, 1, dx, 0, {"from": bob})
+    record_gas(bench_name, "exchange_underlying", scenario, tx)
+
+
+def test_add_liquidity(
+    bob, bench_swap, bench_name, deposit_amounts, eth_amount, scenario, record_gas
+):
+    tx = bench_swap.add_liquidity(
+        deposit_amounts, 0, {"from": bob, "value": eth_amount(deposit_amounts[0])}
+    )
+    record_gas(bench_name, "add_liquidity", scenario, tx)
+
+
+@pytest.mark.parametrize("idx", range(2))
+def test_remove_liquidity_one_coin(alice, bench_swap, bench_name, idx, scenario, record_gas):
+    tx = bench_swap.remove_liquidity_one_coin(1_000 * 10 ** 18, idx, 0, {"from": alice})
+    record_gas(bench_name, f"remove_liquidity_one_coin({idx})", scenario, tx)
+
+
+def test_withdraw_admin_fees(alice, bench_swap, bench_name, scenario, record_gas):
+    tx = bench_swap.withdraw_admin_fees({"from": alice})
+    record_gas(bench_name, "withdraw_admin_fees", scenario, tx)
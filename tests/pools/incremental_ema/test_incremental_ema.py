@@ -0,0 +1,131 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS
+
+from offchain.oracle import incremental_alpha, pack_prices, price_alpha, replay_packed
+from offchain.simulator import EXCHANGE, REMOVE_LIQUIDITY_ONE, PoolSimulator
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob", "mint_bob")
+
+# seconds slept before each exchange, the last ones past the incremental range
+GAPS = [1, 12, 13, 60, 600, 1023, 1024, 5000]
+
+
+def _deploy(alice, factory, coins, project, plain_implementations, implementation, name):
+    factory.set_plain_implementations(
+        2, plain_implementations + [implementation] + [ZERO_ADDRESS] * 5, {"from": alice}
+    )
+    tx = factory.deploy_plain_pool(
+        name,
+        name[:3],
+        coins + [ZERO_ADDRESS] * 2,
+        200,
+        4000000,
+        0,
+        len(plain_implementations),
+        {"from": alice},
+    )
+    swap = getattr(project, implementation._name).at(tx.return_value)
+    # rates fall back to the rate multipliers once the oracles are set
+    swap.set_oracles([b"\x00" * 4] * 2, [ZERO_ADDRESS] * 2, {"from": alice})
+    return swap
+
+
+@pytest.fixture(scope="module")
+def price_swap(alice, factory, coins, project, plain_implementations, deploy_plain_implementation):
+    implementation = deploy_plain_implementation(_pool_size=2, _pool_type="Price")
+    return _deploy(
+        alice, factory, coins, project, plain_implementations, implementation, "Price Pool"
+    )
+
+
+@pytest.fixture(scope="module")
+def incremental_swap(
+    alice, factory, coins, project, plain_implementations, deploy_plain_implementation
+):
+    implementation = deploy_plain_implementation(_pool_size=2, _pool_type="PriceIncrementalEMA")
+    return _deploy(
+        alice, factory, coins, project, plain_implementations, implementation, "Incremental Pool"
+    )
+
+
+@pytest.fixture(autouse=True)
+def setup(alice, bob, coins, initial_amounts, price_swap, incremental_swap):
+    for swap in [price_swap, incremental_swap]:
+        for coin, amount in zip(coins, initial_amounts):
+            coin._mint_for_testing(alice, amount, {"from": alice})
+            coin.approve(swap, 2 ** 256 - 1, {"from": alice})
+            coin.approve(swap, 2 ** 256 - 1, {"from": bob})
+        swap.add_liquidity(initial_amounts, 0, {"from": alice})
+        # start the oracle of both pools from the same price
+        swap.exchange(0, 1, initial_amounts[0] // 10, 0, {"from": bob})
+
+
+def _simulator(chain, swap, rates, ema_alpha):
+    return PoolSimulator(
+        rates,
+        [swap.balances(i) for i in range(2)],
+        swap.totalSupply(),
+        swap.A_precise(),
+        swap.fee(),
+        unrolled=True,
+        ma_exp_time=swap.ma_exp_time(),
+        last_price=swap.last_price(),
+        ema_price=swap.ema_price(),
+        ma_last_time=swap.ma_last_time(),
+        admin_balances=[swap.admin_balances(i) for i in range(2)],
+        timestamp=chain[-1].timestamp,
+        ema_alpha=ema_alpha,
+        price_balances=True,
+    )
+
+
+def test_ma_exp_time(alice, incremental_swap):
+    assert incremental_swap.ma_exp_time() == 865
+
+    incremental_swap.set_ma_exp_time(600, {"from": alice})
+    assert incremental_swap.ma_exp_time() == 600
+
+    with brownie.reverts():
+        incremental_swap.set_ma_exp_time(0, {"from": alice})
+    with brownie.reverts():
+        incremental_swap.set_ma_exp_time(2 ** 128, {"from": alice})
+
+
+@pytest.mark.parametrize("ma_exp_time", [865, 86400])
+def test_replay(alice, bob, chain, decimals, incremental_swap, price_swap, ma_exp_time):
+    rates = [10 ** (36 - precision) for precision in decimals]
+    pools = []
+    for swap, ema_alpha in [(incremental_swap, incremental_alpha), (price_swap, price_alpha)]:
+        swap.set_ma_exp_time(ma_exp_time, {"from": alice})
+        pools.append((swap, _simulator(chain, swap, rates, ema_alpha)))
+
+    for k, gap in enumerate(GAPS):
+        chain.sleep(gap)
+        i = k % 2
+        dx = 10 ** (3 + decimals[i])
+        for swap, simulator in pools:
+            if k == 4:
+                tx = swap.remove_liquidity_one_coin(10 ** 21, i, 0, {"from": alice})
+                step = (tx.timestamp, REMOVE_LIQUIDITY_ONE, 10 ** 21, i)
+            else:
+                tx = swap.exchange(i, 1 - i, dx, 0, {"from": bob})
+                step = (tx.timestamp, EXCHANGE, i, 1 - i, dx)
+
+            packed = replay_packed(simulator, [step])
+            assert packed == [pack_prices(swap.last_price(), swap.ema_price())]
+            assert simulator.ma_last_time == swap.ma_last_time()
+
+
+@pytest.mark.parametrize("gap", [12, 120, 2000])
+def test_gas_exchange(bob, chain, decimals, incremental_swap, price_swap, gap):
+    dx = 10 ** (3 + decimals[0])
+    for swap in [price_swap, incremental_swap]:
+        swap.exchange(0, 1, dx, 0, {"from": bob})
+    chain.sleep(gap)
+
+    expected = price_swap.exchange(0, 1, dx, 0, {"from": bob}).gas_used
+    gas_used = incremental_swap.exchange(0, 1, dx, 0, {"from": bob}).gas_used
+
+    if gap < 1024:
+        assert gas_used < expected
@@ -0,0 +1,123 @@
+import pytest
+from brownie import ZERO_ADDRESS, Contract
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity")
+
+# Balances implementation compared against, and the fixture deploying its snapshot variant
+SNAPSHOT_IMPLEMENTATIONS = {
+    4: ("MetaUSDBalances", "meta_usd_rebase_snapshot"),
+    5: ("MetaBTCBalances", "meta_btc_rebase_snapshot"),
+    6: ("MetaBalances", "meta_sidechain_rebase_snapshot"),
+}
+
+
+@pytest.fixture(scope="module")
+def snapshot_implementation(request, pool_type):
+    return request.getfixturevalue(SNAPSHOT_IMPLEMENTATIONS[pool_type][1])
+
+
+@pytest.fixture(scope="module")
+def meta_pools(
+    alice, factory, base_pool, coins, swap, meta_implementations, snapshot_implementation
+):
+    # the Balances implementation and its snapshot variant, side by side
+    factory.set_metapool_implementations(
+        base_pool,
+        meta_implementations + [snapshot_implementation] + [ZERO_ADDRESS] * 7,
+        {"from": alice},
+    )
+    pools = []
+    for idx, implementation in [(1, meta_implementations[1]), (2, snapshot_implementation)]:
+        tx = factory.deploy_metapool(
+            base_pool, "Snapshot Meta Pool", "SMP", coins[0], 200, 4000000, idx, {"from": alice}
+        )
+        pools.append(Contract.from_abi("Meta Instance", tx.return_value, implementation.abi))
+    return pools
+
+
+@pytest.fixture
+def pools(alice, coins, underlying_coins, initial_amounts, meta_pools):
+    for coin, amount in zip(coins, initial_amounts):
+        coin._mint_for_testing(alice, amount * 3, {"from": alice})
+    for coin in coins + underlying_coins[1:]:
+        for pool in meta_pools:
+            coin.approve(pool, 2 ** 256 - 1, {"from": alice})
+    for pool in meta_pools:
+        pool.add_liquidity(initial_amounts, 0, {"from": alice})
+    return meta_pools
+
+
+def _rebase(alice, coins, pools, amounts):
+    for pool in pools:
+        for coin, amount in zip(coins, amounts):
+            coin._mint_for_testing(pool, amount, {"from": alice})
+
+
+def _state(pool, n_coins):
+    return (
+        pool.get_balances(),
+        [pool.admin_balances(i) for i in range(n_coins)],
+        pool.totalSupply(),
+    )
+
+
+def test_snapshot_matches_after_rebase(alice, coins, initial_amounts, pools):
+    n_coins = len(coins)
+    results = []
+    for pool in pools:
+        _rebase(alice, coins, [pool], [amount // 10 for amount in initial_amounts])
+        results.append(
+            [
+                pool.exchange(0, 1, initial_amounts[0] // 5, 0, {"from": alice}).return_value,
+                pool.add_liquidity(
+                    [amount // (i + 2) for i, amount in enumerate(initial_amounts)],
+                    0,
+                    {"from": alice},
+                ).return_value,
+                pool.remove_liquidity_imbalance(
+                    [amount // 20 for amount in initial_amounts], 2 ** 256 - 1, {"from": alice}
+                ).return_value,
+                _state(pool, n_coins),
+            ]
+        )
+
+    assert results[0] == results[1]
+    _, admin_balances, _ = results[1][-1]
+    for i, coin in enumerate(coins):
+        assert coin.balanceOf(pools[1]) - admin_balances[i] == pools[1].balances(i)
+
+
+@pytest.mark.parametrize("sending,receiving", [(0, 2), (2, 0), (1, 3)])
+def test_snapshot_matches_underlying(
+    alice,
+    coins,
+    underlying_coins,
+    initial_amounts,
+    initial_amounts_underlying,
+    pools,
+    sending,
+    receiving,
+):
+    amount = initial_amounts_underlying[sending] // 10
+    results = []
+    for pool in pools:
+        _rebase(alice, coins, [pool], [amount // 10 for amount in initial_amounts])
+        underlying_coins[sending]._mint_for_testing(alice, amount, {"from": alice})
+        tx = pool.exchange_underlying(sending, receiving, amount, 0, {"from": alice})
+        results.append([tx.return_value, _state(pool, len(coins))])
+
+    assert results[0] == results[1]
+
+
+@pytest.mark.parametrize("function", ["exchange", "add_liquidity"])
+def test_snapshot_gas(alice, initial_amounts, pools, pool_type, function, record_gas):
+    if function == "exchange":
+        txs = [pool.exchange(0, 1, initial_amounts[0] // 10, 0, {"from": alice}) for pool in pools]
+    else:
+        deposit = [amount // 10 for amount in initial_amounts]
+        txs = [pool.add_liquidity(deposit, 0, {"from": alice}) for pool in pools]
+
+    name = SNAPSHOT_IMPLEMENTATIONS[pool_type][0]
+    record_gas(name, function, "rebase-snapshot-baseline", txs[0])
+    record_gas(f"{name}Snapshot", function, "rebase-snapshot", txs[1])
+    assert txs[1].gas_used < txs[0].gas_used
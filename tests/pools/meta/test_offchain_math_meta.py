@@ -0,0 +1,39 @@
+import itertools
+
+import pytest
+
+from offchain import stableswap
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob_underlying")
+
+
+@pytest.fixture
+def imbalance(bob, swap, underlying_coins, underlying_decimals):
+    amount = 300_000 * 10 ** underlying_decimals[1]
+    underlying_coins[1]._mint_for_testing(bob, amount, {"from": bob})
+    swap.exchange_underlying(1, 0, amount, 0, {"from": bob})
+
+
+@pytest.mark.parametrize("sending,receiving", itertools.permutations(range(4), 2))
+def test_get_dy_underlying(
+    swap, base_pool, lp_token, decimals, underlying_decimals, imbalance, sending, receiving
+):
+    amounts = [10 ** underlying_decimals[sending] * i for i in (1, 1_000, 100_000, 500_000)]
+    expected = [swap.get_dy_underlying(sending, receiving, amount) for amount in amounts]
+
+    dy = stableswap.get_dy_underlying(
+        sending,
+        receiving,
+        amounts,
+        10 ** (36 - decimals[0]),
+        [swap.balances(i) for i in range(2)],
+        swap.A_precise(),
+        swap.fee(),
+        [10 ** (36 - precision) for precision in underlying_decimals[1:]],
+        [base_pool.balances(i) for i in range(3)],
+        base_pool.A_precise(),
+        base_pool.fee(),
+        lp_token.totalSupply(),
+    )
+
+    assert dy.tolist() == expected
@@ -0,0 +1,105 @@
+import pytest
+from brownie import ZERO_ADDRESS, Contract
+
+from offchain.routing import RouteGraph
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity")
+
+AMOUNT = 1_000 * 10 ** 18
+
+
+@pytest.fixture(scope="module")
+def router(alice, factory, Router):
+    return Router.deploy(factory, {"from": alice})
+
+
+@pytest.fixture(scope="module")
+def deploy_plain_swap(alice, factory, coins, project, plain_implementations):
+    def _deploy(coin):
+        tx = factory.deploy_plain_pool(
+            "Route Pool",
+            "RP",
+            [coin, coins[0], ZERO_ADDRESS, ZERO_ADDRESS],
+            200,
+            4000000,
+            0,
+            0,
+            {"from": alice},
+        )
+        swap = getattr(project, plain_implementations[0]._name).at(tx.return_value)
+
+        amount = 1_000_000 * 10 ** 18
+        for token in [coin, coins[0]]:
+            token._mint_for_testing(alice, amount, {"from": alice})
+            token.approve(swap, 2 ** 256 - 1, {"from": alice})
+        swap.add_liquidity([amount, amount], 0, {"from": alice})
+        return swap, tx
+
+    return _deploy
+
+
+@pytest.fixture(scope="module")
+def plain_swap(coin_a, deploy_plain_swap):
+    return deploy_plain_swap(coin_a)[0]
+
+
+@pytest.fixture(scope="module")
+def contract_at(swap):
+    # every state getter used by the graph is part of the metapool ABI
+    return lambda address: Contract.from_abi("Pool", address, swap.abi)
+
+
+@pytest.fixture
+def graph(factory, plain_swap, contract_at):
+    return RouteGraph.from_factory(factory, contract_at)
+
+
+def test_indexes_factory_pools(graph, factory, swap, plain_swap, coin_a, base_coins):
+    assert graph.pool_count == factory.pool_count()
+    assert {plain_swap.address.lower(), swap.address.lower()} <= set(graph.pools)
+    assert graph.edges(coin_a, base_coins[0]) == []
+    assert len(graph.edges(base_coins[0], base_coins[1])) == 1
+
+
+def test_route_matches_router(graph, router, coin_a, base_coins):
+    route = graph.find_routes(coin_a, base_coins[0], AMOUNT)[0]
+
+    assert len(route.edges) == 2
+    assert route.amount_out == router.get_dy_path(*route.router_args(), AMOUNT)
+
+
+def test_routes_are_ranked(graph, coin_a, base_coins):
+    routes = graph.find_routes(coin_a, base_coins[2], AMOUNT, k=5)
+
+    assert [route.amount_out for route in routes] == sorted(
+        (route.amount_out for route in routes), reverse=True
+    )
+
+
+def test_split(graph, plain_swap, coin_a, coins):
+    amount = 500_000 * 10 ** 18
+    split = graph.find_split(coin_a, coins[0], amount)
+
+    assert split.amount_in == amount
+    assert split.amount_out == plain_swap.get_dy(0, 1, amount)
+
+
+def test_incremental_update(graph, factory, contract_at, deploy_plain_swap, coin_b, coins):
+    assert graph.find_routes(coin_b, coins[0], AMOUNT) == []
+
+    swap, tx = deploy_plain_swap(coin_b)
+    added = graph.on_event(tx.events["PlainPoolDeployed"], factory, contract_at)
+
+    assert [pool.address for pool in added] == [swap.address.lower()]
+    route = graph.find_routes(coin_b, coins[0], AMOUNT)[0]
+    assert route.amount_out == swap.get_dy(0, 1, AMOUNT)
+
+
+def test_refresh(bob, graph, plain_swap, contract_at, coin_a, coins):
+    coin_a._mint_for_testing(bob, AMOUNT, {"from": bob})
+    coin_a.approve(plain_swap, AMOUNT, {"from": bob})
+    plain_swap.exchange(0, 1, AMOUNT, 0, {"from": bob})
+
+    graph.refresh(contract_at, [plain_swap])
+    route = graph.find_routes(coin_a, coins[0], AMOUNT)[0]
+    assert route.amount_out == plain_swap.get_dy(0, 1, AMOUNT)
@@ -0,0 +1,203 @@
+import brownie
+import pytest
+from brownie import ETH_ADDRESS, ZERO_ADDRESS
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity")
+
+AMOUNT = 1_000 * 10 ** 18
+
+
+@pytest.fixture(scope="module")
+def router(alice, factory, Router):
+    return Router.deploy(factory, {"from": alice})
+
+
+@pytest.fixture(scope="module")
+def plain_swap(alice, factory, coin_a, coins, project, plain_implementations):
+    # plain pool sharing the metapool's coin, so paths can chain through both
+    tx = factory.deploy_plain_pool(
+        "Router Pool",
+        "RP",
+        [coin_a, coins[0], ZERO_ADDRESS, ZERO_ADDRESS],
+        200,
+        4000000,
+        0,
+        0,
+        {"from": alice},
+    )
+    return getattr(project, plain_implementations[0]._name).at(tx.return_value)
+
+
+@pytest.fixture(scope="module")
+def eth_swap(alice, factory, coins, project, plain_implementations):
+    # ETH pool sharing the metapool's coin, so ETH can enter or leave a path
+    tx = factory.deploy_plain_pool(
+        "Router ETH Pool",
+        "REP",
+        [ETH_ADDRESS, coins[0], ZERO_ADDRESS, ZERO_ADDRESS],
+        200,
+        4000000,
+        0,
+        1,
+        {"from": alice},
+    )
+    swap = getattr(project, plain_implementations[1]._name).at(tx.return_value)
+
+    amount = 1_000_000 * 10 ** 18
+    coins[0]._mint_for_testing(alice, amount, {"from": alice})
+    coins[0].approve(swap, 2 ** 256 - 1, {"from": alice})
+    swap.add_liquidity([amount, amount], 0, {"from": alice, "value": amount})
+    return swap
+
+
+@pytest.fixture(autouse=True)
+def setup(alice, bob, coin_a, coins, plain_swap, router):
+    amount = 1_000_000 * 10 ** 18
+    for coin in [coin_a, coins[0]]:
+        coin._mint_for_testing(alice, amount, {"from": alice})
+        coin.approve(plain_swap, 2 ** 256 - 1, {"from": alice})
+    plain_swap.add_liquidity([amount, amount], 0, {"from": alice})
+
+    coin_a._mint_for_testing(bob, AMOUNT, {"from": bob})
+    coin_a.approve(router, 2 ** 256 - 1, {"from": bob})
+
+
+def _path(pools, coins):
+    return pools + [ZERO_ADDRESS] * (4 - len(pools)), coins + [ZERO_ADDRESS] * (5 - len(coins))
+
+
+def test_get_dy_path(router, plain_swap, swap, coin_a, coins, base_coins):
+    expected = plain_swap.get_dy(0, 1, AMOUNT)
+    expected = swap.get_dy_underlying(0, 1, expected)
+
+    pools, path = _path([plain_swap, swap], [coin_a, coins[0], base_coins[0]])
+    assert router.get_dy_path(pools, path, AMOUNT) == expected
+
+
+def test_exchange_single_hop(bob, router, plain_swap, coin_a, coins):
+    expected = plain_swap.get_dy(0, 1, AMOUNT)
+
+    pools, path = _path([plain_swap], [coin_a, coins[0]])
+    tx = router.exchange(pools, path, AMOUNT, 0, {"from": bob})
+
+    assert tx.return_value == expected
+    assert coins[0].balanceOf(bob) == expected
+    assert coin_a.balanceOf(bob) == 0
+
+
+@pytest.mark.parametrize("idx", range(1, 4))
+def test_exchange_path(bob, router, plain_swap, swap, coin_a, coins, base_coins, idx):
+    pools, path = _path([plain_swap, swap], [coin_a, coins[0], base_coins[idx - 1]])
+    expected = router.get_dy_path(pools, path, AMOUNT)
+
+    tx = router.exchange(pools, path, AMOUNT, expected, {"from": bob})
+
+    assert tx.return_value == expected
+    assert base_coins[idx - 1].balanceOf(bob) == expected
+    for coin in [coin_a, coins[0], base_coins[idx - 1]]:
+        assert coin.balanceOf(router) == 0
+
+
+def test_exchange_receiver(bob, charlie, router, plain_swap, swap, coin_a, coins, base_coins):
+    pools, path = _path([plain_swap, swap], [coin_a, coins[0], base_coins[0]])
+    amount = router.exchange(pools, path, AMOUNT, 0, charlie, {"from": bob}).return_value
+
+    assert base_coins[0].balanceOf(charlie) == amount
+    assert base_coins[0].balanceOf(bob) == 0
+
+
+def test_round_trip(bob, router, plain_swap, swap, coin_a, coins, base_coins):
+    pools, path = _path(
+        [plain_swap, swap, swap, plain_swap],
+        [coin_a, coins[0], base_coins[0], coins[0], coin_a],
+    )
+    expected = router.get_dy_path(pools, path, AMOUNT)
+
+    assert router.exchange(pools, path, AMOUNT, 0, {"from": bob}).return_value == expected
+    assert 0 < coin_a.balanceOf(bob) < AMOUNT
+
+
+def test_min_received(bob, router, plain_swap, swap, coin_a, coins, base_coins):
+    pools, path = _path([plain_swap, swap], [coin_a, coins[0], base_coins[0]])
+    expected = router.get_dy_path(pools, path, AMOUNT)
+
+    with brownie.reverts("Exchange resulted in fewer coins than expected"):
+        router.exchange(pools, path, AMOUNT, expected + 1, {"from": bob})
+
+
+def test_empty_path(bob, router, coin_a):
+    pools, path = _path([], [coin_a])
+    with brownie.reverts("dev: empty path"):
+        router.exchange(pools, path, AMOUNT, 0, {"from": bob})
+
+
+def test_unknown_pool(bob, router, plain_swap, coin_a, coins, plain_implementations):
+    # an implementation is a pool contract the factory never registered
+    unknown = plain_implementations[0]
+    for pools, path in [
+        _path([unknown], [coin_a, coins[0]]),
+        _path([plain_swap, unknown], [coin_a, coins[0], coin_a]),
+    ]:
+        with brownie.reverts("dev: pool not in factory"):
+            router.exchange(pools, path, AMOUNT, 0, {"from": bob})
+
+    assert coin_a.balanceOf(bob) == AMOUNT
+    for coin in [coin_a, coins[0]]:
+        assert coin.allowance(router, unknown) == 0
+
+
+def test_exchange_from_eth(bob, router, eth_swap, swap, coins, base_coins):
+    pools, path = _path([eth_swap, swap], [ETH_ADDRESS, coins[0], base_coins[0]])
+    expected = router.get_dy_path(pools, path, AMOUNT)
+
+    tx = router.exchange(pools, path, AMOUNT, expected, {"from": bob, "value": AMOUNT})
+
+    assert tx.return_value == expected
+    assert base_coins[0].balanceOf(bob) == expected
+    assert router.balance() == 0
+    assert coins[0].balanceOf(router) == 0
+
+
+def test_exchange_to_eth(bob, router, plain_swap, eth_swap, coin_a, coins):
+    pools, path = _path([plain_swap, eth_swap], [coin_a, coins[0], ETH_ADDRESS])
+    expected = router.get_dy_path(pools, path, AMOUNT)
+    balance = bob.balance()
+
+    tx = router.exchange(pools, path, AMOUNT, expected, {"from": bob})
+
+    assert tx.return_value == expected
+    assert bob.balance() == balance + expected
+    assert coins[0].balanceOf(router) == 0
+
+
+def test_exchange_through_eth(bob, router, plain_swap, eth_swap, coin_a, coins):
+    # the router holds ETH between the hops and forwards it as the call value
+    pools, path = _path([plain_swap, eth_swap, eth_swap], [coin_a, coins[0], ETH_ADDRESS, coins[0]])
+    expected = router.get_dy_path(pools, path, AMOUNT)
+
+    tx = router.exchange(pools, path, AMOUNT, expected, {"from": bob})
+
+    assert tx.return_value == expected
+    assert coins[0].balanceOf(bob) == expected
+    assert router.balance() == 0
+
+
+def test_exchange_ignores_router_balance(
+    alice, bob, router, plain_swap, eth_swap, swap, coin_a, coins, base_coins
+):
+    # coins already held by the router are never spent by a hop
+    coins[0]._mint_for_testing(router, AMOUNT, {"from": alice})
+    alice.transfer(router, AMOUNT)
+
+    for pools, path, value in [
+        (*_path([plain_swap, swap], [coin_a, coins[0], base_coins[0]]), 0),
+        (*_path([eth_swap, swap], [ETH_ADDRESS, coins[0], base_coins[0]]), AMOUNT // 2),
+        (*_path([plain_swap, eth_swap, eth_swap], [coin_a, coins[0], ETH_ADDRESS, coins[0]]), 0),
+    ]:
+        amount = value or AMOUNT // 4
+        expected = router.get_dy_path(pools, path, amount)
+        tx = router.exchange(pools, path, amount, 0, {"from": bob, "value": value})
+        assert tx.return_value == expected
+
+    assert coins[0].balanceOf(router) == AMOUNT
+    assert router.balance() == AMOUNT
@@ -0,0 +1,181 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob", "mint_bob")
+
+# rate of coin i is RATES[i] / 1e18
+RATES = [1_010_000_000_000_000_000, 1_020_000_000_000_000_000, 990_000_000_000_000_000, 10 ** 18]
+
+
+@pytest.fixture(scope="module")
+def oracles(alice, project):
+    oracles = [project.RateOracleMock.deploy({"from": alice}) for _ in range(4)]
+    for oracle, rate in zip(oracles, RATES):
+        oracle.set_rate(rate, {"from": alice})
+    return oracles
+
+
+@pytest.fixture(scope="module")
+def aggregate_oracle(alice, project):
+    oracle = project.RateOracleMock.deploy({"from": alice})
+    oracle.set_rates(RATES, {"from": alice})
+    return oracle
+
+
+@pytest.fixture(scope="module")
+def deploy_price_pool(
+    alice,
+    bob,
+    factory,
+    coins,
+    project,
+    initial_amounts,
+    plain_pool_size,
+    plain_implementations,
+    deploy_plain_implementation,
+):
+    implementation = deploy_plain_implementation(_pool_size=plain_pool_size, _pool_type="Price")
+    factory.set_plain_implementations(
+        plain_pool_size,
+        plain_implementations + [implementation] + [ZERO_ADDRESS] * 5,
+        {"from": alice},
+    )
+
+    def _deploy():
+        tx = factory.deploy_plain_pool(
+            "Price Pool",
+            "PP",
+            coins + [ZERO_ADDRESS] * (4 - plain_pool_size),
+            200,
+            4000000,
+            0,
+            len(plain_implementations),
+            {"from": alice},
+        )
+        swap = getattr(project, implementation._name).at(tx.return_value)
+        for coin, amount in zip(coins, initial_amounts):
+            coin._mint_for_testing(alice, amount, {"from": alice})
+            coin.approve(swap, 2 ** 256 - 1, {"from": alice})
+            coin.approve(swap, 2 ** 256 - 1, {"from": bob})
+        return swap
+
+    return _deploy
+
+
+def _method_id(contract_call, plain_pool_size):
+    # the 2 coin implementation takes bytes4, the others a left aligned uint256
+    if plain_pool_size == 2:
+        return contract_call.signature
+    return int(contract_call.signature, 16) << 224
+
+
+def _per_coin_pool(alice, deploy_price_pool, oracles, plain_pool_size, n_oracles):
+    swap = deploy_price_pool()
+    method_ids = [_method_id(oracles[0].rate, plain_pool_size)] * n_oracles
+    addresses = oracles[:n_oracles]
+    padding = plain_pool_size - n_oracles
+    swap.set_oracles(
+        method_ids + [0] * padding, addresses + [ZERO_ADDRESS] * padding, {"from": alice}
+    )
+    return swap
+
+
+def _aggregated_pool(alice, deploy_price_pool, aggregate_oracle, plain_pool_size, n_oracles):
+    swap = deploy_price_pool()
+    rates = RATES[:n_oracles] + [10 ** 18] * (4 - n_oracles)
+    aggregate_oracle.set_rates(rates, {"from": alice})
+    method = getattr(aggregate_oracle, f"rates_{plain_pool_size}")
+    swap.set_rate_oracle(_method_id(method, plain_pool_size), aggregate_oracle, {"from": alice})
+    return swap
+
+
+def test_rates_match(
+    alice,
+    bob,
+    decimals,
+    deploy_price_pool,
+    oracles,
+    aggregate_oracle,
+    initial_amounts,
+    plain_pool_size,
+):
+    per_coin = _per_coin_pool(alice, deploy_price_pool, oracles, plain_pool_size, plain_pool_size)
+    aggregated = _aggregated_pool(
+        alice, deploy_price_pool, aggregate_oracle, plain_pool_size, plain_pool_size
+    )
+    assert aggregated.rate_oracle() == aggregate_oracle
+    assert per_coin.rate_oracle() == ZERO_ADDRESS
+
+    expected = [
+        10 ** (36 - precision) * rate // 10 ** 18 for precision, rate in zip(decimals, RATES)
+    ]
+    assert per_coin.stored_rates() == expected
+    assert aggregated.stored_rates() == expected
+
+    dx = 10 ** (3 + decimals[0])
+    for swap in [per_coin, aggregated]:
+        swap.add_liquidity(initial_amounts, 0, {"from": alice})
+    assert aggregated.get_dy(0, 1, dx) == per_coin.get_dy(0, 1, dx)
+    dy = per_coin.exchange(0, 1, dx, 0, {"from": bob}).return_value
+    assert aggregated.exchange(0, 1, dx, 0, {"from": bob}).return_value == dy
+
+
+def test_oracles_set_once(alice, deploy_price_pool, aggregate_oracle, plain_pool_size):
+    swap = deploy_price_pool()
+    method_id = _method_id(getattr(aggregate_oracle, f"rates_{plain_pool_size}"), plain_pool_size)
+
+    # rates are unavailable until the oracles are set
+    with brownie.reverts():
+        swap.stored_rates()
+    assert swap.rate_oracle() == ZERO_ADDRESS
+
+    swap.set_rate_oracle(method_id, aggregate_oracle, {"from": alice})
+    with brownie.reverts():
+        swap.set_rate_oracle(method_id, aggregate_oracle, {"from": alice})
+    with brownie.reverts():
+        swap.set_oracles([0] * plain_pool_size, [ZERO_ADDRESS] * plain_pool_size, {"from": alice})
+
+
+def test_only_originator(bob, deploy_price_pool, aggregate_oracle, plain_pool_size):
+    swap = deploy_price_pool()
+    method_id = _method_id(getattr(aggregate_oracle, f"rates_{plain_pool_size}"), plain_pool_size)
+
+    with brownie.reverts():
+        swap.set_rate_oracle(method_id, aggregate_oracle, {"from": bob})
+    with brownie.reverts():
+        swap.set_oracles([0] * plain_pool_size, [ZERO_ADDRESS] * plain_pool_size, {"from": bob})
+
+
+@pytest.mark.parametrize("n_oracles", [1, 2, 4])
+def test_gas_exchange(
+    alice,
+    bob,
+    deploy_price_pool,
+    oracles,
+    aggregate_oracle,
+    decimals,
+    initial_amounts,
+    plain_pool_size,
+    n_oracles,
+    record_gas,
+):
+    if n_oracles > plain_pool_size:
+        pytest.skip("more oracles than coins")
+
+    pools = {
+        "per-coin": _per_coin_pool(alice, deploy_price_pool, oracles, plain_pool_size, n_oracles),
+        "aggregated": _aggregated_pool(
+            alice, deploy_price_pool, aggregate_oracle, plain_pool_size, n_oracles
+        ),
+    }
+    dx = 10 ** (3 + decimals[0])
+    gas_used = {}
+    for mode, swap in pools.items():
+        swap.add_liquidity(initial_amounts, 0, {"from": alice})
+        tx = swap.exchange(0, 1, dx, 0, {"from": bob})
+        gas_used[mode] = tx.gas_used
+        record_gas(f"Plain{plain_pool_size}Price", "exchange", f"{n_oracles}-oracles-{mode}", tx)
+
+    if n_oracles > 1:
+        assert gas_used["aggregated"] < gas_used["per-coin"]
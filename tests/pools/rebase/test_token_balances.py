@@ -1,4 +1,5 @@
 import pytest
+from brownie import ZERO_ADDRESS
 
 
 @pytest.fixture(autouse=True)
@@ -96,3 +97,108 @@ def test_no_fees(bob, fee_receiver, coins, swap):
 
     for coin in coins:
         assert coin.balanceOf(fee_receiver) == 0
+
+
+@pytest.fixture(scope="module")
+def snapshot_swap(
+    alice,
+    factory,
+    coins,
+    project,
+    plain_pool_size,
+    plain_implementations,
+    deploy_plain_implementation,
+):
+    implementation = deploy_plain_implementation(
+        _pool_size=plain_pool_size, _pool_type="BalancesSnapshot"
+    )
+    factory.set_plain_implementations(
+        plain_pool_size,
+        plain_implementations + [implementation] + [ZERO_ADDRESS] * 5,
+        {"from": alice},
+    )
+    tx = factory.deploy_plain_pool(
+        "Snapshot Pool",
+        "SP",
+        coins + [ZERO_ADDRESS] * (4 - plain_pool_size),
+        200,
+        4000000,
+        0,
+        len(plain_implementations),
+        {"from": alice},
+    )
+    return getattr(project, implementation._name).at(tx.return_value)
+
+
+@pytest.fixture
+def pools(alice, coins, initial_amounts, swap, snapshot_swap):
+    for coin, amount in zip(coins, initial_amounts):
+        coin._mint_for_testing(alice, amount * 3, {"from": alice})
+        coin.approve(snapshot_swap, 2 ** 256 - 1, {"from": alice})
+        coin.approve(swap, 2 ** 256 - 1, {"from": alice})
+    snapshot_swap.add_liquidity(initial_amounts, 0, {"from": alice})
+    return [swap, snapshot_swap]
+
+
+def _rebase(alice, coins, pools, amounts):
+    for pool in pools:
+        for coin, amount in zip(coins, amounts):
+            coin._mint_for_testing(pool, amount, {"from": alice})
+
+
+def _state(pool, n_coins):
+    return (
+        pool.get_balances(),
+        [pool.admin_balances(i) for i in range(n_coins)],
+        pool.totalSupply(),
+    )
+
+
+def test_snapshot_matches_after_rebase(alice, coins, initial_amounts, pools):
+    n_coins = len(coins)
+    results = []
+    for pool in pools:
+        _rebase(alice, coins, [pool], [amount // 10 for amount in initial_amounts])
+        results.append(
+            [
+                pool.exchange(0, 1, initial_amounts[0] // 5, 0, {"from": alice}).return_value,
+                pool.add_liquidity(
+                    [amount // (i + 2) for i, amount in enumerate(initial_amounts)],
+                    0,
+                    {"from": alice},
+                ).return_value,
+                pool.remove_liquidity_imbalance(
+                    [amount // 20 for amount in initial_amounts], 2 ** 256 - 1, {"from": alice}
+                ).return_value,
+                _state(pool, n_coins),
+            ]
+        )
+
+    assert results[0] == results[1]
+    _, admin_balances, _ = results[1][-1]
+    for i, coin in enumerate(coins):
+        assert coin.balanceOf(pools[1]) - admin_balances[i] == pools[1].balances(i)
+
+
+def test_snapshot_rebase_is_not_a_deposit(alice, coins, initial_amounts, pools):
+    # a rebase between calls accrues to the LPs, only the transfer counts as a deposit
+    _rebase(alice, coins, pools, initial_amounts)
+    deposit = [amount // 10 for amount in initial_amounts]
+    minted = [pool.add_liquidity(deposit, 0, {"from": alice}).return_value for pool in pools]
+
+    assert minted[0] == minted[1]
+    assert minted[1] < pools[1].totalSupply() // 10
+
+
+@pytest.mark.parametrize("function", ["exchange", "add_liquidity"])
+def test_snapshot_gas(alice, initial_amounts, pools, function):
+    if function == "exchange":
+        gas_used = [
+            pool.exchange(0, 1, initial_amounts[0] // 10, 0, {"from": alice}).gas_used
+            for pool in pools
+        ]
+    else:
+        deposit = [amount // 10 for amount in initial_amounts]
+        gas_used = [pool.add_liquidity(deposit, 0, {"from": alice}).gas_used for pool in pools]
+
+    assert gas_used[1] < gas_used[0]
@@ -0,0 +1,169 @@
+import pytest
+from brownie import ZERO_ADDRESS, chain
+from brownie.test import given, strategy
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "approve_bob", "mint_bob")
+
+MIN_RAMP_TIME = 86400
+
+
+@pytest.fixture(scope="module")
+def plain_warm_start(deploy_plain_implementation):
+    return deploy_plain_implementation(_pool_size=2, _pool_type="BasicWarmStart")
+
+
+@pytest.fixture(scope="module")
+def warm_start_swap(
+    alice,
+    factory,
+    coins,
+    project,
+    plain_implementations,
+    plain_warm_start,
+    set_plain_implementations,
+):
+    # deploy the warm start pool alongside `swap`, which always iterates from the sum
+    factory.set_plain_implementations(
+        2, plain_implementations + [plain_warm_start] + [ZERO_ADDRESS] * 5, {"from": alice}
+    )
+    tx = factory.deploy_plain_pool(
+        "Warm Start Pool",
+        "WSP",
+        coins + [ZERO_ADDRESS] * 2,
+        200,
+        4000000,
+        0,
+        len(plain_implementations),
+        {"from": alice},
+    )
+    return getattr(project, plain_warm_start._name).at(tx.return_value)
+
+
+@pytest.fixture(autouse=True)
+def setup_warm_start(alice, bob, coins, initial_amounts, warm_start_swap, add_initial_liquidity):
+    for coin, amount in zip(coins, initial_amounts):
+        coin._mint_for_testing(alice, amount, {"from": alice})
+        coin._mint_for_testing(bob, amount, {"from": bob})
+        coin.approve(warm_start_swap, 2 ** 256 - 1, {"from": alice})
+        coin.approve(warm_start_swap, 2 ** 256 - 1, {"from": bob})
+    warm_start_swap.add_liquidity(initial_amounts, 0, {"from": alice})
+
+
+def _imbalance(bob, pools, i, amount):
+    for pool in pools:
+        pool.exchange(i, 1 - i, amount, 0, {"from": bob})
+
+
+def test_ramp_getters(alice, swap, warm_start_swap):
+    assert warm_start_swap.future_A() == swap.future_A()
+    assert warm_start_swap.future_A_time() == swap.future_A_time() == 0
+
+    future_time = chain.time() + MIN_RAMP_TIME + 5
+    warm_start_swap.ramp_A(400, future_time, {"from": alice})
+
+    assert warm_start_swap.future_A() == 400 * 100
+    assert warm_start_swap.future_A_time() == future_time
+
+    warm_start_swap.stop_ramp_A({"from": alice})
+    assert warm_start_swap.future_A() == warm_start_swap.A_precise()
+
+
+@given(
+    skew=strategy("uint256", min_value=0, max_value=900_000),
+    amount=strategy("uint256", min_value=1, max_value=10 ** 5),
+    i=strategy("uint8", max_value=1),
+)
+def test_exchange(bob, swap, warm_start_swap, decimals, skew, amount, i):
+    _imbalance(bob, [swap, warm_start_swap], i, skew * 10 ** decimals[i])
+    dx = amount * 10 ** decimals[i]
+
+    expected = swap.exchange(i, 1 - i, dx, 0, {"from": bob}).return_value
+    dy = warm_start_swap.exchange(i, 1 - i, dx, 0, {"from": bob}).return_value
+
+    # Newton may land on either side of the root depending on the starting point
+    assert abs(dy - expected) <= 1
+
+
+@given(
+    skew=strategy("uint256", min_value=0, max_value=900_000),
+    amount=strategy("uint256", min_value=1, max_value=10 ** 5),
+    i=strategy("uint8", max_value=1),
+)
+def test_add_liquidity(bob, swap, warm_start_swap, decimals, skew, amount, i):
+    _imbalance(bob, [swap, warm_start_swap], i, skew * 10 ** decimals[i])
+    amounts = [0, 0]
+    amounts[i] = amount * 10 ** decimals[i]
+
+    expected = swap.add_liquidity(amounts, 0, {"from": bob}).return_value
+    minted = warm_start_swap.add_liquidity(amounts, 0, {"from": bob}).return_value
+
+    assert abs(minted - expected) <= max(expected // 10 ** 12, 1)
+    assert abs(warm_start_swap.get_virtual_price() - swap.get_virtual_price()) <= 1
+
+
+@given(
+    skew=strategy("uint256", min_value=0, max_value=900_000),
+    fraction=strategy("uint256", min_value=1, max_value=10 ** 4),
+    i=strategy("uint8", max_value=1),
+)
+def test_calc_withdraw_one_coin(alice, bob, swap, warm_start_swap, decimals, skew, fraction, i):
+    _imbalance(bob, [swap, warm_start_swap], i, skew * 10 ** decimals[i])
+    amount = swap.balanceOf(alice) * fraction // 10 ** 4
+
+    for idx in range(2):
+        expected = swap.calc_withdraw_one_coin(amount, idx)
+        dy = warm_start_swap.calc_withdraw_one_coin(amount, idx)
+        assert abs(dy - expected) <= 1
+
+
+def test_ramp_ignores_stored_D(alice, bob, swap, warm_start_swap, decimals):
+    future_time = chain.time() + MIN_RAMP_TIME + 5
+    for pool in [swap, warm_start_swap]:
+        pool.ramp_A(400, future_time, {"from": alice})
+    chain.sleep(MIN_RAMP_TIME // 2)
+    chain.mine()
+
+    dx = 1_000 * 10 ** decimals[0]
+    assert abs(warm_start_swap.get_dy(0, 1, dx) - swap.get_dy(0, 1, dx)) <= 1
+    assert abs(warm_start_swap.get_virtual_price() - swap.get_virtual_price()) <= 1
+
+
+@pytest.mark.parametrize("skew", [0, 100_000, 800_000])
+def test_gas_add_liquidity(bob, swap, warm_start_swap, decimals, skew):
+    _imbalance(bob, [swap, warm_start_swap], 0, skew * 10 ** decimals[0])
+    amounts = [1_000 * 10 ** precision for precision in decimals]
+
+    # the second deposit starts from the D stored by the first
+    for pool in [swap, warm_start_swap]:
+        pool.add_liquidity(amounts, 0, {"from": bob})
+    expected = swap.add_liquidity(amounts, 0, {"from": bob}).gas_used
+    gas_used = warm_start_swap.add_liquidity(amounts, 0, {"from": bob}).gas_used
+
+    assert gas_used < expected
+
+
+@pytest.mark.parametrize("skew", [0, 100_000, 800_000])
+def test_gas_exchange(bob, swap, warm_start_swap, decimals, skew):
+    _imbalance(bob, [swap, warm_start_swap], 0, skew * 10 ** decimals[0])
+    dx = 1_000 * 10 ** decimals[0]
+
+    expected = swap.exchange(0, 1, dx, 0, {"from": bob}).gas_used
+    gas_used = warm_start_swap.exchange(0, 1, dx, 0, {"from": bob}).gas_used
+
+    # `_A` reads a single slot, the stored D is stale after the skewing trade
+    assert gas_used < expected
+
+
+@pytest.mark.parametrize("skew", [0, 100_000, 800_000])
+def test_gas_remove_liquidity_imbalance(alice, swap, warm_start_swap, decimals, skew):
+    _imbalance(alice, [swap, warm_start_swap], 0, skew * 10 ** decimals[0])
+    amounts = [1_000 * 10 ** precision for precision in decimals]
+
+    for pool in [swap, warm_start_swap]:
+        pool.remove_liquidity_imbalance(amounts, 2 ** 256 - 1, {"from": alice})
+    expected = swap.remove_liquidity_imbalance(amounts, 2 ** 256 - 1, {"from": alice}).gas_used
+    gas_used = warm_start_swap.remove_liquidity_imbalance(
+        amounts, 2 ** 256 - 1, {"from": alice}
+    ).gas_used
+
+    assert gas_used < expected
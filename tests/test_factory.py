@@ -31,6 +31,41 @@ def test_find_pool_for_coins(factory, swap, coins, sending, receiving):
     assert factory.find_pool_for_coins(coins[sending], coins[receiving]) == swap
 
 
+@pytest.mark.parametrize("sending,receiving", [(0, 1), (1, 0)])
+def test_get_market_count(factory, swap, coins, sending, receiving):
+    market_count = factory.get_market_count(coins[sending], coins[receiving])
+
+    assert market_count >= 1
+    assert (
+        factory.find_pool_for_coins(coins[sending], coins[receiving], market_count) == ZERO_ADDRESS
+    )
+
+
+@pytest.mark.parametrize("sending,receiving", [(0, 1), (1, 0)])
+def test_find_pools_for_coins(factory, swap, coins, sending, receiving):
+    market_count = factory.get_market_count(coins[sending], coins[receiving])
+    expected = [
+        factory.find_pool_for_coins(coins[sending], coins[receiving], i)
+        for i in range(market_count)
+    ]
+
+    pools = factory.find_pools_for_coins(coins[sending], coins[receiving])
+
+    assert pools == expected + [ZERO_ADDRESS] * (32 - market_count)
+    assert swap in pools
+
+
+def test_find_pools_for_coins_offset_limit(factory, coins):
+    market_count = factory.get_market_count(coins[0], coins[1])
+
+    assert factory.find_pools_for_coins(coins[0], coins[1], market_count, 32) == [ZERO_ADDRESS] * 32
+    assert factory.find_pools_for_coins(coins[0], coins[1], 0, 0) == [ZERO_ADDRESS] * 32
+
+    pools = factory.find_pools_for_coins(coins[0], coins[1], market_count - 1, 1)
+    assert pools[0] == factory.find_pool_for_coins(coins[0], coins[1], market_count - 1)
+    assert pools[1:] == [ZERO_ADDRESS] * 31
+
+
 @pytest.mark.skip
 @pytest.mark.parametrize("idx", range(1, 4))
 def test_find_pool_for_coins_underlying(factory, is_rebase_pool, swap, underlying_coins, idx):
@@ -117,6 +152,47 @@ def test_get_admin_balances(factory, swap, plain_pool_size):
     ] + [0] * (4 - plain_pool_size)
 
 
+def test_get_pool_data(factory, swap):
+    data = factory.get_pool_data(swap)
+
+    assert data["pool"] == swap
+    assert data["base_pool"] == factory.get_base_pool(swap)
+    assert data["implementation"] == factory.get_implementation_address(swap)
+    assert data["liquidity_gauge"] == factory.get_gauge(swap)
+    assert data["coins"] == factory.get_coins(swap)
+    assert data["decimals"] == factory.get_decimals(swap)
+    assert data["balances"] == factory.get_balances(swap)
+    assert data["admin_balances"] == factory.get_admin_balances(swap)
+    assert data["n_coins"] == factory.get_n_coins(swap)
+    assert data["A"] == factory.get_A(swap)
+    assert [data["fee"], data["admin_fee"]] == factory.get_fees(swap)
+    assert data["asset_type"] == factory.get_pool_asset_type(swap)
+
+
+def test_get_pool_data_unknown_pool(factory, alice):
+    with brownie.reverts("dev: unknown pool"):
+        factory.get_pool_data(alice)
+
+
+def test_get_pools_data(factory, factory_reader, swap):
+    pool_count = factory.pool_count()
+    pools_data = factory_reader.get_pools_data(factory, 0, pool_count)
+
+    for i in range(pool_count):
+        data = factory.get_pool_data(factory.pool_list(i))
+        assert {key: pools_data[key][i] for key in data.keys()} == data.dict()
+    assert pools_data["pool"][pool_count:] == [ZERO_ADDRESS] * (32 - pool_count)
+    assert swap in pools_data["pool"]
+
+
+def test_get_pools_data_pagination(factory, factory_reader):
+    pool_count = factory.pool_count()
+    pools_data = factory_reader.get_pools_data(factory, pool_count - 1, 5)
+
+    assert pools_data["pool"][0] == factory.pool_list(pool_count - 1)
+    assert pools_data["pool"][1] == ZERO_ADDRESS
+
+
 @pytest.mark.skip
 @pytest.mark.parametrize("sending,receiving", itertools.permutations(range(1, 4), 2))
 def test_get_coin_indices_underlying(factory, swap, sending, receiving, underlying_coins):
@@ -135,6 +211,49 @@ def test_get_coin_indices(factory, swap, sending, receiving, coins):
     assert j == receiving
 
 
+@pytest.fixture(scope="module")
+def coin_indices_loop(alice, CoinIndicesLoop, factory, swap):
+    # the same pool, resolved by the coin loop the map replaced
+    contract = CoinIndicesLoop.deploy({"from": alice})
+    contract.add_pool(factory, swap, {"from": alice})
+    return contract
+
+
+def test_get_coin_indices_gas(
+    alice, factory, swap, coins, underlying_coins, is_meta_pool, coin_indices_loop, record_gas
+):
+    pairs = [(coins, False)]
+    if is_meta_pool:
+        pairs.append((underlying_coins, True))
+
+    gas_used = []
+    for pool_coins, is_underlying in pairs:
+        for sending, receiving in itertools.permutations(range(len(pool_coins)), 2):
+            expected = (sending, receiving, is_underlying)
+            coin_pair = (pool_coins[sending], pool_coins[receiving])
+            assert factory.get_coin_indices(swap, *coin_pair) == expected
+            assert coin_indices_loop.get_coin_indices(swap, *coin_pair) == expected
+
+            tx = factory.get_coin_indices.transact(swap, *coin_pair, {"from": alice})
+            loop_tx = coin_indices_loop.get_coin_indices.transact(swap, *coin_pair, {"from": alice})
+            scenario = f"{'underlying-' if is_underlying else ''}{sending}-{receiving}"
+            record_gas("Factory", "get_coin_indices", scenario, tx)
+            record_gas("CoinIndicesLoop", "get_coin_indices", scenario, loop_tx)
+
+            # the loop reads at least the first coin, the base pool and one more coin,
+            # which outweighs the longer function dispatch of the factory
+            assert tx.gas_used < loop_tx.gas_used
+            gas_used.append(tx.gas_used)
+
+    # two map reads resolve any pair, wherever the coins sit within the pool
+    assert max(gas_used) - min(gas_used) < 1000
+
+
+def test_get_coin_indices_same_coin(factory, swap, coins):
+    with brownie.reverts("No available market"):
+        factory.get_coin_indices(swap, coins[0], coins[0])
+
+
 @pytest.mark.skip
 @pytest.mark.parametrize("idx", range(1, 4))
 def test_get_coin_indices_reverts(factory, swap, base_lp_token, underlying_coins, idx):
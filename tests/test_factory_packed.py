@@ -0,0 +1,229 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity")
+
+GETTERS = [
+    "get_base_pool",
+    "get_n_coins",
+    "get_coins",
+    "get_decimals",
+    "get_balances",
+    "get_A",
+    "get_fees",
+    "get_admin_balances",
+    "get_gauge",
+    "get_implementation_address",
+    "is_meta",
+    "get_pool_asset_type",
+    "get_fee_receiver",
+]
+META_GETTERS = ["get_meta_n_coins", "get_underlying_coins", "get_underlying_decimals"]
+
+# unpacking a single field costs a few opcodes over reading its own slot
+UNPACK_OVERHEAD = 100
+
+
+@pytest.fixture(scope="module")
+def factories(
+    alice,
+    Factory,
+    FactoryPacked,
+    deploy_factory,
+    base_pool,
+    fee_receiver,
+    plain_implementations,
+    plain_pool_size,
+    meta_implementations,
+    pool_type,
+    is_meta_pool,
+):
+    # a fresh unpacked factory keeps the storage writes of both deployments comparable
+    factories = {i._name: deploy_factory(i) for i in [Factory, FactoryPacked]}
+    for factory in factories.values():
+        factory.set_plain_implementations(
+            plain_pool_size, plain_implementations + [ZERO_ADDRESS] * 6, {"from": alice}
+        )
+        if is_meta_pool:
+            asset_type = 0 if pool_type == 4 else 2 if pool_type == 5 else 3
+            factory.add_base_pool(
+                base_pool,
+                fee_receiver,
+                asset_type,
+                meta_implementations + [ZERO_ADDRESS] * 8,
+                {"from": alice},
+            )
+    return factories
+
+
+@pytest.fixture(scope="module")
+def deployments(
+    alice,
+    factories,
+    base_pool,
+    coins,
+    plain_pool_size,
+    pool_type,
+    is_meta_pool,
+    meta_implementation_idx,
+):
+    deployments = {}
+    for name, factory in factories.items():
+        if is_meta_pool:
+            tx = factory.deploy_metapool(
+                base_pool,
+                "Test Meta Pool",
+                "TMP",
+                coins[0],
+                200,
+                4000000,
+                meta_implementation_idx,
+                {"from": alice},
+            )
+        else:
+            tx = factory.deploy_plain_pool(
+                "Test Plain Pool",
+                "TPP",
+                coins + [ZERO_ADDRESS] * (4 - plain_pool_size),
+                200,
+                4000000,
+                0,
+                pool_type,
+                {"from": alice},
+            )
+        deployments[name] = (factory, tx.return_value, tx)
+    return deployments
+
+
+@pytest.fixture(scope="module")
+def packed_factory(factories):
+    return factories["FactoryPacked"]
+
+
+def _getters(is_meta_pool):
+    return GETTERS + META_GETTERS if is_meta_pool else GETTERS
+
+
+def test_deploy_gas(deployments, is_meta_pool, record_gas):
+    function = "deploy_metapool" if is_meta_pool else "deploy_plain_pool"
+    gas_used = {}
+    for name, (_, _, tx) in deployments.items():
+        gas_used[name] = tx.gas_used
+        record_gas(name, function, "first-pool", tx)
+
+    assert gas_used["FactoryPacked"] < gas_used["Factory"]
+
+
+def test_getters_match(alice, deployments, is_meta_pool, record_gas):
+    factory, pool, _ = deployments["Factory"]
+    packed_factory, packed_pool, _ = deployments["FactoryPacked"]
+
+    for getter in _getters(is_meta_pool):
+        expected = getattr(factory, getter)(pool)
+        assert getattr(packed_factory, getter)(packed_pool) == expected, getter
+
+        gas_used = {}
+        for name, (contract, address, _) in deployments.items():
+            tx = getattr(contract, getter).transact(address, {"from": alice})
+            gas_used[name] = tx.gas_used
+            record_gas(name, getter, "deployed-pool", tx)
+        assert gas_used["FactoryPacked"] <= gas_used["Factory"] + UNPACK_OVERHEAD
+
+
+@pytest.mark.parametrize("sending,receiving", [(0, 1), (1, 0)])
+def test_get_coin_indices(alice, deployments, coins, sending, receiving, record_gas):
+    gas_used = {}
+    for name, (factory, pool, _) in deployments.items():
+        assert factory.get_coin_indices(pool, coins[sending], coins[receiving]) == (
+            sending,
+            receiving,
+            False,
+        )
+        tx = factory.get_coin_indices.transact(
+            pool, coins[sending], coins[receiving], {"from": alice}
+        )
+        gas_used[name] = tx.gas_used
+        record_gas(name, "get_coin_indices", f"{sending}-{receiving}", tx)
+
+    # both layouts resolve the indices from the same coin -> index map
+    assert gas_used["FactoryPacked"] <= gas_used["Factory"] + UNPACK_OVERHEAD
+
+
+def test_get_pool_data(alice, deployments, record_gas):
+    gas_used = {}
+    data = {}
+    for name, (factory, pool, _) in deployments.items():
+        data[name] = factory.get_pool_data(pool).dict()
+        assert data[name].pop("pool") == pool
+        tx = factory.get_pool_data.transact(pool, {"from": alice})
+        gas_used[name] = tx.gas_used
+        record_gas(name, "get_pool_data", "deployed-pool", tx)
+
+    assert data["FactoryPacked"] == data["Factory"]
+    assert gas_used["FactoryPacked"] < gas_used["Factory"]
+
+
+def test_factory_reader(deployments, factory_reader):
+    pools_data = {}
+    for name, (factory, pool, _) in deployments.items():
+        start = factory.pool_count() - 1
+        pools_data[name] = factory_reader.get_pools_data(factory, start, 1).dict()
+        assert pools_data[name].pop("pool")[0] == pool
+
+    assert pools_data["FactoryPacked"] == pools_data["Factory"]
+
+
+def test_find_pool_for_coins(deployments, coins):
+    for factory, pool, _ in deployments.values():
+        assert factory.find_pool_for_coins(coins[0], coins[1]) == pool
+        assert factory.find_pool_for_coins(coins[1], coins[0]) == pool
+        assert factory.get_market_count(coins[0], coins[1]) == 1
+
+
+def test_batch_set_pool_asset_type(alice, deployments, is_meta_pool):
+    if is_meta_pool:
+        pytest.skip("metapools take the asset type of their base pool")
+
+    packed_factory, pool, _ = deployments["FactoryPacked"]
+    decimals = packed_factory.get_decimals(pool)
+    packed_factory.batch_set_pool_asset_type(
+        [pool] + [ZERO_ADDRESS] * 31, [255] + [0] * 31, {"from": alice}
+    )
+
+    assert packed_factory.get_pool_asset_type(pool) == 255
+    assert packed_factory.get_decimals(pool) == decimals
+    assert packed_factory.get_base_pool(pool) == ZERO_ADDRESS
+
+    with brownie.reverts():
+        packed_factory.batch_set_pool_asset_type(
+            [pool] + [ZERO_ADDRESS] * 31, [256] + [0] * 31, {"from": alice}
+        )
+
+
+def test_add_existing_metapools(
+    alice, factory, packed_factory, deployments, swap, coins, is_meta_pool
+):
+    packed_factory.add_existing_metapools([swap] + [ZERO_ADDRESS] * 9, {"from": alice})
+
+    assert packed_factory.pool_count() == 2
+    assert packed_factory.pool_list(1) == swap
+    for getter in _getters(is_meta_pool):
+        assert getattr(packed_factory, getter)(swap) == getattr(factory, getter)(swap), getter
+    assert packed_factory.find_pool_for_coins(coins[0], coins[1], 1) == swap
+    # markets are only added between the coins of the pool
+    for coin in factory.get_coins(swap):
+        if coin != ZERO_ADDRESS:
+            assert packed_factory.find_pool_for_coins(coin, ZERO_ADDRESS) == ZERO_ADDRESS
+            assert packed_factory.get_market_count(coin, ZERO_ADDRESS) == 0
+
+
+def test_add_existing_metapools_duplicate_pool(alice, packed_factory, swap):
+    packed_factory.add_existing_metapools([swap] + [ZERO_ADDRESS] * 9, {"from": alice})
+    with brownie.reverts("dev: pool already exists"):
+        packed_factory.add_existing_metapools([swap] + [ZERO_ADDRESS] * 9, {"from": alice})
+
+
+def test_add_existing_metapools_unknown_pool(alice, packed_factory):
+    with brownie.reverts("dev: pool not in old factory"):
+        packed_factory.add_existing_metapools([alice] + [ZERO_ADDRESS] * 9, {"from": alice})
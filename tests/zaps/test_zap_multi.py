@@ -0,0 +1,103 @@
+import brownie
+import pytest
+
+pytestmark = pytest.mark.usefixtures("add_initial_liquidity", "mint_bob_underlying", "approve_zap")
+
+FUNCTIONS = [
+    "add_liquidity",
+    "remove_liquidity",
+    "remove_liquidity_one_coin",
+    "remove_liquidity_imbalance",
+]
+# the multi zap takes amounts for up to 4 base pool coins
+N_ALL_COINS = 5
+# every cached value costs one cold storage read over a compile-time constant
+COLD_SLOAD = 2100
+
+
+@pytest.fixture(autouse=True)
+def setup(alice, bob, swap, coins, base_coins, zap_multi):
+    for token in [*coins, *base_coins, swap]:
+        token.approve(zap_multi, 2 ** 256 - 1, {"from": bob})
+    swap.transfer(bob, swap.balanceOf(alice) // 2, {"from": alice})
+
+
+def _pad(amounts, length=N_ALL_COINS):
+    return amounts + [0] * (length - len(amounts))
+
+
+def _args(function, amounts, n_all, bob, swap):
+    if function == "add_liquidity":
+        return [_pad(amounts, n_all), 0]
+    if function == "remove_liquidity":
+        return [swap.balanceOf(bob) // 10, [0] * n_all]
+    if function == "remove_liquidity_one_coin":
+        return [swap.balanceOf(bob) // 10, 2, 0]
+    return [_pad(amounts, n_all), swap.balanceOf(bob)]
+
+
+def test_first_use(bob, factory, swap, zap_multi, initial_amounts_underlying, record_gas):
+    amounts = _pad([i // 10 for i in initial_amounts_underlying])
+
+    tx = zap_multi.add_liquidity(swap, amounts, 0, {"from": bob})
+    assert factory.address in [i["to"] for i in tx.subcalls]
+    record_gas("DepositZapMulti", "add_liquidity", "first-use", tx)
+
+    # later calls for the same metapool only read the cache
+    tx = zap_multi.add_liquidity(swap, amounts, 0, {"from": bob})
+    assert factory.address not in [i["to"] for i in tx.subcalls]
+
+
+@pytest.mark.parametrize("function", FUNCTIONS)
+def test_matches_constant_zap(
+    bob,
+    chain,
+    swap,
+    zap,
+    zap_multi,
+    underlying_coins,
+    initial_amounts_underlying,
+    function,
+    record_gas,
+):
+    n_all = len(underlying_coins)
+    amounts = [i // 10 for i in initial_amounts_underlying]
+    # fill the cache first, so only the cached reads are compared
+    zap_multi.add_liquidity(swap, _pad([amounts[0]]), 0, {"from": bob})
+
+    tx = getattr(zap, function)(swap, *_args(function, amounts, n_all, bob, swap), {"from": bob})
+    chain.undo()
+    multi_tx = getattr(zap_multi, function)(
+        swap, *_args(function, amounts, N_ALL_COINS, bob, swap), {"from": bob}
+    )
+
+    if function == "remove_liquidity":
+        assert list(multi_tx.return_value) == _pad(list(tx.return_value))
+    else:
+        assert multi_tx.return_value == tx.return_value
+
+    record_gas("DepositZap", function, "base-pool-constants", tx)
+    record_gas("DepositZapMulti", function, "cached-base-pool", multi_tx)
+    # the pool data slot, the base LP token and one slot per base pool coin
+    assert multi_tx.gas_used <= tx.gas_used + COLD_SLOAD * (n_all + 1)
+
+
+@pytest.mark.parametrize("idx", range(1, 4))
+def test_calc_matches_constant_zap(bob, swap, zap, zap_multi, initial_amounts_underlying, idx):
+    amounts = [i // 10 for i in initial_amounts_underlying]
+    amount = swap.balanceOf(bob) // 10
+
+    for _ in range(2):
+        assert zap_multi.calc_token_amount(swap, _pad(amounts), True) == zap.calc_token_amount(
+            swap, amounts, True
+        )
+        assert zap_multi.calc_withdraw_one_coin(swap, amount, idx) == zap.calc_withdraw_one_coin(
+            swap, amount, idx
+        )
+        # the views read the factory until the first state changing call caches the pool
+        zap_multi.add_liquidity(swap, _pad(amounts), 0, {"from": bob})
+
+
+def test_not_a_metapool(bob, base_pool, zap_multi):
+    with brownie.reverts("dev: not a factory metapool"):
+        zap_multi.add_liquidity(base_pool, [0] * N_ALL_COINS, 0, {"from": bob})